@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GeographicShp benchmarks: startup, lookups (dist / buffer / inclusion methods, fast lookups), ISO distances, geometries check
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+from gnss2iso.LayerRegistry import LayerRegistry
+from gnss2iso.Station import Station
+
+N_LOOKUPS = 100 #single station lookups per round
+MODES = {"dist": {"dist": True}, "buffer": {"dist": False, "buffer": 0.5}, "inclusion": {"dist": False}}
+
+
+@pytest.fixture(scope="module")
+def stas(stations):
+    lon, lat = stations
+    return [Station(lon=x, lat=y) for x, y in zip(lon[:N_LOOKUPS], lat[:N_LOOKUPS])]
+
+
+##############################################################################################################################
+####    startup
+##############################################################################################################################
+
+def bench_startup(benchmark, shapefile):
+    benchmark(GeographicShp, shapefile)
+
+
+def bench_startup_cache(benchmark, shapefile, tmp_path):
+    GeographicShp(shapefile, cache_dir=str(tmp_path)) #cache written once
+    benchmark(GeographicShp, shapefile, cache_dir=str(tmp_path))
+
+
+def bench_startup_geometry_store(benchmark, geo, tmp_path):
+    geo.export_geometry_store(str(tmp_path / "store")) #store written once
+    benchmark(GeographicShp.from_geometry_store, str(tmp_path / "store"))
+
+
+##############################################################################################################################
+####    lookups
+##############################################################################################################################
+
+@pytest.mark.parametrize("mode", MODES)
+def bench_get_iso(benchmark, geo, stas, mode):
+    benchmark(lambda: [geo.get_iso(sta=sta, **MODES[mode]) for sta in stas])
+
+
+@pytest.mark.parametrize("mode", MODES)
+def bench_lookup(benchmark, geo, stas, mode):
+    benchmark(lambda: [geo.lookup(sta=sta, **MODES[mode]) for sta in stas])
+
+
+def bench_to_dataframe(benchmark, geo, stas):
+    results = [geo.lookup(sta=sta, attr=['NAME_LONG', 'ISO_A3_EH']) for sta in stas]
+    benchmark(geo.to_dataframe, results, get_dist=True)
+
+
+@pytest.mark.parametrize("mode", MODES)
+def bench_get_iso_many(benchmark, geo, stations, mode):
+    lon, lat = stations
+    benchmark(geo.get_iso_many, lon=lon, lat=lat, **MODES[mode])
+
+
+def bench_get_attr_incremental(benchmark, geo, stations, tmp_path):
+    lon, lat = stations
+    names = [f"S{num}" for num in range(len(lon))]
+    store = str(tmp_path / "results.sqlite")
+    geo.get_attr_incremental(store, names=names, lon=lon, lat=lat) #results stored once: reused
+    benchmark(geo.get_attr_incremental, store, names=names, lon=lon, lat=lat)
+
+
+def bench_layer_registry(benchmark, shapefile, stations):
+    lon, lat = stations
+    layers = LayerRegistry()
+    layers.add("units", shapefile, attr=['ISO_A3_EH'])
+    layers.add("sov", shapefile, attr=['SOV_A3'], dist=False)
+    layers.get_attr_many(lon=lon[:1], lat=lat[:1]) #combined spatial index built once
+    benchmark(layers.get_attr_many, lon=lon, lat=lat)
+
+
+def bench_get_nearest_k(benchmark, geo, stations):
+    lon, lat = stations
+    benchmark(geo.get_nearest_k, lon=lon, lat=lat, k=3)
+
+
+##############################################################################################################################
+####    distances to ISO countries
+##############################################################################################################################
+
+def bench_get_country_ISOdist(benchmark, geo, stas):
+    iso = geo.gdf["ISO_A3_EH"].iloc[0]
+    geo.get_country_ISOdist(iso, sta=stas[0]) #reprojection cached
+    benchmark(lambda: [geo.get_country_ISOdist(iso, sta=sta) for sta in stas])
+
+
+def bench_get_country_ISOdist_many(benchmark, geo, stations):
+    lon, lat = stations
+    isos = list(geo.gdf["ISO_A3_EH"].iloc[:5])
+    geo.get_country_ISOdist_many(isos, lon=lon[:1], lat=lat[:1]) #reprojection cached
+    benchmark(geo.get_country_ISOdist_many, isos, lon=lon, lat=lat)
+
+
+##############################################################################################################################
+####    geometries check
+##############################################################################################################################
+
+def bench_check_geometries_validity(benchmark, geo):
+    benchmark(geo.check_geometries_validity)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import-time benchmarks (fresh interpreter per round): 'import gnss2iso' & Station conversions must not load
+heavy dependencies (lazy imports, see gnss2iso/__init__.py), GeographicShp loads them on first use
+
+@author: julienbarneoud
+"""
+import os
+import sys
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) #gnss2iso package parent directory
+HEAVY = ["pandas", "geopandas", "shapely", "pyproj", "tqdm"]
+ROUNDS = 5
+
+
+def _run(code):
+    """ Runs 'code' in a new python interpreter, returns its output """
+    return subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+
+
+def bench_import_station(benchmark):
+    code = ("import sys, gnss2iso; sta = gnss2iso.Station(lon=2.33, lat=48.8); gnss2iso.Station(x=sta.x, y=sta.y, z=sta.z)\n"
+            f"print(*[module for module in {HEAVY} if module in sys.modules])")
+    loaded = benchmark.pedantic(_run, args=(code,), rounds=ROUNDS, iterations=1)
+    assert not loaded.split(), f"heavy modules loaded by 'import gnss2iso' & Station: {loaded}"
+
+
+def bench_import_geographic(benchmark):
+    benchmark.pedantic(_run, args=("from gnss2iso import GeographicShp",), rounds=ROUNDS, iterations=1)
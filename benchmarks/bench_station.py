@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Station construction benchmarks
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+
+#internal import
+from gnss2iso.Station import Station
+from gnss2iso.StationArray import StationArray
+
+N_STATIONS = 1000 #Station obj per round
+
+
+def bench_station_geo(benchmark, stations):
+    lon, lat = stations
+    lon, lat = lon[:N_STATIONS].tolist(), lat[:N_STATIONS].tolist()
+    benchmark(lambda: [Station(lon=x, lat=y) for x, y in zip(lon, lat)])
+
+
+def bench_station_xyz(benchmark, stations):
+    lon, lat = stations
+    sta = StationArray(lon=lon[:N_STATIONS], lat=lat[:N_STATIONS])
+    xyz = list(zip(sta.x.tolist(), sta.y.tolist(), sta.z.tolist()))
+    benchmark(lambda: [Station(x=x, y=y, z=z) for x, y, z in xyz])
+
+
+def bench_station_array(benchmark, stations):
+    lon, lat = stations
+    benchmark(lambda: StationArray(lon=lon, lat=lat).point)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark fixtures: synthetic shapefile & stations (see gnss2iso.Synthetic), fully offline
+
+Sizes from the command line (stress sizes: --bench-polygons 5000 --bench-vertices 2000):
+    pytest benchmarks --bench-polygons 250 --bench-vertices 200 --bench-stations 1000
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+from gnss2iso.Synthetic import write_shapefile, synthetic_stations
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("gnss2iso benchmarks")
+    group.addoption("--bench-polygons", type=int, default=250, help="synthetic shapefile grid cells. Default 250")
+    group.addoption("--bench-vertices", type=int, default=200, help="vertices per polygon. Default 200")
+    group.addoption("--bench-stations", type=int, default=1000, help="stations of batch benchmarks. Default 1000")
+    group.addoption("--bench-seed", type=int, default=0, help="random seed. Default 0")
+
+
+@pytest.fixture(scope="session")
+def bench_size(request):
+    """ Benchmark sizes from command line options """
+    options = request.config.option
+    return {"n_polygons": options.bench_polygons, "n_vertices": options.bench_vertices,
+            "n_stations": options.bench_stations, "seed": options.bench_seed}
+
+
+@pytest.fixture(scope="session")
+def shapefile(tmp_path_factory, bench_size):
+    """ Synthetic shapefile path (written once per session), with an overlapping polygon """
+    path = tmp_path_factory.mktemp("shp") / "synthetic.shp"
+    write_shapefile(str(path), n_polygons=bench_size["n_polygons"], n_vertices=bench_size["n_vertices"],
+                    overlaps=1, n_columns=20, seed=bench_size["seed"])
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def geo(shapefile):
+    """ GeographicShp obj shared by lookup benchmarks (spatial index built once) """
+    geo = GeographicShp(shapefile)
+    geo.gdf.sindex
+    return geo
+
+
+@pytest.fixture(scope="session")
+def stations(geo, bench_size):
+    """ Station coordinates (lon, lat): half uniform, half near borders """
+    return synthetic_stations(bench_size["n_stations"], geo.gdf, near_border=0.5, seed=bench_size["seed"])
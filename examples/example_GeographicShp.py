@@ -6,9 +6,12 @@ Example usage for gnss2iso.GeographicShp class
 @author: julienbarneoud
 """
 import os
+import logging
 from gnss2iso import Station
 from gnss2iso import GeographicShp
 
+logging.basicConfig(level=logging.INFO) #gnss2iso messages (warnings, geometries check...)
+
 #######################################################################################
 #Example usage
 #######################################################################################
@@ -23,4 +23,13 @@ print("\nBRAZ from lat,lon(0,360) params:", braz_360.__dict__)
 print("\nBRAZ from lat,lon(-180,180) params:", braz_180.__dict__)
 print("\nBRAZ from xyz:", braz_xyz.__dict__)
 
-        
+#######################################################################################
+#StationArray: many stations at once (numpy arrays)
+#######################################################################################
+from gnss2iso import StationArray
+
+stas = StationArray(x=[4115014.0800, 4595212.4630], y=[-4550641.5499, 2039473.7260], z=[-1741444.0356, 3912617.4070],
+                    name=['BRAZ', 'GRAS'], domes=['41606M001', '10002M006'])
+print("\nStationArray from xyz:")
+print(stas.to_dataframe())
+print("\nBRAZ Station obj:", stas[0].__dict__)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import numpy as np
+import pandas as pd
+
+class AttributeTable:
+    """
+    Shapefile attribute columns read by polygon position (in GeographicShp.gdf),
+    for lookups without pandas objects (see GeographicShp.lookup & GeographicShp.to_dataframe)
+
+        * one polygon: plain python values (None: no country)
+        * many polygons: text columns as categorical (code -1 <-> no country), other columns as numpy arrays
+
+    Values always read from the geodataframe (no copy): attribute edits of GeographicShp.gdf seen at once.
+
+    Attributes:
+        - columns: available attribute columns
+        - n_rows : number of polygons
+
+    Methods:
+        - row()
+        - take()
+    """
+    def __init__(self, gdf):
+        """
+        Parameters
+        ----------
+        gdf : geopandas.geodataframe
+            shapefile table (geometry column ignored)
+        """
+        self._gdf = gdf
+
+
+    @property
+    def columns(self):
+        return [column for column in self._gdf.columns if column != self._gdf.geometry.name]
+
+
+    @property
+    def n_rows(self):
+        return len(self._gdf)
+
+
+    def row(self, pos, attr):
+        """
+        Attribute values of one polygon
+
+        Parameters
+        ----------
+        pos : int
+            polygon position, -1: no country (None values)
+        attr : tuple of str
+            attribute columns
+
+        Returns
+        -------
+        tuple of attribute values (python objects, None if missing)
+        """
+        if pos < 0:
+            return (None,) * len(attr)
+
+        values = []
+        for column in attr:
+            value = self._gdf.iat[pos, self._position(column)]
+            if pd.isna(value):
+                value = None
+            elif isinstance(value, np.generic):
+                value = value.item()
+            values.append(value)
+        return tuple(values)
+
+
+    def take(self, pos, attr, index=None):
+        """
+        Attribute values of many polygons, in one step
+
+        Parameters
+        ----------
+        pos : numpy.ndarray of int
+            polygon positions, -1: no country (NaN values)
+        attr : list of str
+            attribute columns
+        index : pandas.Index, optional
+            index of the output dataframe. Default None (i.e. RangeIndex)
+
+        Returns
+        -------
+        pandas.dataframe with columns 'attr' (text columns: categorical dtype)
+        """
+        pos = np.asarray(pos, dtype=np.intp)
+        missing = pos < 0
+        data = {}
+        for column in attr:
+            series = self._gdf.iloc[:, self._position(column)]
+            if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+                array = series.to_numpy()
+                data[column] = np.where(missing, np.nan, array[pos].astype(float)) if missing.any() else array[pos] #no country -> NaN
+            else:
+                categorical = pd.Categorical(series)
+                codes = np.where(missing, -1, categorical.codes[pos])
+                data[column] = pd.Categorical.from_codes(codes, categories=categorical.categories)
+        return pd.DataFrame(data, index=index)
+
+
+    def _position(self, column):
+        """ Position of an attribute column in the geodataframe """
+        try:
+            return self._gdf.columns.get_loc(column)
+        except KeyError:
+            raise KeyError(f"Attribute '{column}' not in shapefile table: {self.columns}") from None
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+r"""
+Command line station annotator: 'gnss2iso' console entry point
+
+Streams station records (CSV/TSV file or stdin) by batches and writes them back
+with ISO code, shapefile attributes and distance columns (file or stdout).
+Memory bounded by the batch size, output written batch by batch: usable in Unix pipelines.
+
+    gnss2iso data/ne_10m_admin_0_map_units.shp stations.csv -o stations_iso.csv
+    cat stations.tsv | gnss2iso map_units.shp --sep '\t' --xyz --get-dist > stations_iso.tsv
+    gnss2iso map_units.shp stations.csv --out-sep '\t' | sort -k4
+
+@author: julienbarneoud
+"""
+import os
+import sys
+sys.path.append('..')
+import io
+import argparse
+import contextlib
+import logging
+from itertools import islice
+import pandas as pd
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+from gnss2iso.StationArray import StationArray
+
+
+def build_parser():
+    """ Command line arguments parser """
+    parser = argparse.ArgumentParser(prog="gnss2iso", description="Annotate station records (CSV/TSV) with ISO country codes from a shapefile.")
+    parser.add_argument("shapefile", help="shapefile path (.shp)")
+    parser.add_argument("input", nargs="?", default="-", help="input CSV/TSV file, '-' for stdin [default]")
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout [default]")
+    parser.add_argument("--sep", default=None, help="input column separator. Default: tab for .tsv input, else ','")
+    parser.add_argument("--out-sep", default=None, help="output column separator. Default: same as input")
+
+    coords = parser.add_argument_group("coordinates")
+    coords.add_argument("--lon-col", default="lon", help="longitude column [degree]. Default 'lon'")
+    coords.add_argument("--lat-col", default="lat", help="latitude column [degree]. Default 'lat'")
+    coords.add_argument("--xyz", action="store_true", help="use cartesian coordinates (GRS80) instead of lon/lat")
+    coords.add_argument("--xyz-cols", nargs=3, default=["x", "y", "z"], metavar=("X", "Y", "Z"), help="cartesian columns. Default 'x' 'y' 'z'")
+
+    lookup = parser.add_argument_group("lookup (see GeographicShp.get_attr)")
+    lookup.add_argument("--attr", nargs="+", default=["ISO_A3_EH"], help="shapefile attribute(s) to add. Default 'ISO_A3_EH'")
+    lookup.add_argument("--buffer", type=float, default=0, help="buffer around stations (shapefile unit). Default 0")
+    lookup.add_argument("--no-dist", action="store_true", help="inclusion/buffer methods instead of distance method ('000' if no country)")
+    lookup.add_argument("--get-dist", action="store_true", help="add 'dist' column: distance btw station & country (shapefile unit)")
+
+    perf = parser.add_argument_group("performance")
+    perf.add_argument("--batch-size", type=int, default=10000, help="stations per batch (bounded memory). Default 10000")
+    perf.add_argument("--n-jobs", type=int, default=1, help="worker processes, started once for all batches (-1: all cores). Default 1")
+    perf.add_argument("--cache-dir", default=None, help="persistent shapefile cache directory (see ShapefileCache)")
+    perf.add_argument("--grid-resolution", type=float, default=None, help="build a lookup grid with this resolution (see GeographicShp.build_grid)")
+    perf.add_argument("--grid-path", default=None, help="lookup grid file (.npz), loaded if up to date")
+    perf.add_argument("--store", default=None, help="persisted results (SQLite file): only new, moved or near-boundary stations recomputed (see GeographicShp.get_attr_incremental)")
+    perf.add_argument("--name-col", default="name", help="station name column, key of the --store results. Default 'name'")
+    perf.add_argument("--metrics", action="store_true", help="write timings & counters (JSON) to stderr at the end (see GeographicShp.enable_metrics)")
+
+    log = parser.add_argument_group("logging (stderr)")
+    log.add_argument("-q", "--quiet", action="store_true", help="no warnings (stations out of bbox, without country...)")
+    log.add_argument("-v", "--verbose", action="store_true", help="info messages (cache, grid...)")
+    return parser
+
+
+def annotate(geo, batch, args):
+    """
+    Adds lookup columns to a batch of station records
+
+    Parameters
+    ----------
+    geo : GeographicShp obj
+    batch : pandas.dataframe
+        station records
+    args : argparse.Namespace
+        command line arguments
+
+    Returns
+    -------
+    pandas.dataframe: station records with 'attr' (+ 'dist') columns
+    """
+    names = batch[args.name_col].astype(str).to_numpy() if args.store else None
+    if args.xyz:
+        x, y, z = (coordinates(batch, col) for col in args.xyz_cols)
+        stas = StationArray(x=x, y=y, z=z, name=names)
+    else:
+        stas = StationArray(lon=coordinates(batch, args.lon_col), lat=coordinates(batch, args.lat_col), name=names)
+
+    #batch shared btw worker processes (pool kept for the whole run, see main)
+    n_workers = n_jobs(args)
+    chunk_size = max(1, -(-len(batch) // n_workers))
+
+    if args.store: #incremental run: stored results reused
+        df_attr = geo.get_attr_incremental(args.store, sta=stas, attr=args.attr, buffer=args.buffer, dist=not args.no_dist,
+                                           get_dist=args.get_dist, n_jobs=n_workers, chunk_size=chunk_size)
+    else:
+        df_attr = geo.get_attr_many(sta=stas, attr=args.attr, buffer=args.buffer, dist=not args.no_dist, get_dist=args.get_dist,
+                                    n_jobs=n_workers, chunk_size=chunk_size)
+    if "ISO_A3_EH" in df_attr.columns:
+        df_attr["ISO_A3_EH"] = df_attr["ISO_A3_EH"].fillna("000") #no country found
+
+    df_attr.index = batch.index
+    return pd.concat([batch, df_attr], axis=1)
+
+
+def n_jobs(args):
+    """ Number of worker processes (--n-jobs, -1: all cores) """
+    return os.cpu_count() if args.n_jobs == -1 else max(1, args.n_jobs)
+
+
+def coordinates(batch, col):
+    """ Coordinate column of a batch (text) as floats, NaN if empty """
+    return pd.to_numeric(batch[col].str.strip()).to_numpy(dtype=float)
+
+
+def read_batches(stream, sep, batch_size):
+    """
+    Reads station records by batches of 'batch_size' lines (header repeated for each batch).
+    Each batch is parsed as soon as its lines are available: no need to read the whole input.
+    Records read as text (no type inference): written back unchanged (leading zeros, decimals, 'NA'...), see coordinates().
+
+    Parameters
+    ----------
+    stream : file obj (text)
+        CSV/TSV input with a header line
+    sep : str
+        column separator
+    batch_size : int
+        records per batch
+
+    Yields
+    ------
+    pandas.dataframe of station records
+    """
+    header = stream.readline()
+    while header:
+        lines = list(islice(stream, batch_size))
+        if not lines:
+            break
+        yield pd.read_csv(io.StringIO(header + "".join(lines)), sep=sep, dtype=str, keep_default_na=False)
+
+
+def main(argv=None):
+    """ 'gnss2iso' console entry point """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(format="gnss2iso: %(levelname)s: %(message)s",
+                        level=logging.ERROR if args.quiet else (logging.INFO if args.verbose else logging.WARNING))
+
+    sep = args.sep.encode().decode("unicode_escape") if args.sep else ("\t" if args.input.endswith(".tsv") else ",") #'\t' from shell
+    out_sep = args.out_sep.encode().decode("unicode_escape") if args.out_sep else sep
+    columns = args.xyz_cols if args.xyz else [args.lon_col, args.lat_col]
+    if args.store:
+        columns = [*columns, args.name_col]
+
+    geo = GeographicShp(args.shapefile, cache_dir=args.cache_dir)
+    if args.metrics:
+        geo.enable_metrics()
+    if args.grid_resolution:
+        geo.build_grid(args.grid_resolution, path=args.grid_path)
+
+    stream = sys.stdin if args.input == "-" else open(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w", newline="")
+    try:
+        #one process pool for the whole run, not one per batch
+        with geo.worker_pool(n_jobs(args)) if n_jobs(args) > 1 else contextlib.nullcontext():
+            for num, batch in enumerate(read_batches(stream, sep, args.batch_size)):
+                missing = [col for col in columns if col not in batch.columns]
+                if missing:
+                    parser.error(f"missing column(s) {missing} in input (columns: {list(batch.columns)})")
+
+                annotate(geo, batch, args).to_csv(output, sep=out_sep, index=False, header=(num == 0))
+                output.flush() #records available downstream batch by batch
+    except BrokenPipeError: #downstream command closed the pipe (head...): no more output
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if output is not sys.stdout:
+            output.close()
+    if geo.metrics is not None:
+        geo.metrics.dump(sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ellipsoidal (GRS80) distances between stations & polygons [m]
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import numpy as np
+import shapely
+from pyproj import Geod
+
+#internal import (earth parameters)
+from gnss2iso.Global import ae, fe, ee
+
+# GRS80 ellipsoid
+geod = Geod(a=ae, f=fe)
+
+# min length of 1 degree [m]: meridian at equator & parallel (x cos(lat))
+DEG_MERIDIAN = np.pi/180 * ae * (1 - (2*fe - fe**2))
+DEG_PARALLEL = np.pi/180 * ae
+
+# largest radius of curvature of the ellipsoid (poles) [m]
+R_MAX = ae / np.sqrt(1 - ee**2)
+
+# geodesic refinement (see _refine): shorter & shorter segments [degree], golden-section search (0.618**36 x 11 km < 0.5 mm)
+SEGMENTS = (1, 0.1)
+GOLDEN = (np.sqrt(5) - 1) / 2
+GOLDEN_ITERATIONS = 36
+
+
+def degree_box(lon, lat, dist):
+    """
+    lon/lat box [degree] containing all points within ellipsoidal distance 'dist' [m] of (lon, lat)
+    Full longitude range if the box reaches a pole or reaches the antimeridian.
+
+    Parameters
+    ----------
+    lon, lat, dist : array_like of floats
+
+    Returns
+    -------
+    lon_min, lat_min, lon_max, lat_max: numpy.ndarray of floats
+    """
+    lon, lat, dist = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in (lon, lat, dist)])
+    dlat = dist / DEG_MERIDIAN
+    lat_min, lat_max = np.maximum(lat - dlat, -90), np.minimum(lat + dlat, 90)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cos_lat = np.cos(np.radians(np.maximum(np.abs(lat_min), np.abs(lat_max))))
+        dlon = dist / (DEG_PARALLEL * cos_lat)
+    lon_min, lon_max = lon - dlon, lon + dlon
+
+    full = ~(dlon < 180) | (lat_min <= -90) | (lat_max >= 90) | (lon_min <= -180) | (lon_max >= 180) #touching the antimeridian: both sides
+    lon_min, lon_max = np.where(full, -180., lon_min), np.where(full, 180., lon_max)
+    return lon_min, lat_min, lon_max, lat_max
+
+
+def ellipsoidal_distance(geoms, lon, lat, max_dist=None):
+    """
+    Ellipsoidal distance [m] between polygons & stations (pairs geoms[i], (lon[i], lat[i])), 0 if station inside
+
+    First guess of the nearest polygon point in a local frame centered on the station (longitude scaled by cos(lat)):
+    its geodesic distance (GRS80) bounds the distance. Then geodesic refinement (see _refine): boundary segments
+    within this bound, nearest point of each segment by golden-section search on geodesic distances (pyproj Geod.inv).
+    Polygon edges: straight lines in lon/lat (as in the shapefile). Accurate at any distance & latitude (poles included).
+
+    Parameters
+    ----------
+    geoms : numpy.ndarray of shapely geometries (lon/lat coordinates [degree])
+    lon, lat : numpy.ndarray of floats
+        station coordinates [degree]
+    max_dist : numpy.ndarray of floats, optional
+        distance of interest [m] of each pair: polygons farther than 'max_dist' are not distance-computed (inf).
+        Default None (i.e. all distances computed).
+
+    Returns
+    -------
+    numpy.ndarray of floats
+    """
+    dists = np.zeros(len(geoms))
+    points = shapely.points(lon, lat)
+    outside = np.flatnonzero(~shapely.intersects(geoms, points))
+    boundaries = shapely.boundary(geoms[outside]) #before clipping (box edges are not polygon edges)
+    if max_dist is not None: #only polygon parts within 'max_dist' (if box not degenerated)
+        boxes = degree_box(lon[outside], lat[outside], max_dist[outside])
+        clipped = _clip(geoms[outside], boxes)
+        far = shapely.is_empty(clipped) & (boxes[0] < boxes[2]) & (boxes[1] < boxes[3])
+        dists[outside[far]] = np.inf
+        geoms = geoms.copy()
+        geoms[outside] = clipped
+        outside, boundaries = outside[~far], boundaries[~far]
+    if not outside.size:
+        return dists
+    geoms, lon, lat, points = geoms[outside], lon[outside], lat[outside], points[outside]
+
+    #upper bound: distance to nearest point in lon/lat degrees
+    nearest = shapely.get_coordinates(shapely.shortest_line(geoms, points))[::2]
+    _, _, upper = geod.inv(lon, lat, nearest[:, 0], nearest[:, 1])
+    center = lon.copy()
+
+    #polygons possibly across the antimeridian: station shifted by +/-360 degrees
+    wide = np.flatnonzero(degree_box(lon, lat, upper)[0] == -180)
+    for shift in (-360, 360):
+        nearest = shapely.get_coordinates(shapely.shortest_line(geoms[wide], shapely.points(lon[wide] + shift, lat[wide])))[::2]
+        _, _, dist = geod.inv(lon[wide], lat[wide], nearest[:, 0], nearest[:, 1])
+        better = dist < upper[wide]
+        upper[wide[better]] = dist[better]
+        center[wide[better]] = lon[wide[better]] + shift
+
+    #only polygon parts within the upper bound
+    clipped = _clip(geoms, degree_box(center, lat, upper))
+    geoms = np.where(shapely.is_empty(clipped), geoms, clipped) #rounding at box edges (tiny distances): whole polygon
+
+    #local frame centered on stations
+    cos_lat = np.maximum(np.cos(np.radians(lat)), 1e-9)
+    coords, idx = shapely.get_coordinates(geoms, return_index=True)
+    local = np.stack([(coords[:, 0] - center[idx]) * cos_lat[idx], coords[:, 1] - lat[idx]], axis=1)
+    geoms_local = shapely.set_coordinates(geoms.copy(), local)
+
+    nearest_local = shapely.get_coordinates(shapely.shortest_line(geoms_local, shapely.points(np.zeros((len(geoms), 2)))))[::2]
+    _, _, local_dist = geod.inv(lon, lat, center + nearest_local[:, 0] / cos_lat, lat + nearest_local[:, 1])
+
+    upper = np.fmin(upper, local_dist)
+    radius = upper if max_dist is None else np.fmin(upper, max_dist[outside]) #nearer points only, if of interest
+    dists[outside] = _refine(boundaries, lon, lat, upper, radius)
+    return dists
+
+
+def _refine(boundaries, lon, lat, upper, radius):
+    """
+    Geodesic distance [m] between polygon boundaries & stations (pairs): 'upper' (upper bound of each distance)
+    improved with the boundary points within 'radius' [m] of the station (lon/lat box, see degree_box).
+
+    A boundary segment AB (length <= L, see _max_length) may hold a point nearer than 'best' only if (d(A) + d(B) - L)/2 < best:
+    other segments dropped, then remaining segments split into shorter segments (SEGMENTS degrees), dropped again
+    & nearest point of short segments found by golden-section search (distance unimodal along short segments).
+    """
+    best = upper.copy()
+    lon_min, lat_min, lon_max, lat_max = degree_box(lon, lat, radius)
+    boxes = (lon_min - 1e-9, lat_min - 1e-9, lon_max + 1e-9, lat_max + 1e-9) #lines along box edges (ex: antimeridian) kept by clipping
+    parts, idx_pair = shapely.get_parts(_clip(boundaries, boxes), return_index=True)
+    coords, idx_part = shapely.get_coordinates(parts, return_index=True)
+
+    #boundary segments (consecutive vertices of a line) which may hold a nearer point
+    pair = idx_pair[idx_part]
+    dists = _vertex_distances(coords, lon[pair], lat[pair], best, pair)
+    start = np.flatnonzero(idx_part[:-1] == idx_part[1:])
+    start = start[(dists[start] + dists[start+1] - _max_length(coords[start], coords[start+1])) / 2 < best[pair[start]]]
+
+    #split into shorter & shorter segments (n+1 vertices), which may hold a nearer point
+    for length in SEGMENTS:
+        a, b, pair = coords[start], coords[start+1], pair[start]
+        n = np.maximum(np.ceil(np.hypot(*(b - a).T) / length), 1).astype(int)
+        seg = np.repeat(np.arange(len(n)), n + 1)
+        rank = np.arange(len(seg)) - np.repeat(np.cumsum(n + 1) - (n + 1), n + 1)
+        coords, pair = a[seg] + (rank / n[seg])[:, np.newaxis] * (b - a)[seg], pair[seg]
+        dists = _vertex_distances(coords, lon[pair], lat[pair], best, pair)
+        start = np.flatnonzero(rank < n[seg])
+        start = start[(dists[start] + dists[start+1] - _max_length(coords[start], coords[start+1])) / 2 < best[pair[start]]]
+    a, b, pair, dist_a, dist_b = coords[start], coords[start+1], pair[start], dists[start], dists[start+1]
+
+    x, y = lon[pair], lat[pair]
+    def dist(t):
+        return geod.inv(x, y, *(a + t[:, np.newaxis] * (b - a)).T)[2]
+
+    #nearest point inside the segment only if distance decreasing from both vertices
+    inside = (dist(np.full(len(pair), 1e-6)) < dist_a) & (dist(np.full(len(pair), 1 - 1e-6)) < dist_b)
+    a, b, pair, x, y = a[inside], b[inside], pair[inside], x[inside], y[inside]
+
+    #golden-section search of each segment nearest point: one new distance per iteration
+    low, high = np.zeros(len(pair)), np.ones(len(pair))
+    t1, t2 = high - GOLDEN, low + GOLDEN
+    d1, d2 = dist(t1), dist(t2)
+    for _ in range(GOLDEN_ITERATIONS):
+        nearer = d1 < d2 #minimum in (low, t2): t1 becomes the upper inner point, else in (t1, high)
+        low, high = np.where(nearer, low, t1), np.where(nearer, t2, high)
+        t = np.where(nearer, high - GOLDEN * (high - low), low + GOLDEN * (high - low))
+        d = dist(t)
+        t1, d1, t2, d2 = np.where(nearer, t, t2), np.where(nearer, d, d2), np.where(nearer, t1, t), np.where(nearer, d1, d)
+    np.minimum.at(best, pair, np.fmin(d1, d2))
+    return best
+
+
+def _vertex_distances(coords, lon, lat, best, pair):
+    """ Geodesic distances [m] btw stations (lon, lat) & vertices 'coords', 'best' distance of each pair updated """
+    _, _, dists = geod.inv(lon, lat, coords[:, 0], coords[:, 1])
+    np.minimum.at(best, pair, dists)
+    return dists
+
+
+def _max_length(a, b):
+    """
+    Upper bound of the length [m] of lon/lat segments a-b (straight lines in lon/lat):
+    largest radius of curvature x lon/lat length, longitudes scaled by cos of the smallest |latitude| of the segment
+    """
+    dlon, dlat = np.radians(np.abs(b[:, 0] - a[:, 0])), np.radians(np.abs(b[:, 1] - a[:, 1]))
+    lat_min = np.where(a[:, 1] * b[:, 1] <= 0, 0, np.minimum(np.abs(a[:, 1]), np.abs(b[:, 1])))
+    return R_MAX * np.hypot(dlat, dlon * np.cos(np.radians(lat_min)))
+
+
+def _clip(geoms, boxes):
+    """ geoms[i] clipped by boxes (lon_min, lat_min, lon_max, lat_max)[i], not clipped if degenerated box """
+    return np.array([shapely.clip_by_rect(geom, *box) if (box[0] < box[2]) and (box[1] < box[3]) else geom
+                     for geom, box in zip(geoms, zip(*boxes))], dtype=object)
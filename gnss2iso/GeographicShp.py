@@ -6,14 +6,119 @@
 import os
 import sys
 sys.path.append('..')
+import math
+import numpy as np
+import pandas as pd
 import geopandas as gpd
+import shapely
 import shapely.geometry as shpg
+import time
+import json
+import hashlib
+import functools
+import contextlib
+import importlib.util
 import logging
-logging.getLogger().setLevel(logging.INFO)
-import tqdm
+import multiprocessing as mp
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 
 #internal import
 from gnss2iso.Station import Station
+from gnss2iso.StationArray import StationArray
+from gnss2iso.ShapefileCache import ShapefileCache
+from gnss2iso.LookupGrid import LookupGrid
+from gnss2iso.LookupCache import LookupCache
+from gnss2iso.GeometryLOD import GeometryLOD
+from gnss2iso.Geodesic import degree_box, ellipsoidal_distance
+from gnss2iso.Metrics import Metrics
+from gnss2iso.AttributeTable import AttributeTable
+from gnss2iso.LookupResult import LookupResult
+from gnss2iso.ResultStore import ResultStore
+from gnss2iso.GeometryStore import GeometryStore
+
+logger = logging.getLogger(__name__)
+
+# attribute columns always loaded (see GeographicShp 'columns' parameter): get_iso & ISO distances
+LOOKUP_COLUMNS = ["ISO_A3_EH", "SOV_A3"]
+
+# fast Arrow-based shapefile reader available ?
+ARROW_READER = all(importlib.util.find_spec(module) is not None for module in ("pyogrio", "pyarrow"))
+
+def _overlaps(geoms1, geoms2):
+    """
+    Overlap of polygon pairs (geoms1[i], geoms2[i]): interiors intersection (not only a common border)
+    Module-level function: usable by a process pool (see GeographicShp.check_geometries_validity)
+    
+    Returns
+    -------
+    types: numpy.ndarray of str
+        geometry type of the overlap, None if no overlap
+    areas: numpy.ndarray of float
+        overlap area, 0 if no overlap
+    """
+    types = np.full(len(geoms1), None, dtype=object)
+    areas = np.zeros(len(geoms1))
+    try:
+        overlap = np.flatnonzero(shapely.relate_pattern(geoms1, geoms2, 'T********'))
+        intersection = shapely.intersection(geoms1[overlap], geoms2[overlap])
+    except Exception: #geometry exception: pair by pair
+        overlap, intersection = [], []
+        for num, (geom1, geom2) in enumerate(zip(geoms1, geoms2)):
+            try:
+                if geom1.relate_pattern(geom2, 'T********'):
+                    intersection.append(geom1.intersection(geom2))
+                    overlap.append(num)
+            except Exception as e:
+                logger.warning(f"{geom1.geom_type} & {geom2.geom_type} exception: {e}")
+        overlap, intersection = np.array(overlap, dtype=np.intp), np.array(intersection, dtype=object)
+        
+    types[overlap] = [geom.geom_type for geom in intersection]
+    areas[overlap] = shapely.area(intersection)
+    return types, areas
+
+
+def _first_k(groups, n_groups, k):
+    """
+    Positions of the first k items of each group in 'groups' (sorted group numbers), -1 if the group has less than k items
+    
+    Returns
+    -------
+    numpy.ndarray (n_groups, k) of int
+    """
+    first = np.searchsorted(groups, np.arange(n_groups))
+    n_items = np.bincount(groups, minlength=n_groups)
+    ranks = np.arange(k)
+    return np.where(ranks < n_items[:, np.newaxis], first[:, np.newaxis] + ranks, -1)
+
+
+# GeographicShp obj of a worker process (see GeographicShp._parallel)
+_worker_geo = None
+
+def _init_worker(geo):
+    """ Process pool initializer: GeographicShp obj of the worker (inherited from parent with fork) """
+    global _worker_geo
+    _worker_geo = geo
+
+
+def _run_worker(method, key, values, kwargs):
+    """ Runs a GeographicShp method on a chunk of stations in a worker process """
+    return getattr(_worker_geo, method)(**{key: values}, **kwargs)
+
+
+def _timed(method):
+    """ Records calls & durations of a GeographicShp method, only if metrics are enabled (see GeographicShp.enable_metrics) """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.metrics is None:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.metrics.record(method.__name__, time.perf_counter() - start)
+    return wrapper
+
 
 class GeographicShp:
     """
@@ -28,75 +133,237 @@ class GeographicShp:
         * else: basic station.point included on polygon --> countries not found '000' (most accurate according to shapefile data)
         
     """    
-    def __init__(self, shapefile):
+    def __init__(self, shapefile, cache_dir=None, columns=None, bbox=None, mask=None):
         """
         Parameters
         ----------
         shapefile : str
            shapefile path
+        cache_dir : str, optional
+           directory of the persistent shapefile cache (see ShapefileCache). Default None (i.e. no cache, shapefile always read).
+           Cache automatically invalidated if the shapefile is modified.
+        columns : list of str, optional
+           attribute columns to load (ex: 'attr' of get_attr), plus LOOKUP_COLUMNS ('ISO_A3_EH', 'SOV_A3').
+           Default None (i.e. all columns). Lower memory & load time with large attribute tables.
+        bbox : tuple of floats, optional
+           (lon_min, lat_min, lon_max, lat_max): only polygons intersecting this region are loaded (regional deployments).
+           Default None (i.e. whole shapefile). Lookups only valid for stations inside the region
+           (outside: nearest loaded polygon with dist method).
+        mask : shapely geometry, optional
+           same as 'bbox' with any region (polygon), not with 'bbox'. Default None.
+        
+        Fast Arrow-based reader used if available (pyogrio & pyarrow packages).
         """
+        if (bbox is not None) and (mask is not None):
+            raise ValueError("Incorrect loading region: 'bbox' and 'mask' cannot be combined, specify only one of them.")
+        
         self.shapefile = shapefile
-        #build geopandas dataframe
-        self.gdf = gpd.read_file(self.shapefile)
+        self.cache = ShapefileCache(cache_dir) if cache_dir else None
+        
+        # loading options: attribute columns & region
+        self.columns = None if columns is None else list(dict.fromkeys([*columns, *LOOKUP_COLUMNS]))
+        self.bbox = None if bbox is None else tuple(float(value) for value in bbox)
+        self.mask = mask
+        
+        # optional memory-mapped geometry store, see GeographicShp.from_geometry_store()
+        self.geometry_store = None
+        
+        #build geopandas dataframe (from cache if available)
+        cached = self.cache.load(self.shapefile, self._load_options()) if self.cache else None
+        if cached is None:
+            self.gdf = self._read_file()
+            bounds = self.gdf.geometry.bounds.to_numpy()
+            if self.cache:
+                self.cache.save(self.shapefile, self.gdf, self._load_options())
+        else:
+            self.gdf, bounds = cached
+        self._init_loaded(bounds)
+    
+    
+    @classmethod
+    def from_geometry_store(cls, path, shapefile=None, **kwargs):
+        """
+        GeographicShp obj served from a memory-mapped geometry store (see GeometryStore & self.export_geometry_store):
+        no shapefile parsing, polygons rebuilt from the mapped flat coordinate/offset arrays in one vectorized call.
+        Processes opening the same store read it through the OS page cache, but each process still builds its own
+        shapely geometries (& spatial index): faster startup than reading the shapefile, not a shared geometry memory.
+        
+        Parameters
+        ----------
+        path : str
+           geometry store directory
+        shapefile : str, optional
+           source shapefile: store (re)written from it if missing or out of date (see GeometryStore.up_to_date).
+           Default None (i.e. store used as it is).
+        **kwargs :
+           GeographicShp parameters (cache_dir...) to read 'shapefile' if the store is (re)written
+
+        Returns
+        -------
+        GeographicShp obj (shapefile: source shapefile of the store)
+        """
+        if shapefile is not None:
+            with GeometryStore.lock(path):
+                # checked once the lock is held: store written once if several processes start together
+                if not (os.path.isdir(path) and GeometryStore(path).up_to_date(shapefile)):
+                    logger.info(f"Geometry store '{path}' missing or out of date: written from '{shapefile}'")
+                    GeometryStore.write(path, cls(shapefile, **kwargs).gdf, source=shapefile, lock=False)
+        
+        with GeometryStore.lock(path, shared=True): #store not swapped while read
+            store = GeometryStore(path)
+            gdf, bounds = store.to_geodataframe()
+        
+        geo = cls.__new__(cls)
+        geo.shapefile = store.meta["source"] or path
+        geo.cache = None
+        geo.columns, geo.bbox, geo.mask = None, None, None
+        geo.geometry_store = path
+        
+        geo.gdf = gdf
+        geo._init_loaded(bounds)
+        return geo
+    
+    
+    def export_geometry_store(self, path):
+        """
+        Exports self.gdf polygons & attributes (possibly repaired, see self.check_geometries_validity) in a memory-mapped
+        geometry store: flat coordinate/offset arrays (GeoArrow-style), see GeometryStore & GeographicShp.from_geometry_store()
+        
+        Parameters
+        ----------
+        path : str
+           geometry store directory (replaced if it exists)
+
+        Returns
+        -------
+        GeometryStore obj
+        """
+        return GeometryStore.write(path, self.gdf, source=self.shapefile)
+    
+    
+    def _init_loaded(self, bounds):
+        """ Initializes shapefile bbox & optional accelerations once self.gdf & its geometry bounds are loaded """
         self.shapefile_attr = list(self.gdf.columns)
         
+        if not np.isfinite(bounds).any():
+            raise ValueError(f"No polygon loaded from shapefile '{self.shapefile}' (bbox={self.bbox}, mask={self.mask})")
+        
         # Get minimum and maximum coordinates in shapefile
         # usefull to know lon & lat format (degree vs rad, (0,360) vs (-180,180)...)
-        bounds = self.gdf.bounds
-        lon_min = bounds['minx'].min()
-        lat_min = bounds['miny'].min()
-        lon_max = bounds['maxx'].max()
-        lat_max = bounds['maxy'].max()
+        lon_min, lat_min = np.nanmin(bounds[:, :2], axis=0)
+        lon_max, lat_max = np.nanmax(bounds[:, 2:], axis=0)
         
         self.sta_min = Station(lon=lon_min, lat=lat_min, name="sta_min")
         self.sta_max = Station(lon=lon_max, lat=lat_max, name="sta_max")
         self.shapefile_bbox = shpg.box(lon_min, lat_min, lon_max, lat_max)
         self.verbose_bbox = f"bbox: lon({self.sta_min.point.x},{self.sta_max.point.x}), lat:({self.sta_min.point.y},{self.sta_max.point.y})"
+        
+        # data derived from self.gdf geometries (prepared geometries...), see self._cached()
+        self._cache = {}
+        self._cache_token = None
+        
+        # optional lookup grid, see self.build_grid()
+        self.grid_resolution = None
+        self.grid_path = None
+        
+        # optional multi-resolution geometries, see self.build_lod()
+        self.lod_tolerance = None
+        self.lod_split_parts = False
+        
+        # optional memoization of get_attr/get_iso lookups, see self.enable_lookup_cache()
+        self.lookup_cache = None
+        
+        # optional instrumentation, see self.enable_metrics()
+        self.metrics = None
+        
+        # optional process pool kept for all parallel batch calls, see self.worker_pool()
+        self._pool = None
                 
     
     ##############################################################################################################################
     ####    Check methods
     ##############################################################################################################################
     
-    def check_geometries_validity(self):
+    @_timed
+    def check_geometries_validity(self, n_jobs=1, chunk_size=10000, report=False, progress=False):
         """
         Checks geometries in the shapefile: no intersection possible btw polygons
+        Invalid geometries are fixed (buffer 0 method).
+        
+        Only candidate pairs from the spatial index (intersecting polygons) are checked:
+        polygons only touching (common border: line or point) are valid, overlap area computed for other pairs.
+
+        Parameters
+        ----------
+        n_jobs : int
+            number of worker processes to check candidate pairs. Default 1 (i.e. no process pool).
+        chunk_size : int
+            number of candidate pairs per task. Default 10000.
+        report : bool
+            Return the report of overlapping polygons instead of a bool. Default False.
+        progress : bool
+            Show a progress bar (tqdm) over the chunks of candidate pairs. Default False (i.e. progress in the package logger, debug level).
 
+        Returns
+        -------
+        valid: bool
+            if report=True: pandas.dataframe of overlapping polygon pairs with columns
+            ['idx1', 'idx2', 'name1', 'name2', 'type', 'area'] (idx: self.gdf index, type & area of the overlap [shapefile unit])
         """
-        logging.info("Checking the validity of geometries in the shapefile ... ")
-        valid = True
+        logger.info("Checking the validity of geometries in the shapefile ... ")
         
         # Fix invalid geometries
-        self.gdf['geometry'] = self.gdf['geometry'].apply(lambda geom: geom.buffer(0) if not geom.is_valid else geom) #buffer 0 method
-
-        for num, geom in enumerate(tqdm.tqdm(self.gdf.geometry)):
+        geoms = np.asarray(self.gdf.geometry.values)
+        invalid = ~shapely.is_valid(geoms) & ~shapely.is_missing(geoms)
+        if invalid.any():
+            logger.info(f"{np.count_nonzero(invalid)} invalid geometries fixed (buffer 0 method)")
+            geoms = geoms.copy()
+            geoms[invalid] = shapely.buffer(geoms[invalid], 0) #buffer 0 method
+            self.gdf['geometry'] = gpd.GeoSeries(geoms, index=self.gdf.index, crs=self.gdf.crs)
             
-            try :
-                if (geom.geom_type == 'Point') or (geom.is_empty) or not geom.is_valid:
-                    logging.warning(f"'{(num, self.gdf.loc[num, 'NAME_LONG'])}' geometry: {geom.geom_type}")
-                    pass
-                else: #check intersection only if current geometry is a polygon
-                    it = geom.intersection(self.gdf.geometry[num+1:])
-                    
-                    #get no empty
-                    not_empty = it[~it.is_empty]
-                    
-                    #get no multilinestring
-                    final_intersect = not_empty[not_empty.geom_type != 'MultiLineString']
-                    final_intersect = final_intersect[final_intersect.geom_type != 'LineString']
-                    final_intersect = final_intersect[final_intersect.geom_type != 'Point']
-                    
-                    
-                    if final_intersect.shape[0] != 0:
-                        logging.warning(f"Intersection btw '{(num, self.gdf.loc[num, 'NAME_LONG'])}' & {final_intersect}")
-                        valid = False
-            except Exception as e:
-                logging.warning(f"{num} (type: {geom.geom_type}) exception: {e}")
-                
+        names = self.gdf['NAME_LONG'].values if 'NAME_LONG' in self.gdf.columns else self.gdf.index.values
+        
+        #check intersection only if current geometry is a polygon
+        skipped = (shapely.get_type_id(geoms) == 0) | shapely.is_empty(geoms) | ~shapely.is_valid(geoms)
+        for num in np.flatnonzero(skipped):
+            logger.warning(f"'{(self.gdf.index[num], names[num])}' geometry: {getattr(geoms[num], 'geom_type', None)}")
+        
+        #candidate pairs: intersecting geometries (spatial index)
+        checked = np.flatnonzero(~skipped)
+        idx1, idx2 = self.gdf.sindex.query(geoms[checked], predicate='intersects')
+        idx1 = checked[idx1]
+        keep = (idx1 < idx2) & ~skipped[idx2]
+        idx1, idx2 = idx1[keep], idx2[keep]
+        
+        #overlap type & area of candidate pairs, by chunks
+        chunks = [(geoms[idx1[start:start+chunk_size]], geoms[idx2[start:start+chunk_size]]) for start in range(0, len(idx1), chunk_size)]
+        logger.debug(f"{len(idx1)} candidate pairs of polygons in {len(chunks)} chunks")
+        if n_jobs > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                results = self._progress(pool.map(_overlaps, *zip(*chunks)), len(chunks), progress)
+        else:
+            results = self._progress((_overlaps(*chunk) for chunk in chunks), len(chunks), progress)
+            
+        types = np.concatenate([r[0] for r in results]) if results else np.array([], dtype=object)
+        areas = np.concatenate([r[1] for r in results]) if results else np.array([])
+        overlap = types != None
+        
+        df_report = pd.DataFrame({"idx1": self.gdf.index[idx1[overlap]], "idx2": self.gdf.index[idx2[overlap]],
+                                  "name1": names[idx1[overlap]], "name2": names[idx2[overlap]],
+                                  "type": types[overlap], "area": areas[overlap]})
+        
+        valid = df_report.empty
         if valid:
-            logging.info(" --> valid shapefile: no polygon intersection.\n")
+            logger.info(" --> valid shapefile: no polygon intersection.\n")
+        else:
+            logger.warning(f"Intersection btw {len(df_report)} pairs of polygons:\n{df_report}")
             
+        # persist repaired geometries
+        if self.cache:
+            self.cache.save(self.shapefile, self.gdf, self._load_options())
                 
+        if report:
+            return df_report
         return valid
     
     
@@ -117,7 +384,7 @@ class GeographicShp:
         valid = self.shapefile_bbox.contains(point)
         
         if not valid:
-            logging.warning(f"Station {point} not in shapefile {self.verbose_bbox}")
+            self._warn("not_in_bbox", "Station %s not in shapefile %s", point, self.verbose_bbox)
         return valid
     
     
@@ -125,6 +392,7 @@ class GeographicShp:
     ####    get data from shapefile
     ##############################################################################################################################
           
+    @_timed
     def get_attr(self, sta=None, lon=None, lat=None, point=None, attr=['ISO_A3_EH'], buffer=0, dist=True, get_dist=False):
         """
         Provides country attributes 'attr' for a station, from shapefile table.
@@ -178,7 +446,36 @@ class GeographicShp:
         if bool(sta):
             point = sta.point
             
-               
+        # memoized lookups (see self.enable_lookup_cache): polygons found, attributes read from self.gdf
+        lookup_cache = self._lookup_cache()
+        if (lookup_cache is not None) and (point.geom_type == 'Point'):
+            key = lookup_cache.key(point.x, point.y, buffer, dist)
+            found, polygons = lookup_cache.get(key)
+            self._count("lookup_cache.hits" if found else "lookup_cache.misses")
+            if not found:
+                polygons = self._find_polygons(point, buffer=buffer, dist=dist)
+                lookup_cache.put(key, polygons)
+        else:
+            polygons = self._find_polygons(point, buffer=buffer, dist=dist)
+        
+        if polygons is None: #no data found
+            return None
+        
+        positions, dist_value = polygons
+        df_selected = self.gdf.loc[self.gdf.index[positions], attr]
+        if dist and get_dist: #add dist column in df
+            df_selected["dist"] = dist_value
+        return df_selected
+    
+    
+    def _find_polygons(self, point, buffer=0, dist=True):
+        """
+        Polygons of self.get_attr() for a shapely point, without memoization
+        
+        Returns
+        -------
+        (positions in self.gdf: int with dist method, list of int otherwise, dist), None if no country found
+        """
         if not self.check_point(point) and not dist: #station not in shapefile bbox ? -> criteria not check if 'dist' method
             return None
         
@@ -190,37 +487,26 @@ class GeographicShp:
                 
         ## methods to find country
         
-        if dist: #based on min dist
-            dists = polygon.distance(self.gdf.geometry)
-            idx_country = dists.idxmin()
-            dist = dists[idx_country]
-            
-            #add dist column in df
-            df_selected = self.gdf.loc[idx_country, attr]
-            
-            if get_dist:
-                df_selected["dist"] = dist
-            return df_selected
-            
+        if dist: #based on min dist, with spatial index
+            idx_country, dists = self._nearest_many(np.array([polygon], dtype=object))
+            return int(idx_country[0]), dists[0]
             
         else: #based on point intersection or inclusion
-            idx_country = []
-            for index, row in self.gdf.iterrows():
-                if row['geometry'].intersects(polygon): #which country contains station, potentially with buffer
-                    idx_country.append(index)
+            #which country contains station, potentially with buffer
+            _, idx_tree = self._query_intersects(np.array([polygon], dtype=object))
+            idx_country = np.sort(idx_tree).tolist()
                 
         if len(idx_country) == 0:
-            logging.warning(f"No country found for sta '{point}'")
+            self._warn("no_country", "No country found for sta '%s'", point)
             return None #no data found
                 
-        else:
-            if len(idx_country) > 1:
-                logging.warning(f"Station {sta.point} in multiple countries/ polygons: '{idx_country}'.")
-                
-            return self.gdf.loc[idx_country, attr]
+        if len(idx_country) > 1:
+            self._warn("multiple_countries", "Station %s in multiple countries/ polygons: '%s'.", point, self.gdf.index[idx_country].tolist())
+        return idx_country, np.nan
         
         
         
+    @_timed
     def get_iso(self, sta=None, lon=None, lat=None, point=None, buffer=0, dist=True, get_dist=False):
         """
         Provides directly ISO 3 chr country code for station (lon, lat). This method apply: self.get_attr() with attr = [ISO_A3_EH]
@@ -268,37 +554,1068 @@ class GeographicShp:
         iso: str (3 chr)
             if get_dist = True & dist=True: return a list with [iso,dist_value]
         """        
+        if not get_dist: #only code ISO 3chr: fast lookup, no pandas object (see self.lookup)
+            return self.lookup_iso(lon=lon, lat=lat, sta=sta, point=point, buffer=buffer, dist=dist)[0]
+        
         iso = self.get_attr(lon=lon, lat=lat, sta=sta, point=point, attr=['ISO_A3_EH'], buffer=buffer, dist=dist, get_dist=get_dist)
         
         if type(iso) == type(None): #no country found
             iso = '000'
         else:
-            iso = iso.values.reshape(-1) # [ 'FRA', dist]
+            iso = iso.to_numpy().reshape(-1) # [ 'FRA', dist]
             if not get_dist:
                 iso = iso[0] #pnly code ISO 3chr
                         
         return iso
     
     
+    @_timed
     def get_country_ISOdist(self, iso, sta=None, lon=None, lat=None, epsg="4978"):
         """ 
         Provides distance [m] between 'iso' country & sta.
         * distance in which epsg ? Default 4978 : WGS 84 [unit: meter]
         * In case of several polygon with 'ISO' code, get minimal distance
         * Unknown ISO code: dist=-1
+        
+        Reprojected shapefile cached by epsg, geometries by ISO code rebuilt only if ISO codes edited (see self._iso_index)
         """
         #create sta object
         if not bool(sta): #sta & point object not provided by user, build it from 'lon' & 'lat' attribute
             sta = Station(lon=lon, lat=lat)
         
-        #convert current gdf to dist [m]
-        gdf_countries = self.gdf.to_crs(f'EPSG:{epsg}') # conversion latlon <> meter
         #ISO code possible in SOV or unit column
-        #print("ISO", iso, ((iso not in gdf_countries["ISO_A3_EH"].values) and (iso not in gdf_countries["SOV_A3"].values)) , iso=="ZZZ")
-        
-        if ((iso not in gdf_countries["ISO_A3_EH"].values) and (iso not in gdf_countries["SOV_A3"].values)) or iso=="ZZZ": #unknown ISO code:
+        if (iso not in self._iso_index()) or iso=="ZZZ": #unknown ISO code:
             dist = -1
         else:
-            dist = sta.point_xyz.distance(gdf_countries.loc[(gdf_countries["ISO_A3_EH"]==iso) | (gdf_countries["SOV_A3"]==iso),"geometry"]).min() 
+            dist = self._iso_distances(np.array([sta.point_xyz], dtype=object), [iso], epsg=epsg)[0, 0]
         return dist
-        
\ No newline at end of file
+    
+    
+    ##############################################################################################################################
+    ####    fast lookups: no pandas object
+    ##############################################################################################################################
+    
+    @_timed
+    def lookup(self, sta=None, lon=None, lat=None, point=None, attr=['ISO_A3_EH'], buffer=0, dist=True):
+        """
+        Fast version of self.get_attr() for high-rate loops: attribute values read from self.gdf by polygon position
+        (see AttributeTable), result as a lightweight LookupResult obj (no pandas object).
+        Same methods (dist / buffer / inclusion) & inputs as self.get_attr().
+        If a station is in several polygons (buffer or inclusion methods), the first polygon of the shapefile is kept.
+        
+        Parameters
+        ----------
+        See self.get_attr(). Distance always provided with dist method.
+
+        Returns
+        -------
+        LookupResult obj: result['ISO_A3_EH'], result.dist, result.found (False: no country found, None values)
+        Many results -> dataframe in one step: self.to_dataframe(results)
+        """
+        if point is None:
+            if sta is not None:
+                point = sta.point
+            elif (lon is not None) and (lat is not None):
+                point = shpg.Point(lon-360 if lon > 180 else lon, lat) #lon (-180, 180), as Station obj
+            else:
+                raise ValueError("Incorrect inputs: 'lon' & 'lat', 'sta' or 'point' must be specified.")
+        attr = tuple(attr)
+        
+        # memoized lookups (see self.enable_lookup_cache): polygon & distance, attributes read from self.gdf
+        lookup_cache = self._lookup_cache()
+        if (lookup_cache is not None) and (point.geom_type == 'Point'):
+            key = lookup_cache.key(point.x, point.y, "lookup", buffer, dist)
+            found, polygon = lookup_cache.get(key)
+            self._count("lookup_cache.hits" if found else "lookup_cache.misses")
+            if not found:
+                polygon = self._lookup(point, buffer=buffer, dist=dist)
+                lookup_cache.put(key, polygon)
+        else:
+            polygon = self._lookup(point, buffer=buffer, dist=dist)
+        
+        pos, dist = polygon
+        return LookupResult(attr, self._attribute_table().row(pos, attr), pos, dist)
+    
+    
+    def _lookup(self, point, buffer=0, dist=True):
+        """ Polygon position of self.lookup() for a shapely point (-1 if no country found) & distance, without memoization """
+        if not self.check_point(point) and not dist: #station not in shapefile bbox ? -> criteria not check if 'dist' method
+            return -1, math.nan
+        
+        # add a buffer
+        polygons = np.array([point.buffer(buffer) if bool(buffer) else point], dtype=object)
+        
+        if dist: #based on min dist, with spatial index
+            idx_country, dists = self._nearest_many(polygons)
+            pos, dist = int(idx_country[0]), float(dists[0])
+            
+        else: #based on point intersection or inclusion
+            idx_country, n_found = self._intersects_many(polygons)
+            pos, dist = int(idx_country[0]), math.nan
+            if pos < 0:
+                self._warn("no_country", "No country found for sta '%s'", point)
+            elif n_found[0] > 1:
+                self._warn("multiple_countries", "Station %s in multiple countries/ polygons: first polygon kept.", point)
+        return pos, dist
+    
+    
+    def lookup_iso(self, sta=None, lon=None, lat=None, point=None, buffer=0, dist=True):
+        """
+        Fast version of self.get_iso(): plain tuple (ISO 3 chr code, distance), see self.lookup()
+        
+        Returns
+        -------
+        (iso: str, '000' if no country found, dist: float [shapefile unit], NaN if not computed (buffer / inclusion methods))
+        """
+        result = self.lookup(sta=sta, lon=lon, lat=lat, point=point, attr=('ISO_A3_EH',), buffer=buffer, dist=dist)
+        return (result.values[0] if result.polygon >= 0 else '000', result.dist)
+    
+    
+    def to_dataframe(self, results, get_dist=False, index=None):
+        """
+        Converts many LookupResult obj (see self.lookup) to a dataframe in one step: attribute columns taken
+        at once from the polygon positions (see AttributeTable.take)
+        
+        Parameters
+        ----------
+        results : list of LookupResult obj
+            results of the same lookup (same 'attr')
+        get_dist : bool
+            add 'dist' column. Default False.
+        index : pandas.Index, optional
+            index of the output dataframe. Default None (i.e. RangeIndex)
+
+        Returns
+        -------
+        pandas.dataframe with columns 'attr' (+ 'dist'), one row per result. Text columns: categorical dtype, NaN if no country found
+        """
+        attr = list(results[0].attr) if len(results) else ['ISO_A3_EH']
+        polygons = np.fromiter((result.polygon for result in results), dtype=np.intp, count=len(results))
+        df_selected = self._attribute_table().take(polygons, attr, index=index)
+        
+        if get_dist:
+            df_selected["dist"] = np.fromiter((result.dist for result in results), dtype=float, count=len(results))
+        return df_selected
+    
+    
+    ##############################################################################################################################
+    ####    multi-resolution geometries
+    ##############################################################################################################################
+    
+    @_timed
+    def build_lod(self, tolerance=0.01, split_parts=False):
+        """
+        Builds multi-resolution geometries (level of detail) used by all get_* methods, see GeometryLOD:
+        lookups answered with simplified polygons (error bound: 'tolerance'), full resolution polygons
+        only for stations within 'tolerance' of a boundary. Same results as full resolution lookups.
+        
+        Parameters
+        ----------
+        tolerance : float
+            simplification tolerance, i.e. error bound of simplified polygons (same unit as in the shapefile, here degree). Default 0.01.
+        split_parts : bool
+            split huge multipolygons into indexed parts. Default False.
+
+        Returns
+        -------
+        GeometryLOD obj
+        """
+        self.lod_tolerance = float(tolerance)
+        self.lod_split_parts = split_parts
+        self._cache.pop("lod", None)
+        
+        lod = self._geometry_lod()
+        logger.info(f"Multi-resolution geometries: {lod.n_vertices[0]} coarse vs. {lod.n_vertices[1]} full resolution vertices")
+        return lod
+    
+    
+    ##############################################################################################################################
+    ####    lookup cache
+    ##############################################################################################################################
+    
+    def enable_lookup_cache(self, maxsize=10000, ttl=None, policy="lru", quantum=1e-9):
+        """
+        Memoizes get_attr(), get_iso() & lookup() lookups of the same stations (daily solutions, reprocessing...), see LookupCache.
+        Keys: quantized coordinates & lookup mode (buffer, dist). Only the polygons found (positions & distance) are memoized:
+        attribute values always read from self.gdf, attribute edits seen at once.
+        Cache cleared automatically when self.gdf or its geometries are modified (ex: geometries repaired by self.check_geometries_validity).
+        
+        Parameters
+        ----------
+        maxsize : int
+            max number of cached lookups. Default 10000. maxsize=0: cache disabled.
+        ttl : float, optional
+            lookups time-to-live [s]. Default None (i.e. no expiration).
+        policy : str
+            eviction policy: 'lru' (least recently used) [default] or 'fifo' (first inserted)
+        quantum : float
+            coordinates quantization step (same unit as in the shapefile). Default 1e-9 degree.
+
+        Returns
+        -------
+        LookupCache obj (None if disabled)
+        """
+        self.lookup_cache = LookupCache(maxsize=maxsize, ttl=ttl, policy=policy, quantum=quantum) if maxsize else None
+        return self.lookup_cache
+    
+    
+    def lookup_cache_info(self):
+        """ Lookup cache statistics: hits, misses, evictions, size... (see LookupCache.info). None if no cache """
+        return None if self.lookup_cache is None else self.lookup_cache.info()
+    
+    
+    ##############################################################################################################################
+    ####    metrics
+    ##############################################################################################################################
+    
+    def enable_metrics(self, n_timings=10000):
+        """
+        Instruments public methods (see Metrics): calls, cumulative & percentile durations by method,
+        counters of candidate polygons examined, lookup cache & grid hits, warnings by kind.
+        Disabled by default: no overhead (except one test by call).
+        
+        Parameters
+        ----------
+        n_timings : int
+            number of last durations kept by method for percentiles. Default 10000. n_timings=0: metrics disabled.
+
+        Returns
+        -------
+        Metrics obj (None if disabled), ex: geo.metrics.report(), geo.metrics.snapshot()
+        """
+        self.metrics = Metrics(n_timings=n_timings) if n_timings else None
+        return self.metrics
+    
+    
+    ##############################################################################################################################
+    ####    lookup grid
+    ##############################################################################################################################
+    
+    @_timed
+    def build_grid(self, resolution=0.1, path=None):
+        """
+        Builds (or loads) a lon/lat lookup grid used by all get_* methods to speed up lookups.
+        Cells entirely inside one polygon (or without any polygon) answer directly, in O(1),
+        cells touching a boundary or a coast are flagged: exact lookup only for stations in these cells.
+        Same results as without grid. Grid not used with 'buffer' option.
+        
+        Parameters
+        ----------
+        resolution : float
+            cell size (same unit as in the shapefile, here degree). Default 0.1.
+        path : str, optional
+            .npz file to save the grid & load it next time (rebuilt if shapefile geometries or resolution changed)
+
+        Returns
+        -------
+        LookupGrid obj
+        """
+        self.grid_resolution = float(resolution)
+        self.grid_path = path
+        self._cache.pop("grid", None)
+        return self._lookup_grid()
+    
+    
+    ##############################################################################################################################
+    ####    batch methods: many stations at once
+    ##############################################################################################################################
+    
+    @_timed
+    def get_attr_many(self, sta=None, lon=None, lat=None, points=None, attr=['ISO_A3_EH'], buffer=0, dist=True, get_dist=False, n_jobs=1, chunk_size=100000):
+        """
+        Batch version of self.get_attr(): provides country attributes 'attr' for many stations at once.
+        All geometry work is done in bulk with shapely 2 vectorized functions.
+        
+        Possible input(s):
+            -lon & lat (array_like of floats)
+            or
+            -sta (StationArray object or list of Station objects)
+            or
+            -points (geopandas.GeoSeries or array_like of shapely Point objects)
+            
+        Same methods as self.get_attr() to find ISO code (dist / buffer / inclusion).
+        One row per station: if a station is in several polygons (buffer or inclusion methods), the first polygon of the shapefile is kept.
+        Stations without country (buffer or inclusion methods) get NaN attributes.
+
+        Parameters
+        ----------
+        sta : StationArray obj or list of Station obj
+            station objects, with 'point' attribute.
+        lon : array_like of floats
+            longitudes (same unit as in the shapefile)
+        lat : array_like of floats
+            latitudes (same unit as in the shapefile)
+        points: geopandas.GeoSeries or array_like of shapely.geometry.Point obj
+            Point objects.
+        attr : list of str, optional
+            attribute(s) of interest in the shapefile (i.e. in self.gdf). The default is 'ISO_A3_EH'.
+        buffer: float
+            Add a distance buffer (degree unit) around stations (1 degree <> 100 km). Default 0 (i.e. no buffer).
+        dist: bool
+            Select country with distance method: get country with min distance btw (point & polygon). distance=0 if point include
+        get_dist: bool
+            Return dist value in dataframe [WARNING : unit of shapefile. Ex: epsg=4324 -> degree unit; epsg=4978 -> meter unit]
+        n_jobs: int
+            number of worker processes (-1: all cores). Default 1 (i.e. no process pool). See self._parallel()
+        chunk_size: int
+            number of stations per worker task. Default 100000.
+
+        Returns
+        -------
+        pandas.dataframe with columns 'attr' (+ 'dist'), one row per station (input order)
+        """
+        points, index = self._as_points(sta=sta, lon=lon, lat=lat, points=points)
+        
+        if n_jobs != 1 and len(points) > chunk_size: #parallel mode
+            df_selected = self._parallel("get_attr_many", "points", points, n_jobs=n_jobs, chunk_size=chunk_size,
+                                         attr=attr, buffer=buffer, dist=dist, get_dist=get_dist)
+            df_selected.index = index
+            return df_selected
+        
+        # stations in shapefile bbox ?
+        in_bbox = self.check_points(points)
+        
+        # add a buffer
+        if bool(buffer):
+            polygons = shapely.buffer(points, buffer, quad_segs=16) #as Point.buffer (self.get_attr)
+        else: #no buffer
+            polygons = points
+            
+        ## methods to find country
+        if dist: #based on min dist
+            idx_country, dists = self._nearest_many(polygons)
+        else: #based on point intersection or inclusion
+            idx_country, n_found = self._intersects_many(polygons)
+            idx_country[~in_bbox] = -1 #station not in shapefile bbox
+            
+            n_multiple = np.count_nonzero(n_found[in_bbox] > 1)
+            if n_multiple:
+                self._warn("multiple_countries", "%s stations in multiple countries/ polygons: first polygon kept.", n_multiple, n=n_multiple)
+            
+            n_missing = np.count_nonzero(idx_country < 0)
+            if n_missing:
+                self._warn("no_country", "No country found for %s/%s stations", n_missing, len(idx_country), n=n_missing)
+        
+        # idx_country=-1 -> NaN row
+        df_selected = self.gdf[attr].reset_index(drop=True).reindex(idx_country)
+        df_selected.index = index
+        
+        if dist and get_dist:
+            df_selected["dist"] = dists
+        return df_selected
+    
+    
+    @_timed
+    def get_iso_many(self, sta=None, lon=None, lat=None, points=None, buffer=0, dist=True, get_dist=False, n_jobs=1, chunk_size=100000):
+        """
+        Batch version of self.get_iso(): provides directly ISO 3 chr country codes for many stations.
+        This method apply: self.get_attr_many() with attr = [ISO_A3_EH]
+        
+        See self.get_attr_many() for inputs & parameters.
+        
+        Returns
+        -------
+        iso: pandas.Series of str (3 chr), '000' if no country found
+            if get_dist = True & dist=True: return a pandas.dataframe with columns ['ISO_A3_EH', 'dist']
+        """
+        iso = self.get_attr_many(lon=lon, lat=lat, sta=sta, points=points, attr=['ISO_A3_EH'], buffer=buffer, dist=dist, get_dist=get_dist,
+                                 n_jobs=n_jobs, chunk_size=chunk_size)
+        iso['ISO_A3_EH'] = iso['ISO_A3_EH'].fillna('000') #no country found
+        
+        if not (dist and get_dist):
+            iso = iso['ISO_A3_EH'] #only code ISO 3chr
+        return iso
+
+
+    @_timed
+    def get_attr_incremental(self, store, sta=None, names=None, lon=None, lat=None, attr=['ISO_A3_EH'], buffer=0, dist=True, get_dist=False,
+                             tolerance=0.01, margin=0.001, n_jobs=1, chunk_size=100000):
+        """
+        Incremental version of self.get_attr_many() for station catalogues changing slightly from run to run:
+        results persisted in 'store' (see ResultStore) by station name & lookup mode, only recomputed for stations
+            * new (or looked up with another mode: attr, buffer, dist)
+            * moved by more than 'tolerance' [m]
+            * near a boundary: closer than 'margin' (+ 'buffer') to a polygon boundary
+            * all stations if the shapefile data changed (see self.fingerprint)
+        Counts of reused & recomputed results in store.last_report (& metrics counters 'store.reused', 'store.recomputed').
+        
+        Possible input(s):
+            -names, lon & lat (array_like)
+            or
+            -sta (StationArray object or list of Station objects, with unique names)
+
+        Parameters
+        ----------
+        store : ResultStore obj or str
+            result store (or SQLite file path)
+        sta : StationArray obj or list of Station obj
+            station objects, with unique 'name' attribute.
+        names : array_like of str
+            unique station names
+        lon : array_like of floats
+            longitudes (same unit as in the shapefile)
+        lat : array_like of floats
+            latitudes (same unit as in the shapefile)
+        attr, buffer, dist, get_dist, n_jobs, chunk_size :
+            see self.get_attr_many()
+        tolerance : float
+            station movement [m] under which stored results are reused. Default 0.01.
+        margin : float
+            distance to a polygon boundary (shapefile unit, here degree) under which stations are always recomputed. Default 0.001.
+
+        Returns
+        -------
+        pandas.dataframe with columns 'attr' (+ 'dist'), indexed by station name (input order)
+        """
+        if not isinstance(store, ResultStore):
+            store = ResultStore(store)
+            
+        if sta is None:
+            if (names is None) or (lon is None) or (lat is None):
+                raise ValueError("Incorrect inputs: 'names', 'lon' & 'lat' or 'sta' must be specified.")
+            sta = StationArray(lon=lon, lat=lat, name=names)
+        elif not isinstance(sta, StationArray):
+            sta = StationArray.from_stations(sta)
+            
+        names = sta.name.astype(str)
+        if len(np.unique(names)) != len(names):
+            raise ValueError("Station names must be unique (results stored by station name).")
+        xyz = np.column_stack([sta.x, sta.y, sta.z])
+        mode = ResultStore.mode_key(attr, buffer, dist)
+        fingerprint = self.fingerprint()
+        
+        # stations to recompute (NaN: new station -> comparisons False)
+        stored = store.load(mode).reindex(names)
+        new = stored["fingerprint"].isna().to_numpy()
+        changed = ~new & (stored["fingerprint"].to_numpy() != fingerprint)
+        moved = np.linalg.norm(xyz - stored[["x", "y", "z"]].to_numpy(dtype=float), axis=1) > tolerance
+        near = stored["clearance"].to_numpy(dtype=float) < margin + buffer
+        recompute = new | changed | moved | near
+        
+        values = np.empty((len(names), len(attr)), dtype=object)
+        dists = stored["dist"].to_numpy(dtype=float, copy=True)
+        
+        idx = np.flatnonzero(recompute)
+        if idx.size:
+            points = sta.point[idx]
+            df_new = self.get_attr_many(points=points, attr=attr, buffer=buffer, dist=dist, get_dist=dist, n_jobs=n_jobs, chunk_size=chunk_size)
+            values[idx] = df_new[attr].astype(object).where(df_new[attr].notna(), None).to_numpy()
+            dists[idx] = df_new["dist"].to_numpy() if dist else np.nan
+            store.save(mode, names[idx], xyz[idx], fingerprint, self._boundary_distances(points), values[idx].tolist(), dists[idx])
+        
+        reused = np.flatnonzero(~recompute)
+        if reused.size:
+            values[reused] = [json.loads(row) for row in stored["attributes"].to_numpy()[reused]]
+        
+        store.last_report = {"reused": int(reused.size), "recomputed": int(idx.size), "new": int(np.count_nonzero(new)),
+                             "moved": int(np.count_nonzero(moved)), "near_boundary": int(np.count_nonzero(near)),
+                             "shapefile_changed": int(np.count_nonzero(changed))}
+        self._count("store.reused", reused.size)
+        self._count("store.recomputed", idx.size)
+        logger.info(f"Result store '{store.path}': {reused.size} results reused, {idx.size} recomputed {store.last_report}")
+        
+        df_selected = pd.DataFrame(values, columns=attr, index=pd.Index(names, name="name")).infer_objects()
+        df_selected = df_selected.where(df_selected.notna(), np.nan) #no country: NaN, as self.get_attr_many()
+        if dist and get_dist:
+            df_selected["dist"] = dists
+        return df_selected
+    
+    
+    @_timed
+    def get_nearest_k(self, sta=None, lon=None, lat=None, points=None, k=3, attr=['ISO_A3_EH'], n_jobs=1, chunk_size=100000):
+        """
+        k nearest countries/ polygons of many stations, with ellipsoidal distances (GRS80) [m]
+        Stations near borders & coasts: closest units & their metric distances (0 if station inside).
+
+        Index-driven (shapefile STRtree): only polygons which may be among the k nearest ones are distance-computed.
+        Shapefile in lon/lat [degree] (ex: epsg=4326). Distances: see Geodesic.ellipsoidal_distance.
+        Equal distances: first polygon of the shapefile ranked first.
+
+        Possible input(s): see self.get_attr_many()
+
+        Parameters
+        ----------
+        sta : StationArray obj or list of Station obj
+        lon : array_like of floats
+            longitudes [degree]
+        lat : array_like of floats
+            latitudes [degree]
+        points: geopandas.GeoSeries or array_like of shapely.geometry.Point obj
+        k : int
+            number of nearest polygons per station. Default 3.
+        attr : list of str, optional
+            attribute(s) of interest in the shapefile (i.e. in self.gdf). The default is 'ISO_A3_EH'.
+        n_jobs: int
+            number of worker processes (-1: all cores). Default 1 (i.e. no process pool). See self._parallel()
+        chunk_size: int
+            number of stations per worker task. Default 100000.
+
+        Returns
+        -------
+        pandas.dataframe with columns 'attr' + 'dist' [m], indexed by (station, rank): k rows per station (rank 1 = nearest),
+        less if the shapefile has less than k polygons (missing & empty geometries not counted).
+        """
+        points, index = self._as_points(sta=sta, lon=lon, lat=lat, points=points)
+        geoms = np.asarray(self.gdf.geometry.values)
+        k = min(int(k), int(np.count_nonzero(~(shapely.is_missing(geoms) | shapely.is_empty(geoms))))) #polygons in the spatial index
+
+        if n_jobs != 1 and len(points) > chunk_size: #parallel mode
+            nearest = self._parallel("_nearest_k", "points", points, n_jobs=n_jobs, chunk_size=chunk_size, k=k)
+        else:
+            nearest = self._nearest_k(points, k)
+
+        #one row per (station, rank), padding rows (empty stations) removed
+        idx_geom = nearest[:, 0].astype(np.intp)
+        found = idx_geom >= 0
+
+        df_nearest = self.gdf[attr].iloc[idx_geom[found]].reset_index(drop=True)
+        df_nearest["dist"] = nearest[found, 1]
+        df_nearest.index = pd.MultiIndex.from_arrays([np.repeat(index, k)[found], np.tile(np.arange(1, k+1), len(points))[found]],
+                                                     names=["station", "rank"])
+        return df_nearest
+
+
+    def _nearest_k(self, points, k):
+        """
+        k nearest polygons of each point: array (n_points*k, 2) of [polygon position, distance [m]], station-major order
+        (polygon position -1 & NaN distance for empty points & missing ranks)
+
+        Candidates from the spatial index in two steps:
+            1. degree box expanded until k polygons are found, k nearest bboxes --> upper bound of the k-th metric distance
+            2. lon/lat box of this metric distance (see Geodesic.degree_box): all polygons which may be nearer
+        """
+        n_geoms = len(self.gdf)
+        nearest = np.full((len(points)*k, 2), [-1, np.nan])
+        valid = np.flatnonzero(~(shapely.is_empty(points) | shapely.is_missing(points)))
+        if not (valid.size and k):
+            return nearest
+        points = points[valid]
+        lon, lat = shapely.get_x(points), shapely.get_y(points)
+        tree = self.gdf.sindex
+
+        #1. degree box around stations (polygon bboxes only), doubled until k candidates: any k polygons bound the k-th distance
+        radius = np.full(len(points), 0.1)
+        pending = np.arange(len(points))
+        pairs = []
+        while pending.size:
+            boxes = shapely.box(lon[pending] - radius[pending], lat[pending] - radius[pending], lon[pending] + radius[pending], lat[pending] + radius[pending])
+            idx_input, idx_tree = tree.query(boxes)
+            enough = (np.bincount(idx_input, minlength=pending.size) >= k) | (radius[pending] >= 360) #whole shapefile
+            keep = enough[idx_input]
+            pairs.append((pending[idx_input[keep]], idx_tree[keep]))
+            pending = pending[~enough]
+            radius[pending] *= 2
+        idx_input = np.concatenate([pair[0] for pair in pairs])
+        idx_tree = np.concatenate([pair[1] for pair in pairs])
+
+        #only k candidates per station: nearest bboxes [degree]
+        bounds = self._cached("bounds", lambda: shapely.bounds(np.asarray(self.gdf.geometry.values)))[idx_tree]
+        dx = np.maximum.reduce([bounds[:, 0] - lon[idx_input], lon[idx_input] - bounds[:, 2], np.zeros(len(idx_input))])
+        dy = np.maximum.reduce([bounds[:, 1] - lat[idx_input], lat[idx_input] - bounds[:, 3], np.zeros(len(idx_input))])
+        order = np.lexsort((np.hypot(dx, dy), idx_input))
+        selected = _first_k(idx_input[order], len(points), k)
+        complete = (selected >= 0).all(axis=1)
+        selected = order[selected[selected >= 0]]
+        idx_input, idx_tree = idx_input[selected], idx_tree[selected]
+
+        #k-th smallest distance [m] among candidates, any polygon may be nearer for stations with less than k candidates
+        geoms = self._prepared_geometries()
+        dists = ellipsoidal_distance(geoms[idx_tree], lon[idx_input], lat[idx_input])
+        dist_k = np.full(len(points), -np.inf)
+        np.maximum.at(dist_k, idx_input, dists)
+        dist_k[~complete] = np.inf
+
+        #2. all polygons in the lon/lat box of the k-th distance (bbox intersection), new candidates only
+        idx_box, idx_tree_box = tree.query(shapely.box(*degree_box(lon, lat, dist_k)))
+        new = ~np.isin(idx_box * n_geoms + idx_tree_box, idx_input * n_geoms + idx_tree)
+        idx_box, idx_tree_box = idx_box[new], idx_tree_box[new]
+        dists_box = ellipsoidal_distance(geoms[idx_tree_box], lon[idx_box], lat[idx_box], max_dist=dist_k[idx_box]) #inf if farther
+
+        self._count("candidates.nearest_k", len(idx_tree) + len(idx_tree_box))
+        idx_input = np.concatenate([idx_input, idx_box])
+        idx_tree = np.concatenate([idx_tree, idx_tree_box])
+        dists = np.concatenate([dists, dists_box])
+
+        #k smallest distances, then first polygon among equal distances (padding rows if less than k polygons found)
+        order = np.lexsort((idx_tree, dists, idx_input))
+        best = _first_k(idx_input[order], len(points), k)
+        found = best >= 0
+        best = order[best[found]]
+
+        rows = (valid[:, np.newaxis] * k + np.arange(k))[found]
+        nearest[rows, 0] = idx_tree[best]
+        nearest[rows, 1] = dists[best]
+        return nearest
+
+
+    def check_points(self, points):
+        """
+        Batch version of self.check_point(): stations points are in shapefile bbox ?
+        
+        Parameters
+        ----------
+        points: numpy.ndarray of shapely.geometry.Point obj
+    
+        Returns
+        -------
+        valid: numpy.ndarray of bool
+        """
+        valid = shapely.contains(self.shapefile_bbox, points)
+        
+        n_invalid = np.count_nonzero(~valid)
+        if n_invalid:
+            self._warn("not_in_bbox", "%s/%s stations not in shapefile %s", n_invalid, len(valid), self.verbose_bbox, n=n_invalid)
+        return valid
+    
+    
+    def _parallel(self, method, key, values, n_jobs=-1, chunk_size=100000, **kwargs):
+        """
+        Runs self.'method' on chunks of 'values' (keyword argument 'key') across a process pool, results in input order:
+        pool of self.worker_pool() if active, else a pool started for this call. Workers share this object (no shapefile reading): on Linux, forked workers inherit loaded geometries & spatial index (copy-on-write).
+        
+        Returns
+        -------
+        concatenated results (pandas.dataframe or numpy.ndarray)
+        """
+        chunks = [values[start:start+chunk_size] for start in range(0, len(values), chunk_size)]
+        
+        if self._pool is not None: #pool kept by self.worker_pool()
+            results = list(self._pool.map(_run_worker, repeat(method), repeat(key), chunks, repeat(kwargs)))
+        else:
+            with self._start_pool(n_jobs) as pool:
+                results = list(pool.map(_run_worker, repeat(method), repeat(key), chunks, repeat(kwargs)))
+            
+        if isinstance(results[0], pd.DataFrame):
+            return pd.concat(results, ignore_index=True)
+        return np.concatenate(results)
+    
+    
+    @contextlib.contextmanager
+    def worker_pool(self, n_jobs=-1):
+        """
+        Keeps one process pool for all parallel batch calls (n_jobs != 1) of a 'with' block, instead of one pool per call:
+        workers forked once (ex: stations streamed by batches, see Cli). Workers share this object as it is when the pool starts:
+        do not modify self.gdf inside the block.
+        
+            with geo.worker_pool(4):
+                for lon, lat in batches:
+                    geo.get_attr_many(lon=lon, lat=lat, n_jobs=4, chunk_size=len(lon)//4)
+        
+        Parameters
+        ----------
+        n_jobs : int
+            number of worker processes (-1: all cores). Default -1.
+
+        Yields
+        ------
+        concurrent.futures.ProcessPoolExecutor
+        """
+        with self._start_pool(n_jobs) as pool:
+            self._pool = pool
+            try:
+                yield pool
+            finally:
+                self._pool = None
+    
+    
+    def _start_pool(self, n_jobs=-1):
+        """ Process pool of 'n_jobs' workers sharing this object (see self._parallel) """
+        n_jobs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+        
+        #build derived data once, before workers start: inherited by forked workers
+        self.gdf.sindex
+        self._prepared_geometries()
+        self._lookup_grid()
+        
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context("fork" if "fork" in methods else None)
+        return ProcessPoolExecutor(max_workers=n_jobs, mp_context=ctx, initializer=_init_worker, initargs=(self,))
+    
+    
+    def _as_points(self, sta=None, lon=None, lat=None, points=None):
+        """
+        Builds an array of shapely points from batch inputs (lon & lat arrays, StationArray, list of Station or points)
+        
+        Returns
+        -------
+        points: numpy.ndarray of shapely.geometry.Point obj
+        index: pandas.Index of the output dataframe
+        """
+        if points is not None:
+            if isinstance(points, gpd.GeoSeries):
+                return np.asarray(points.values), points.index
+            points = np.asarray(points, dtype=object)
+            
+        elif isinstance(sta, StationArray):
+            points = sta.point
+            
+        elif sta is not None:
+            points = np.array([s.point for s in sta], dtype=object)
+            
+        elif (lon is not None) and (lat is not None):
+            lon = np.asarray(lon, dtype=float)
+            lat = np.asarray(lat, dtype=float)
+            lon = np.where(lon > 180, lon-360, lon) #lon (-180, 180), as Station obj
+            points = shapely.points(lon, lat)
+            
+        else:
+            raise ValueError("Incorrect inputs: 'lon' & 'lat', 'sta' or 'points' must be specified.")
+        
+        points = np.atleast_1d(points)
+        return points, pd.RangeIndex(len(points))
+        
+    
+    def _nearest_many(self, polygons):
+        """
+        Polygon position (in self.gdf) with min distance to each station and distance values.
+        Based on shapefile spatial index (STRtree):
+            * stations included in a polygon: dist=0, no distance computation
+            * other stations: only nearest candidates from the index are distance-tested
+        First polygon of the shapefile kept in case of equal distances (as pandas idxmin)
+        """
+        #stations included in polygons
+        idx_country, _ = self._intersects_many(polygons)
+        dists = np.zeros(len(polygons))
+        
+        #other stations: nearest polygons
+        outside = np.flatnonzero(idx_country < 0)
+        if outside.size:
+            idx_country[outside], dists[outside] = self._nearest_outside(polygons[outside])
+        return idx_country, dists
+    
+    
+    def _nearest_outside(self, polygons):
+        """
+        self._nearest_many() for stations outside all polygons (all polygons at equal distance), -1 & NaN for empty station geometries
+        First polygon of the shapefile kept in case of equal distances
+        """
+        lod = self._geometry_lod()
+        if lod is not None: #coarse level first (see self.build_lod)
+            return lod.nearest(polygons)
+        
+        n_geoms = len(self.gdf)
+        (idx_input, idx_tree), d = self.gdf.sindex.nearest(polygons, return_all=True, return_distance=True)
+        self._count("candidates.nearest", len(idx_tree))
+        
+        idx_nearest = np.full(len(polygons), n_geoms, dtype=np.intp)
+        np.minimum.at(idx_nearest, idx_input, idx_tree) #first polygon of the shapefile
+        dist_nearest = np.full(len(polygons), np.nan)
+        dist_nearest[idx_input] = d #same distance for all equidistant polygons
+        
+        idx_nearest[idx_nearest == n_geoms] = -1 #empty station geometry
+        return idx_nearest, dist_nearest
+    
+    
+    def _intersects_many(self, polygons):
+        """
+        First polygon position (in self.gdf) intersecting each station, -1 if no polygon found
+        
+        Returns
+        -------
+        idx_country: numpy.ndarray of int
+        n_found: numpy.ndarray of int
+            number of polygons intersecting each station
+        """
+        n_geoms = len(self.gdf)
+        idx_input, idx_tree = self._query_intersects(polygons)
+        
+        idx_country = np.full(len(polygons), n_geoms, dtype=np.intp)
+        np.minimum.at(idx_country, idx_input, idx_tree) #first polygon of the shapefile
+        idx_country[idx_country == n_geoms] = -1
+        
+        n_found = np.bincount(idx_input, minlength=len(polygons))
+        return idx_country, n_found
+    
+    
+    def _query_intersects(self, polygons):
+        """
+        Pairs (station position, polygon position in self.gdf) of intersecting station & polygon
+        If a lookup grid is built (see self.build_grid): points in cells inside a polygon or in empty cells are answered by the grid,
+        exact test only for other stations (border cells, buffers)
+        """
+        grid = self._lookup_grid()
+        if grid is None:
+            return self._query_intersects_exact(polygons)
+        
+        values = grid.lookup(polygons)
+        inside = np.flatnonzero(values >= 0)
+        border = np.flatnonzero(values == LookupGrid.BORDER)
+        self._count("grid.answered", len(polygons) - border.size)
+        self._count("grid.border", border.size)
+        
+        idx_input, idx_tree = self._query_intersects_exact(polygons[border])
+        return np.concatenate([inside, border[idx_input]]), np.concatenate([values[inside], idx_tree])
+    
+    
+    def _query_intersects_exact(self, polygons, lod=True):
+        """
+        Pairs (station position, polygon position in self.gdf) of intersecting station & polygon
+        Bounding box prefilter with the spatial index, then exact test on prepared polygons only for candidates
+        If multi-resolution geometries are built (see self.build_lod): coarse level first for points
+        """
+        lod = self._geometry_lod() if lod else None
+        if lod is not None:
+            is_point = shapely.get_type_id(polygons) == 0
+            points, others = np.flatnonzero(is_point), np.flatnonzero(~is_point)
+            idx_points, idx_lod = lod.query_intersects(polygons[points])
+            idx_others, idx_tree = self._query_intersects_exact(polygons[others], lod=False)
+            return np.concatenate([points[idx_points], others[idx_others]]), np.concatenate([idx_lod, idx_tree])
+        
+        idx_input, idx_tree = self.gdf.sindex.query(polygons) #bbox candidates
+        self._count("candidates.intersects", len(idx_tree))
+        
+        geoms = self._prepared_geometries()
+        hit = shapely.intersects(geoms[idx_tree], polygons[idx_input])
+        return idx_input[hit], idx_tree[hit]
+    
+    
+    def _geometry_lod(self):
+        """ GeometryLOD obj if enabled (see self.build_lod), else None. Rebuilt when self.gdf geometries are modified """
+        if self.lod_tolerance is None:
+            return None
+        return self._cached("lod", lambda: GeometryLOD(np.asarray(self.gdf.geometry.values), tolerance=self.lod_tolerance,
+                                                       split_parts=self.lod_split_parts))
+    
+    
+    def _lookup_cache(self):
+        """ LookupCache obj if enabled (see self.enable_lookup_cache), cleared when self.gdf or its geometries are modified """
+        if self.lookup_cache is None:
+            return None
+        
+        token = self.lookup_cache.token
+        if (token is None) or (token[0] is not self.gdf) or (token[1] is not self.gdf.sindex): #new spatial index: geometries modified
+            self.lookup_cache.clear(token=(self.gdf, self.gdf.sindex))
+        return self.lookup_cache
+    
+    
+    def _lookup_grid(self):
+        """ LookupGrid obj if enabled (see self.build_grid), else None. Rebuilt when self.gdf geometries are modified """
+        if self.grid_resolution is None:
+            return None
+        
+        def build():
+            geoms = self._prepared_geometries()
+            grid = None
+            if self.grid_path and os.path.isfile(self.grid_path):
+                grid = LookupGrid.load(self.grid_path)
+                if (grid.resolution != self.grid_resolution) or (grid.fingerprint != LookupGrid.geometries_fingerprint(geoms)):
+                    logger.info(f"Lookup grid '{self.grid_path}' out of date: rebuilt")
+                    grid = None
+                    
+            if grid is None:
+                bbox = self.shapefile_bbox.bounds
+                grid = LookupGrid.build(geoms, self.gdf.sindex, bbox, resolution=self.grid_resolution)
+                if self.grid_path:
+                    grid.save(self.grid_path)
+            return grid
+        return self._cached("grid", build)
+    
+    
+    def fingerprint(self):
+        """
+        Fingerprint of the shapefile data (geometries & attribute table). Ex: stored results up to date ? (see ResultStore)
+        Geometries hash cached (see self._cached), attribute table hashed on each call: edited attributes change the fingerprint.
+        """
+        geometries = self._cached("geometries_hash", lambda: hashlib.sha1(b"".join(shapely.to_wkb(np.asarray(self.gdf.geometry.values)))).digest())
+        h = hashlib.sha1(geometries)
+        attributes = pd.DataFrame(self.gdf.drop(columns=self.gdf.geometry.name))
+        h.update(repr(list(attributes.columns)).encode())
+        h.update(pd.util.hash_pandas_object(attributes, index=False).to_numpy().tobytes())
+        return h.hexdigest()
+    
+    
+    def _boundary_distances(self, points):
+        """ Distance btw each station & the nearest polygon boundary (shapefile unit), inf for empty station geometries """
+        tree = self._cached("boundaries", lambda: shapely.STRtree(shapely.boundary(self._prepared_geometries())))
+        (idx_input, _), d = tree.query_nearest(points, return_distance=True, all_matches=False)
+        
+        dists = np.full(len(points), np.inf)
+        dists[idx_input] = d
+        return dists
+    
+    
+    def _attribute_table(self):
+        """ AttributeTable obj of self.gdf attribute columns (cached, values always read from self.gdf), see self.lookup """
+        return self._cached("attributes", lambda: AttributeTable(self.gdf))
+    
+    
+    def _prepared_geometries(self):
+        """ self.gdf geometries as a numpy array of shapely prepared geometries (cached) """
+        def build():
+            geoms = np.array(self.gdf.geometry.values, dtype=object)
+            shapely.prepare(geoms)
+            return geoms
+        return self._cached("prepared", build)
+    
+    
+    def _progress(self, results, total, progress=False):
+        """ Collects 'results' (iterable of 'total' chunk results): tqdm progress bar if 'progress', else package logger (debug level) """
+        if progress:
+            import tqdm
+            return list(tqdm.tqdm(results, total=total))
+        
+        collected = []
+        for num, result in enumerate(results, 1):
+            collected.append(result)
+            logger.debug(f"chunk {num}/{total} checked")
+        return collected
+    
+    
+    def _count(self, name, n=1):
+        """ Adds 'n' events to metrics counter 'name' (if metrics enabled) """
+        if self.metrics is not None:
+            self.metrics.count(name, n)
+    
+    
+    def _warn(self, kind, msg, *args, n=1):
+        """ Package logger warning (lazy formatting) & metrics counter 'warnings.kind' ('n' events) """
+        if self.metrics is not None:
+            self.metrics.count(f"warnings.{kind}", n)
+        logger.warning(msg, *args)
+    
+    
+    def _read_file(self):
+        """ Reads the shapefile with loading options (columns, region), Arrow-based reader if available """
+        kwargs = {}
+        if self.columns is not None:
+            kwargs["columns"] = self.columns
+        if self.bbox is not None:
+            kwargs["bbox"] = self.bbox
+        if self.mask is not None:
+            kwargs["mask"] = self.mask
+        if ARROW_READER:
+            kwargs.update(engine="pyogrio", use_arrow=True)
+        return gpd.read_file(self.shapefile, **kwargs)
+    
+    
+    def _load_options(self):
+        """ Loading options (part of the shapefile cache key), None if whole shapefile loaded """
+        if self.columns is None and self.bbox is None and self.mask is None:
+            return None #same cache as without options
+        return {"columns": None if self.columns is None else tuple(self.columns), "bbox": self.bbox,
+                "mask": None if self.mask is None else shapely.to_wkb(self.mask, hex=True)}
+    
+    
+    def _cached(self, key, build):
+        """
+        Gets data derived from self.gdf geometries, built once with build() and stored in self._cache.
+        Cache cleared as soon as self.gdf geometries are modified: new spatial index (geopandas rebuilds it after any geometry modification).
+        """
+        token = self.gdf.sindex
+        if token is not self._cache_token:
+            self._cache.clear()
+            self._cache_token = token
+            
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+    
+    
+    @_timed
+    def get_country_ISOdist_many(self, iso, sta=None, lon=None, lat=None, epsg="4978", n_jobs=1, chunk_size=100000):
+        """
+        Batch version of self.get_country_ISOdist(): distance matrix [m] between many stations & many 'iso' countries.
+        * distance in which epsg ? Default 4978 : WGS 84 [unit: meter]
+        * In case of several polygon with 'ISO' code, get minimal distance
+        * Unknown ISO code: dist=-1
+        
+        Possible input(s):
+            -lon & lat (array_like of floats)
+            or
+            -sta (StationArray object or list of Station objects)
+
+        Parameters
+        ----------
+        iso : str or list of str
+            ISO code(s), from 'ISO_A3_EH' (units) or 'SOV_A3' (sovereignty) shapefile columns
+        sta : StationArray obj or list of Station obj
+            station objects, with 'point_xyz' attribute.
+        lon : array_like of floats
+            longitudes [degree]
+        lat : array_like of floats
+            latitudes [degree]
+        epsg : str
+            epsg code of the shapefile reprojection. Reprojection cached by epsg.
+        n_jobs: int
+            number of worker processes (-1: all cores). Default 1 (i.e. no process pool). See self._parallel()
+        chunk_size: int
+            number of stations per worker task. Default 100000.
+
+        Returns
+        -------
+        pandas.dataframe of distances: one row per station (input order), one column per ISO code
+        """
+        isos = [iso] if isinstance(iso, str) else list(iso)
+        
+        if sta is None: #StationArray built from 'lon' & 'lat'
+            sta = StationArray(lon=lon, lat=lat)
+        if isinstance(sta, StationArray):
+            points_xyz = sta.point_xyz
+        else:
+            points_xyz = np.array([s.point_xyz for s in sta], dtype=object)
+            
+        if n_jobs != 1 and len(points_xyz) > chunk_size: #parallel mode
+            dists = self._parallel("_iso_distances", "points_xyz", points_xyz, n_jobs=n_jobs, chunk_size=chunk_size, isos=isos, epsg=epsg)
+        else:
+            dists = self._iso_distances(points_xyz, isos, epsg=epsg)
+        return pd.DataFrame(dists, columns=isos)
+    
+    
+    def _iso_distances(self, points_xyz, isos, epsg="4978"):
+        """
+        Distance matrix (stations x ISO codes) between points & geometries of ISO codes (-1 for unknown ISO code)
+        """
+        iso_geoms = self._iso_geometries(epsg)
+        
+        dists = np.full((len(points_xyz), len(isos)), -1.)
+        known = [num for num, iso in enumerate(isos) if (iso in iso_geoms) and iso != "ZZZ"]
+        if known:
+            geoms = np.array([iso_geoms[isos[num]] for num in known], dtype=object)
+            dists[:, known] = shapely.distance(points_xyz[:, np.newaxis], geoms[np.newaxis, :])
+        return dists
+    
+    
+    def _iso_geometries(self, epsg="4978"):
+        """
+        Geometries by ISO code, in the 'epsg' reprojection (cached by epsg, rebuilt if ISO codes edited: see self._iso_index).
+        ISO code possible in SOV or unit column: each code gathers all its polygons in a single collection (distance = min distance to polygons)
+        """
+        epsg = str(epsg)
+        iso_index = self._iso_index()
+        
+        cached = self._cached(("iso_geoms", epsg), dict)
+        if cached.get("iso_index") is not iso_index:
+            #convert current gdf to dist [m]
+            geoms = np.asarray(self._reprojected(epsg).values)
+            
+            iso_geoms = {}
+            for iso, idx in iso_index.items():
+                parts = [geom for geom in geoms[idx] if (geom is not None) and not geom.is_empty]
+                iso_geoms[iso] = shapely.geometrycollections(parts) if parts else shapely.Point()
+            cached.update(iso_index=iso_index, iso_geoms=iso_geoms)
+        return cached["iso_geoms"]
+    
+    
+    def _reprojected(self, epsg="4978"):
+        """ self.gdf geometries (geopandas.GeoSeries) reprojected in 'epsg' (cached by epsg) """
+        epsg = str(epsg)
+        return self._cached(("crs", epsg), lambda: self.gdf.geometry.to_crs(f'EPSG:{epsg}')) # conversion latlon <> meter
+    
+    
+    def _iso_index(self):
+        """
+        Polygon positions (in self.gdf) by ISO code, from 'ISO_A3_EH' (units) & 'SOV_A3' (sovereignty) columns.
+        Cached while these columns are unchanged: codes compared on each call, so that edited codes are taken into account.
+        """
+        codes = [self.gdf[column].array for column in ("ISO_A3_EH", "SOV_A3")]
+        
+        cached = self._cached("iso_index", dict)
+        if ("codes" not in cached) or not all(a.equals(b) for a, b in zip(codes, cached["codes"])):
+            positions = np.tile(np.arange(len(self.gdf)), 2)
+            all_codes = np.concatenate([column.to_numpy(dtype=object) for column in codes])
+            
+            iso_index = {}
+            for iso, idx in pd.Series(positions).groupby(all_codes):
+                iso_index[iso] = np.unique(idx.values)
+            cached.update(codes=[column.copy() for column in codes], iso_index=iso_index)
+        return cached["iso_index"]
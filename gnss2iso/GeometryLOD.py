@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import numpy as np
+import shapely
+
+class GeometryLOD:
+    """
+    Two levels of detail of shapefile polygons (see GeographicShp.build_lod): coarse first, refine near borders
+
+        * coarse level: polygons simplified with 'tolerance' (topology preserving Douglas-Peucker):
+          every simplified boundary is within 'tolerance' of the original one (and reciprocally)
+        * full level: original polygons, only used for stations within the error bound of a coarse boundary
+
+    Containment: a point farther than 'tolerance' from the coarse boundary is inside the original polygon
+    if and only if it is inside the coarse polygon --> no full resolution test.
+    Distance: coarse distances bound original ones (+/- 2*tolerance) --> full resolution distance only for
+    polygons which may be the nearest one.
+    Same results as full resolution lookups.
+
+    Huge multipolygons can be split into parts, each part indexed separately (split_parts=True).
+
+    Attributes:
+        - tolerance : simplification tolerance (same unit as the polygons)
+        - parts     : full resolution polygons (or polygon parts), prepared
+        - coarse    : simplified polygons (or polygon parts), prepared
+        - owner     : position of the original polygon of each part
+        - n_vertices: (coarse, full) number of vertices
+
+    Methods:
+        - query_intersects()
+        - nearest()
+    """
+    def __init__(self, geoms, tolerance=0.01, split_parts=False):
+        """
+        Parameters
+        ----------
+        geoms : numpy.ndarray of shapely geometries
+            polygons (ex: GeographicShp.gdf geometries)
+        tolerance : float
+            simplification tolerance, i.e. error bound of the coarse level (same unit as the polygons). Default 0.01.
+        split_parts : bool
+            split multipolygons into indexed parts. Default False.
+        """
+        self.tolerance = float(tolerance)
+        self.n_geoms = len(geoms)
+
+        if split_parts:
+            parts, owner = shapely.get_parts(geoms, return_index=True)
+        else:
+            parts, owner = np.array(geoms, dtype=object), np.arange(len(geoms))
+        self.parts = parts
+        self.owner = owner
+
+        self.coarse = shapely.simplify(parts, self.tolerance, preserve_topology=True)
+        self.coarse_boundary = shapely.boundary(self.coarse)
+        for geoms_level in (self.parts, self.coarse, self.coarse_boundary):
+            shapely.prepare(geoms_level)
+
+        self.tree = shapely.STRtree(self.parts)
+        self.coarse_tree = shapely.STRtree(self.coarse)
+        self.n_vertices = (int(shapely.get_num_coordinates(self.coarse).sum()), int(shapely.get_num_coordinates(self.parts).sum()))
+
+
+    def query_intersects(self, points):
+        """
+        Pairs (point position, polygon position) of intersecting point & polygon.
+        Only points: other geometries (buffers) must use full resolution polygons.
+
+        Returns
+        -------
+        idx_input, idx_geom: numpy.ndarray of int
+        """
+        idx_input, idx_part = self.tree.query(points) #bbox candidates
+
+        #coarse level: decided if point farther than tolerance from coarse boundary
+        near_border = shapely.distance(self.coarse_boundary[idx_part], points[idx_input]) <= self.tolerance
+        hit = shapely.intersects(self.coarse[idx_part], points[idx_input])
+
+        #full resolution: only near borders
+        refine = np.flatnonzero(near_border)
+        hit[refine] = shapely.intersects(self.parts[idx_part[refine]], points[idx_input[refine]])
+
+        return self._unique_pairs(idx_input[hit], self.owner[idx_part[hit]])
+
+
+    def nearest(self, geoms):
+        """
+        Nearest polygon of each geometry & distance (first polygon kept in case of equal distances)
+
+        Returns
+        -------
+        idx_geom: numpy.ndarray of int (-1 for empty geometries)
+        dists: numpy.ndarray of float
+        """
+        idx_nearest = np.full(len(geoms), -1, dtype=np.intp)
+        dists = np.full(len(geoms), np.nan)
+
+        #coarse nearest distance
+        (idx_input, _), d_coarse = self.coarse_tree.query_nearest(geoms, return_distance=True, all_matches=False)
+        if not len(idx_input):
+            return idx_nearest, dists
+
+        #candidates: coarse distance within 2 x error bound (4*tolerance) of the coarse nearest distance
+        window = np.zeros(len(geoms))
+        window[idx_input] = d_coarse + 4 * self.tolerance
+        found = np.zeros(len(geoms), dtype=bool)
+        found[idx_input] = True
+        idx_input, idx_part = self.coarse_tree.query(geoms[found], predicate="dwithin", distance=window[found])
+        idx_input = np.flatnonzero(found)[idx_input]
+
+        #full resolution distance of candidates
+        d_full = shapely.distance(self.parts[idx_part], geoms[idx_input])
+        idx_geom = self.owner[idx_part]
+
+        #min distance, then first polygon among equal distances
+        order = np.lexsort((idx_geom, d_full, idx_input))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = idx_input[order][1:] != idx_input[order][:-1]
+        best = order[first]
+        idx_nearest[idx_input[best]] = idx_geom[best]
+        dists[idx_input[best]] = d_full[best]
+        return idx_nearest, dists
+
+
+    def _unique_pairs(self, idx_input, idx_geom):
+        """ Unique (input, polygon) pairs (several parts of a polygon may intersect a buffer) """
+        if not len(idx_input):
+            return idx_input, idx_geom
+        pairs = np.unique(np.stack([idx_input, idx_geom], axis=1), axis=0)
+        return pairs[:, 0], pairs[:, 1]
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: julienbarneoud
+"""
+import os
+import sys
+sys.path.append('..')
+import json
+import shutil
+import pickle
+import contextlib
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+import logging
+
+#internal import
+from gnss2iso.ShapefileCache import shapefile_stats, shapefile_hash
+
+logger = logging.getLogger(__name__)
+
+# store lock (see GeometryStore.lock): POSIX file locks, no locking elsewhere
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# store format (see GeometryStore.write)
+STORE_FORMAT = "gnss2iso-geometry-store"
+STORE_VERSION = 1
+
+# flat arrays of a store: one .npy file each, memory-mapped
+STORE_ARRAYS = ["coords", "ring_offsets", "polygon_offsets", "part_offsets", "types", "bounds"]
+
+class GeometryStore:
+    """
+    Shapefile polygons in a flat columnar layout (GeoArrow-style ragged arrays) in memory-mapped files,
+    see GeographicShp.from_geometry_store. Processes opening the same store read the files through the OS page cache
+    (no shapefile parsing), each process then builds its own shapely geometries from the mapped arrays.
+
+    Store directory:
+        - coords.npy          : all vertices (N, 2), float64
+        - ring_offsets.npy    : first vertex of each ring
+        - polygon_offsets.npy : first ring of each polygon
+        - part_offsets.npy    : first polygon of each geometry (polygons stored as single-part multipolygons)
+        - types.npy           : geometry type ids (3: Polygon, 6: MultiPolygon, -1: missing geometry)
+        - bounds.npy          : geometry bounds (N, 4): shapefile bbox & spatial index inputs
+        - attributes.pkl      : attributes table
+        - meta.json           : format, crs, columns, source shapefile & its fingerprint (files size, mtime & content hash)
+
+    Opening a store maps the files (no reading): pages loaded on first access. Geometries built in one vectorized call.
+
+    Attributes:
+        - path : store directory
+        - meta : store metadata (dict)
+        - arrays: dict of memory-mapped numpy arrays (see STORE_ARRAYS)
+
+    Methods:
+        - write()
+        - lock()
+        - up_to_date()
+        - geometries()
+        - attributes()
+        - to_geodataframe()
+    """
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str
+           store directory (see GeometryStore.write)
+        """
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+
+        if (self.meta.get("format") != STORE_FORMAT) or (self.meta.get("version") != STORE_VERSION):
+            raise ValueError(f"'{path}' is not a geometry store (version {STORE_VERSION}): {self.meta.get('format')} {self.meta.get('version')}")
+
+        self.arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in STORE_ARRAYS}
+
+
+    @classmethod
+    def write(cls, path, gdf, source=None, lock=True):
+        """
+        Exports polygons & attributes of a geodataframe in a store (replaced if it exists).
+        Store written aside, then swapped under an exclusive lock (see self.lock): readers holding a shared lock
+        never see a partial or a missing store.
+
+        Parameters
+        ----------
+        path : str
+           store directory
+        gdf : geopandas.GeoDataFrame
+           polygons & multipolygons (ex: GeographicShp.gdf)
+        source : str, optional
+           source shapefile path (metadata)
+        lock : bool
+           take the exclusive store lock for the swap. Default True. False if the caller already holds it.
+
+        Returns
+        -------
+        GeometryStore obj
+        """
+        geometry = gdf.geometry
+        geoms = np.asarray(geometry.values)
+        types = shapely.get_type_id(geoms).astype(np.int8)
+        if not np.isin(types, [-1, 3, 6]).all():
+            raise ValueError(f"Geometry store: only polygons & multipolygons, not {set(geometry.geom_type.dropna()) - {'Polygon', 'MultiPolygon'}}")
+
+        geoms = geoms.copy()
+        polygons = np.flatnonzero(types == 3) #polygons stored as single-part multipolygons
+        geoms[polygons] = shapely.multipolygons(geoms[polygons], indices=np.arange(polygons.size))
+        geoms[types == -1] = shapely.from_wkt("MULTIPOLYGON EMPTY")
+        _, coords, (ring_offsets, polygon_offsets, part_offsets) = shapely.to_ragged_array(geoms)
+
+        arrays = {"coords": coords, "ring_offsets": ring_offsets.astype(np.int64), "polygon_offsets": polygon_offsets.astype(np.int64),
+                  "part_offsets": part_offsets.astype(np.int64), "types": types, "bounds": geometry.bounds.to_numpy()}
+        meta = {"format": STORE_FORMAT, "version": STORE_VERSION, "crs": None if gdf.crs is None else gdf.crs.to_wkt(),
+                "geometry": geometry.name, "columns": list(gdf.columns), "source": source, "n_geoms": len(gdf), "n_coords": len(coords)}
+        if source and os.path.isfile(source): #source fingerprint, see self.up_to_date
+            meta.update({"source_stats": [list(stat) for stat in shapefile_stats(source)], "source_hash": shapefile_hash(source)})
+
+        # written aside, then swapped: old store renamed aside, new one moved in, old one removed
+        tmp = f"{path.rstrip(os.sep)}.{os.getpid()}.tmp"
+        old = f"{path.rstrip(os.sep)}.{os.getpid()}.old"
+        os.makedirs(tmp)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(tmp, "attributes.pkl"), "wb") as f:
+            pickle.dump(pd.DataFrame(gdf.drop(columns=geometry.name)), f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+        with (cls.lock(path) if lock else contextlib.nullcontext()):
+            if os.path.isdir(path):
+                os.replace(path, old)
+            os.replace(tmp, path)
+        if os.path.isdir(old):
+            shutil.rmtree(old) #files still mapped by other processes: freed once unmapped
+        logger.info(f"Geometry store '{path}': {meta['n_geoms']} geometries, {meta['n_coords']} vertices")
+        return cls(path)
+
+
+    @staticmethod
+    @contextlib.contextmanager
+    def lock(path, shared=False):
+        """
+        Store lock (lock file 'path.lock', released on exit): exclusive to write, shared to read,
+        ex: several processes starting together write a missing store once (see GeographicShp.from_geometry_store).
+        No locking if the lock file cannot be created (read-only directory) or without POSIX file locks.
+
+        Parameters
+        ----------
+        path : str
+           store directory
+        shared : bool
+           shared lock (readers) instead of exclusive (writer). Default False.
+        """
+        lock_path = f"{path.rstrip(os.sep)}.lock"
+        try:
+            if os.path.dirname(lock_path):
+                os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+            f = open(lock_path, "a")
+        except OSError:
+            yield
+            return
+
+        with f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+    def up_to_date(self, source):
+        """
+        Store written from shapefile 'source' as it is now ? Same files size & mtime, else same content hash (only touched).
+        False if the store has no source fingerprint.
+
+        Parameters
+        ----------
+        source : str
+           source shapefile path
+
+        Returns
+        -------
+        bool
+        """
+        if "source_hash" not in self.meta:
+            return False
+        stats = [list(stat) for stat in shapefile_stats(source)]
+        if stats == self.meta["source_stats"]:
+            return True
+        return shapefile_hash(source) == self.meta["source_hash"]
+
+
+    def geometries(self):
+        """ shapely geometries rebuilt from the mapped arrays (numpy.ndarray), original types (Polygon / MultiPolygon / None) """
+        arrays = self.arrays
+        geoms = shapely.from_ragged_array(shapely.GeometryType.MULTIPOLYGON, arrays["coords"],
+                                          (arrays["ring_offsets"], arrays["polygon_offsets"], arrays["part_offsets"]))
+        types = np.asarray(arrays["types"])
+        polygons = np.flatnonzero(types == 3)
+        geoms[polygons] = shapely.get_geometry(geoms[polygons], 0)
+        geoms[types == -1] = None
+        return geoms
+
+
+    def attributes(self):
+        """ Attributes table (pandas.dataframe) """
+        with open(os.path.join(self.path, "attributes.pkl"), "rb") as f:
+            return pickle.load(f)
+
+
+    def to_geodataframe(self):
+        """
+        Geodataframe & geometry bounds from the store
+
+        Returns
+        -------
+        gdf: geopandas.GeoDataFrame, bounds: numpy.ndarray (N, 4)
+        """
+        crs = self.meta["crs"]
+        attributes = self.attributes()
+        geometry = gpd.GeoSeries(self.geometries(), index=attributes.index, crs=crs, name=self.meta["geometry"])
+        gdf = gpd.GeoDataFrame(attributes, geometry=geometry, crs=crs)[self.meta["columns"]]
+        return gdf, self.arrays["bounds"]
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import numpy as np
+import pandas as pd
+import shapely
+import logging
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+
+logger = logging.getLogger(__name__)
+
+class LayerRegistry:
+    """
+    Several shapefile layers (map units, sovereignty, admin-1, maritime zones...) looked up in a single pass:
+    station geometries built once & one combined spatial index (bbox prefilter) over the polygons of all layers,
+    exact intersection tests of all layers in one vectorized call. Nearest polygons (dist method) searched per layer,
+    only for stations outside all polygons of a dist layer.
+
+    Same results as GeographicShp.get_attr_many() layer by layer (lookup grids & multi-resolution geometries not used).
+
+    Attributes:
+        - layers: dict {layer name: GeographicShp obj}
+        - attr  : dict {layer name: attribute columns}
+        - dist  : dict {layer name: distance method (True) or inclusion method (False)}
+
+    Methods:
+        - add()
+        - get_attr_many()
+    """
+    def __init__(self):
+        self.layers = {}
+        self.attr = {}
+        self.dist = {}
+
+        # combined spatial index, rebuilt when a layer is added or its geometries are modified
+        self._index = None
+        self._index_token = None
+
+
+    def add(self, name, layer, attr=['ISO_A3_EH'], dist=True, **kwargs):
+        """
+        Registers a layer
+
+        Parameters
+        ----------
+        name : str
+            layer name (first level of the output columns)
+        layer : GeographicShp obj or str
+            layer, or shapefile path: loaded with GeographicShp(layer, columns=attr, **kwargs), i.e. only 'attr' columns by default
+        attr : list of str, optional
+            attribute(s) of interest in the layer. The default is 'ISO_A3_EH'.
+        dist : bool
+            distance method (always a polygon found) [default] or inclusion method (ex: maritime zones membership, NaN if no polygon)
+        **kwargs :
+            GeographicShp parameters (cache_dir, columns, bbox, mask) if 'layer' is a shapefile path
+
+        Returns
+        -------
+        GeographicShp obj of the layer
+        """
+        if not isinstance(layer, GeographicShp):
+            kwargs.setdefault("columns", attr)
+            layer = GeographicShp(layer, **kwargs)
+
+        self.layers[name] = layer
+        self.attr[name] = list(attr)
+        self.dist[name] = dist
+        return layer
+
+
+    def __getitem__(self, name):
+        return self.layers[name]
+
+
+    def __len__(self):
+        return len(self.layers)
+
+
+    def get_attr_many(self, sta=None, lon=None, lat=None, points=None, buffer=0, get_dist=False):
+        """
+        Attributes of all layers for many stations, in one pass (see GeographicShp.get_attr_many for each layer)
+
+        Possible input(s):
+            -lon & lat (array_like of floats)
+            or
+            -sta (StationArray object or list of Station objects)
+            or
+            -points (geopandas.GeoSeries or array_like of shapely Point objects)
+
+        Parameters
+        ----------
+        sta : StationArray obj or list of Station obj
+            station objects, with 'point' attribute.
+        lon : array_like of floats
+            longitudes (same unit as in the shapefiles)
+        lat : array_like of floats
+            latitudes (same unit as in the shapefiles)
+        points: geopandas.GeoSeries or array_like of shapely.geometry.Point obj
+            Point objects.
+        buffer: float
+            Add a distance buffer (degree unit) around stations, same for all layers. Default 0 (i.e. no buffer).
+        get_dist: bool
+            Add 'dist' column to dist layers [WARNING : unit of shapefile]
+
+        Returns
+        -------
+        pandas.dataframe, one row per station (input order), columns (layer name, attribute) (+ (layer name, 'dist'))
+        """
+        if not self.layers:
+            raise ValueError("No layer registered (see LayerRegistry.add).")
+
+        names = list(self.layers)
+        points, index = self.layers[names[0]]._as_points(sta=sta, lon=lon, lat=lat, points=points)
+        polygons = shapely.buffer(points, buffer, quad_segs=16) if bool(buffer) else points #as Point.buffer (GeographicShp.get_attr)
+
+        # all layers: bbox candidates & exact test in one pass
+        tree, geoms, offsets = self._combined_index()
+        idx_input, idx_tree = tree.query(polygons)
+        hit = shapely.intersects(geoms[idx_tree], polygons[idx_input])
+        idx_input, idx_tree = idx_input[hit], idx_tree[hit]
+        idx_layer = np.searchsorted(offsets, idx_tree, side="right") - 1
+
+        df_layers = []
+        for num, name in enumerate(names):
+            layer = self.layers[name]
+            in_bbox = layer.check_points(points)
+
+            # first polygon of the layer intersecting each station
+            selected = idx_layer == num
+            n_geoms = len(layer.gdf)
+            idx_country = np.full(len(points), n_geoms, dtype=np.intp)
+            np.minimum.at(idx_country, idx_input[selected], idx_tree[selected] - offsets[num])
+            idx_country[idx_country == n_geoms] = -1
+
+            if self.dist[name]: #other stations: nearest polygons of the layer
+                dists = np.zeros(len(points))
+                outside = np.flatnonzero(idx_country < 0)
+                if outside.size:
+                    idx_country[outside], dists[outside] = layer._nearest_outside(polygons[outside])
+            else:
+                idx_country[~in_bbox] = -1 #station not in shapefile bbox
+                n_found = np.bincount(idx_input[selected], minlength=len(points))
+
+                n_multiple = np.count_nonzero(n_found[in_bbox] > 1)
+                if n_multiple:
+                    layer._warn("multiple_countries", "Layer '%s': %s stations in multiple polygons: first polygon kept.", name, n_multiple, n=n_multiple)
+
+                n_missing = np.count_nonzero(idx_country < 0)
+                if n_missing:
+                    layer._warn("no_country", "Layer '%s': no polygon found for %s/%s stations", name, n_missing, len(idx_country), n=n_missing)
+
+            # idx_country=-1 -> NaN row
+            df_layer = layer.gdf[self.attr[name]].reset_index(drop=True).reindex(idx_country)
+            if self.dist[name] and get_dist:
+                df_layer["dist"] = dists
+            df_layer.index = index
+            df_layers.append(df_layer)
+
+        return pd.concat(df_layers, axis=1, keys=names)
+
+
+    def _combined_index(self):
+        """
+        Spatial index over the polygons of all layers (cached)
+
+        Returns
+        -------
+        tree: shapely.STRtree, geoms: numpy.ndarray of prepared geometries (all layers), offsets: numpy.ndarray of int
+            position of the first polygon of each layer in 'geoms'
+        """
+        token = tuple((name, layer.gdf.sindex) for name, layer in self.layers.items()) #new spatial index: geometries modified
+        if (self._index_token is None) or (len(token) != len(self._index_token)) \
+                or any((a[0] != b[0]) or (a[1] is not b[1]) for a, b in zip(token, self._index_token)):
+            geoms = np.concatenate([layer._prepared_geometries() for layer in self.layers.values()])
+            offsets = np.cumsum([0] + [len(layer.gdf) for layer in self.layers.values()])[:-1]
+            self._index = (shapely.STRtree(geoms), geoms, offsets)
+            self._index_token = token
+            logger.info(f"Combined spatial index: {len(geoms)} polygons of {len(token)} layers")
+        return self._index
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: julienbarneoud
+"""
+import time
+from collections import OrderedDict
+
+class LookupCache:
+    """
+    Bounded memoization of station lookups (see GeographicShp.enable_lookup_cache)
+
+    Keys: quantized coordinates (lon, lat) & lookup mode (buffer, dist)
+    Eviction: when 'maxsize' entries are reached, the least recently used ('lru' policy)
+    or the oldest inserted ('fifo' policy) entry is evicted. Entries older than 'ttl' seconds are expired.
+
+    Attributes:
+        - maxsize : max number of entries
+        - ttl     : entries time-to-live [s] (None: no expiration)
+        - policy  : eviction policy, 'lru' or 'fifo'
+        - quantum : coordinates quantization step (same unit as in the shapefile)
+        - hits, misses, evictions: statistics
+
+    Methods:
+        - key()
+        - get()
+        - put()
+        - clear()
+        - info()
+    """
+    POLICIES = ("lru", "fifo")
+
+    def __init__(self, maxsize=10000, ttl=None, policy="lru", quantum=1e-9):
+        """
+        Parameters
+        ----------
+        maxsize : int
+            max number of entries. Default 10000.
+        ttl : float, optional
+            entries time-to-live [s]. Default None (i.e. no expiration).
+        policy : str
+            eviction policy: 'lru' (least recently used) [default] or 'fifo' (first inserted)
+        quantum : float
+            coordinates quantization step (same unit as in the shapefile). Default 1e-9 degree (<0.1 mm).
+            Stations closer than 'quantum' share the same entry.
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Incorrect cache policy '{policy}': {self.POLICIES}")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.policy = policy
+        self.quantum = quantum
+        self.token = None
+
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def key(self, x, y, *mode):
+        """ Entry key from point coordinates & lookup mode """
+        return (round(x / self.quantum), round(y / self.quantum), *mode)
+
+
+    def get(self, key):
+        """
+        Cached value of 'key'
+
+        Returns
+        -------
+        (found: bool, value)
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expiry = entry
+            if (expiry is None) or (expiry > time.monotonic()):
+                if self.policy == "lru":
+                    self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key] #expired entry
+
+        self.misses += 1
+        return False, None
+
+
+    def put(self, key, value):
+        """ Stores 'value' for 'key', evicts entries above 'maxsize' """
+        expiry = None if self.ttl is None else time.monotonic() + self.ttl
+        self._entries[key] = (value, expiry)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+    def clear(self, token=None):
+        """ Removes all entries. 'token': data the entries are valid for (see GeographicShp._lookup_cache) """
+        self._entries.clear()
+        self.token = token
+
+
+    def info(self):
+        """
+        Cache statistics
+
+        Returns
+        -------
+        dict: hits, misses, evictions, size, maxsize, hit_ratio
+        """
+        n_lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "size": len(self._entries), "maxsize": self.maxsize,
+                "hit_ratio": self.hits / n_lookups if n_lookups else 0.}
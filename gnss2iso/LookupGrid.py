@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import hashlib
+import numpy as np
+import shapely
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LookupGrid:
+    """
+    Precomputed lon/lat raster grid of polygon positions (see GeographicShp.build_grid)
+
+    Each cell of the grid stores:
+        * polygon position (in GeographicShp.gdf) if the cell is entirely inside this single polygon --> O(1) lookup
+        * EMPTY (-1) if no polygon intersects the cell (open sea...)
+        * BORDER (-2) if the cell touches a boundary or a coast --> exact lookup needed
+
+    Attributes:
+        - cells      : numpy.ndarray (n_lat, n_lon) of int (int16 or int32)
+        - lon_min    : grid origin longitude [degree]
+        - lat_min    : grid origin latitude [degree]
+        - resolution : cell size [degree]
+        - fingerprint: fingerprint of the polygons used to build the grid
+
+    Methods:
+        - build()
+        - load()
+        - save()
+        - lookup()
+    """
+    EMPTY = -1
+    BORDER = -2
+
+    def __init__(self, cells, lon_min, lat_min, resolution, fingerprint):
+        self.cells = cells
+        self.lon_min = float(lon_min)
+        self.lat_min = float(lat_min)
+        self.resolution = float(resolution)
+        self.fingerprint = fingerprint
+
+
+    @staticmethod
+    def geometries_fingerprint(geoms):
+        """ Fingerprint of polygons (WKB of all vertices, as GeographicShp.fingerprint) to check a saved grid is still up to date """
+        wkbs = [wkb or b"" for wkb in shapely.to_wkb(geoms)] #missing geometry: empty WKB
+        h = hashlib.sha1(np.array([len(wkb) for wkb in wkbs], dtype=np.int64).tobytes())
+        h.update(b"".join(wkbs))
+        return h.hexdigest()
+
+
+    @classmethod
+    def build(cls, geoms, tree, bbox, resolution=0.1):
+        """
+        Builds the grid over 'bbox'
+
+        Parameters
+        ----------
+        geoms : numpy.ndarray of shapely geometries
+            polygons, preferably prepared (shapely.prepare)
+        tree : shapely.STRtree or geopandas spatial index
+            spatial index of 'geoms'
+        bbox : tuple of floats
+            (lon_min, lat_min, lon_max, lat_max) extent of the grid
+        resolution : float
+            cell size [degree]. Default 0.1.
+
+        Returns
+        -------
+        LookupGrid obj
+        """
+        lon_min, lat_min, lon_max, lat_max = bbox
+        n_lon = max(1, int(np.ceil((lon_max - lon_min) / resolution)))
+        n_lat = max(1, int(np.ceil((lat_max - lat_min) / resolution)))
+        dtype = np.int16 if len(geoms) < np.iinfo(np.int16).max else np.int32
+        cells = np.empty((n_lat, n_lon), dtype=dtype)
+
+        # cells slightly enlarged: points on cell edges are safely classified
+        eps = resolution * 1e-6
+        x0 = lon_min + np.arange(n_lon) * resolution
+
+        for i in range(n_lat): #one grid row at a time: bounded memory
+            y0 = lat_min + i * resolution
+            boxes = shapely.box(x0 - eps, y0 - eps, x0 + resolution + eps, y0 + resolution + eps)
+
+            #polygons intersecting each cell
+            idx_box, idx_tree = tree.query(boxes)
+            hit = shapely.intersects(geoms[idx_tree], boxes[idx_box])
+            idx_box, idx_tree = idx_box[hit], idx_tree[hit]
+            n_found = np.bincount(idx_box, minlength=n_lon)
+
+            row = np.where(n_found == 0, cls.EMPTY, cls.BORDER)
+
+            #cells with a single polygon: inside if polygon covers the whole cell
+            single = n_found[idx_box] == 1
+            idx_box, idx_tree = idx_box[single], idx_tree[single]
+            inside = shapely.covers(geoms[idx_tree], boxes[idx_box])
+            row[idx_box[inside]] = idx_tree[inside]
+
+            cells[i] = row
+
+        grid = cls(cells, lon_min, lat_min, resolution, cls.geometries_fingerprint(geoms))
+        logger.info(f"Lookup grid {n_lon}x{n_lat} (resolution {resolution}): {grid.border_ratio():.1%} border cells")
+        return grid
+
+
+    @classmethod
+    def load(cls, path):
+        """ Loads a grid saved with self.save() (.npz file) """
+        with np.load(path) as data:
+            return cls(data["cells"], data["lon_min"], data["lat_min"], data["resolution"], str(data["fingerprint"]))
+
+
+    def save(self, path):
+        """ Saves the grid as a compressed .npz file """
+        np.savez_compressed(path, cells=self.cells, lon_min=self.lon_min, lat_min=self.lat_min,
+                            resolution=self.resolution, fingerprint=self.fingerprint)
+
+
+    def border_ratio(self):
+        """ Ratio of border cells (exact lookup needed) """
+        return np.count_nonzero(self.cells == self.BORDER) / self.cells.size
+
+
+    def lookup(self, points):
+        """
+        Grid values for points: polygon position, EMPTY or BORDER (exact lookup needed).
+        Non-point geometries (buffer...) & points outside the grid: BORDER.
+
+        Parameters
+        ----------
+        points : numpy.ndarray of shapely geometries
+
+        Returns
+        -------
+        numpy.ndarray of int
+        """
+        values = np.full(len(points), self.BORDER, dtype=np.intp)
+
+        is_point = (shapely.get_type_id(points) == 0) & ~shapely.is_empty(points)
+        idx = np.flatnonzero(is_point)
+        i = np.floor((shapely.get_y(points[idx]) - self.lat_min) / self.resolution)
+        j = np.floor((shapely.get_x(points[idx]) - self.lon_min) / self.resolution)
+
+        in_grid = (i >= 0) & (i < self.cells.shape[0]) & (j >= 0) & (j < self.cells.shape[1])
+        values[idx[in_grid]] = self.cells[i[in_grid].astype(np.intp), j[in_grid].astype(np.intp)]
+        return values
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: julienbarneoud
+"""
+import math
+
+class LookupResult:
+    """
+    Lightweight result of a fast lookup (see GeographicShp.lookup): no pandas object, fixed attributes (__slots__)
+    Several results converted to a dataframe in one step with GeographicShp.to_dataframe()
+
+    Attributes:
+        - attr   : attribute names (tuple, shared by the results of the same lookup)
+        - values : attribute values (tuple), None values if no country found
+        - polygon: polygon position in GeographicShp.gdf, -1 if no country found
+        - dist   : distance btw station & polygon [shapefile unit], NaN if not computed (buffer / inclusion methods)
+
+    Ex: result["ISO_A3_EH"], result.found, result.as_dict()
+    """
+    __slots__ = ("attr", "values", "polygon", "dist")
+
+    def __init__(self, attr, values, polygon, dist=math.nan):
+        self.attr = attr
+        self.values = values
+        self.polygon = polygon
+        self.dist = dist
+
+
+    @property
+    def found(self):
+        """ True if a country was found """
+        return self.polygon >= 0
+
+
+    def __getitem__(self, name):
+        """ Value of attribute 'name' """
+        return self.values[self.attr.index(name)]
+
+
+    def as_dict(self):
+        """ {attribute: value} (+ 'dist') """
+        return {**dict(zip(self.attr, self.values)), "dist": self.dist}
+
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={value!r}" for name, value in zip(self.attr, self.values))
+        return f"LookupResult({values}, polygon={self.polygon}, dist={self.dist})"
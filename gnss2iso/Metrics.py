@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: julienbarneoud
+"""
+import json
+import time
+import threading
+from collections import defaultdict, deque
+import numpy as np
+import pandas as pd
+
+class Metrics:
+    """
+    Opt-in hot-path instrumentation of a GeographicShp obj (see GeographicShp.enable_metrics)
+
+        * timings : calls, cumulative & percentile durations by method
+        * counters: events by name (candidate polygons examined, lookup cache & grid hits, warnings...)
+
+    Only the calling process is measured: worker processes (n_jobs) record their own metrics.
+
+    Attributes:
+        - calls    : number of calls by method
+        - time     : cumulative duration by method [s]
+        - counters : event counts by name
+        - n_timings: number of last durations kept by method (percentiles)
+
+    Methods:
+        - record()
+        - count()
+        - snapshot()
+        - report()
+        - dump()
+        - reset()
+    """
+    def __init__(self, n_timings=10000):
+        """
+        Parameters
+        ----------
+        n_timings : int
+            number of last durations kept by method for percentiles. Default 10000.
+        """
+        self.n_timings = n_timings
+        self._lock = threading.Lock()
+        self.reset()
+
+
+    def reset(self):
+        """ Clears all timings & counters """
+        with self._lock:
+            self.calls = defaultdict(int)
+            self.time = defaultdict(float)
+            self.counters = defaultdict(int)
+            self._timings = defaultdict(lambda: deque(maxlen=self.n_timings))
+            self.start = time.time()
+
+
+    def record(self, method, duration):
+        """ Records a call of 'method' lasting 'duration' [s] """
+        with self._lock:
+            self.calls[method] += 1
+            self.time[method] += duration
+            self._timings[method].append(duration)
+
+
+    def count(self, name, n=1):
+        """ Adds 'n' events to counter 'name' """
+        with self._lock:
+            self.counters[name] += int(n)
+
+
+    def snapshot(self):
+        """
+        Current metrics (JSON serializable), ex: for a monitoring system
+
+        Returns
+        -------
+        dict: {'since': start time [s since epoch], 'methods': {method: {calls, total_s, mean_ms, p50_ms, p90_ms, p99_ms, max_ms}},
+               'counters': {name: count}}
+        """
+        with self._lock:
+            methods = {}
+            for method, calls in self.calls.items():
+                p50, p90, p99, p_max = np.percentile(np.array(self._timings[method]) * 1e3, [50, 90, 99, 100])
+                methods[method] = {"calls": calls, "total_s": self.time[method], "mean_ms": self.time[method] / calls * 1e3,
+                                   "p50_ms": p50, "p90_ms": p90, "p99_ms": p99, "max_ms": p_max}
+            return {"since": self.start, "methods": methods, "counters": dict(self.counters)}
+
+
+    def report(self):
+        """
+        Timings by method
+
+        Returns
+        -------
+        pandas.dataframe, one row per method (sorted by cumulative time), columns
+        ['calls', 'total_s', 'mean_ms', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms']
+        """
+        df_report = pd.DataFrame.from_dict(self.snapshot()["methods"], orient="index",
+                                           columns=["calls", "total_s", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"])
+        return df_report.sort_values("total_s", ascending=False)
+
+
+    def dump(self, stream):
+        """ Writes self.snapshot() as JSON in 'stream' (file obj), ex: after a batch run """
+        json.dump(self.snapshot(), stream, indent=2)
+        stream.write("\n")
+
+
+    def __getstate__(self):
+        """ Pickling (worker processes): lock not copied """
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_timings"] = dict(state["_timings"])
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        timings = self._timings
+        self._timings = defaultdict(lambda: deque(maxlen=self.n_timings))
+        self._timings.update(timings)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: julienbarneoud
+"""
+import os
+import sys
+sys.path.append('..')
+import json
+import time
+import sqlite3
+import contextlib
+import numpy as np
+import pandas as pd
+
+class ResultStore:
+    """
+    Persisted station lookup results (SQLite file), keyed by station name & lookup mode, for incremental runs
+    (see GeographicShp.get_attr_incremental): only new, moved or near-boundary stations are recomputed,
+    or all stations when the shapefile changed.
+
+    One row per (station name, lookup mode) with:
+        - station coordinates (cartesian x, y, z [m]: movement check)
+        - shapefile fingerprint (see GeographicShp.fingerprint)
+        - clearance: distance btw station & nearest polygon boundary (shapefile unit)
+        - attribute values (JSON) & distance btw station & polygon
+
+    Attributes:
+        - path       : SQLite file path
+        - last_report: counts of the last incremental run {'reused', 'recomputed', 'new', 'moved', 'near_boundary', 'shapefile_changed'}
+
+    Methods:
+        - mode_key()
+        - load()
+        - save()
+        - clear()
+    """
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str
+           SQLite file path (created if needed)
+        """
+        self.path = path
+        self.last_report = None
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self._connect() as con:
+            con.execute("""CREATE TABLE IF NOT EXISTS results (
+                               name TEXT NOT NULL, mode TEXT NOT NULL, x REAL, y REAL, z REAL, fingerprint TEXT,
+                               clearance REAL, attributes TEXT, dist REAL, updated REAL, PRIMARY KEY (name, mode))""")
+
+
+    @staticmethod
+    def mode_key(attr, buffer, dist):
+        """ Lookup mode key (results of different modes stored side by side) """
+        return json.dumps({"attr": list(attr), "buffer": float(buffer), "dist": bool(dist)})
+
+
+    def load(self, mode):
+        """
+        Stored results of a lookup mode
+
+        Parameters
+        ----------
+        mode : str
+            lookup mode key (see self.mode_key)
+
+        Returns
+        -------
+        pandas.dataframe indexed by station name, columns ['x', 'y', 'z', 'fingerprint', 'clearance', 'attributes', 'dist']
+        """
+        with self._connect() as con:
+            df_stored = pd.read_sql_query("SELECT name, x, y, z, fingerprint, clearance, attributes, dist FROM results WHERE mode = ?",
+                                          con, params=(mode,), index_col="name")
+        df_stored.index = df_stored.index.astype(str)
+        return df_stored
+
+
+    def save(self, mode, names, xyz, fingerprint, clearance, values, dists):
+        """
+        Stores (inserts or replaces) results of a lookup mode
+
+        Parameters
+        ----------
+        mode : str
+            lookup mode key (see self.mode_key)
+        names : array_like of str
+            station names
+        xyz : numpy.ndarray (N, 3)
+            station cartesian coordinates [m]
+        fingerprint : str
+            shapefile fingerprint
+        clearance : array_like of floats
+            distances btw stations & nearest polygon boundary
+        values : list of lists
+            attribute values (JSON serializable, None: no country)
+        dists : array_like of floats
+            distances btw stations & polygons (NaN: not computed)
+        """
+        now = time.time()
+        rows = [(str(name), mode, *map(float, coords), fingerprint, float(margin), json.dumps(row), None if np.isnan(d) else float(d), now)
+                for name, coords, margin, row, d in zip(names, xyz, clearance, values, dists)]
+        with self._connect() as con:
+            con.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+
+    def clear(self):
+        """ Removes all stored results """
+        with self._connect() as con:
+            con.execute("DELETE FROM results")
+
+
+    def __len__(self):
+        with self._connect() as con:
+            return con.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """ SQLite connection: committed (or rolled back on error) & closed """
+        con = sqlite3.connect(self.path)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
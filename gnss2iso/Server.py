@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local lookup service: HTTP/JSON over TCP or Unix socket (asyncio, no extra dependency)
+
+One GeographicShp loaded once and shared by all clients. Concurrent single-station
+requests are coalesced into micro-batches (short time window) answered by one
+vectorized lookup (GeographicShp.get_attr_many).
+
+Endpoints:
+    GET  /iso?lon=..&lat=..[&buffer=..&dist=0|1&get_dist=0|1]          -> {"iso": "FRA"[, "dist": 0.0]}
+    GET  /attr?lon=..&lat=..&attr=NAME_LONG,ISO_A3_EH[&...]              -> {"NAME_LONG": .., "ISO_A3_EH": ..}
+    POST /attr  {"lon": .., "lat": .., "attr": [..], "buffer": .., "dist": .., "get_dist": ..}
+    GET  /stats                                                          -> request counts, batch sizes & latency percentiles
+
+    python -m gnss2iso.Server data/ne_10m_admin_0_map_units.shp --port 8765
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import time
+import json
+import asyncio
+import argparse
+from collections import deque, defaultdict
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+import logging
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+
+logger = logging.getLogger(__name__)
+
+HTTP_STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class LookupServer:
+    """
+    asyncio lookup service with request batching
+
+    Attributes:
+        - geo         : GeographicShp obj
+        - batch_window: time window [s] to coalesce requests into a micro-batch
+        - max_batch   : max number of requests per micro-batch
+        - latencies   : last request latencies [s] (see self.stats)
+
+    Methods:
+        - start()       (coroutine: start TCP or Unix socket server)
+        - lookup()      (coroutine: single station lookup, batched)
+        - stats()
+        - run()         (blocking)
+    """
+    def __init__(self, geo, batch_window=0.002, max_batch=10000, n_latencies=100000):
+        """
+        Parameters
+        ----------
+        geo : GeographicShp obj or str
+            GeographicShp obj or shapefile path
+        batch_window : float
+            time window [s] to coalesce requests into a micro-batch. Default 0.002.
+        max_batch : int
+            max number of requests per micro-batch. Default 10000.
+        n_latencies : int
+            number of last request latencies kept for percentiles. Default 100000.
+        """
+        self.geo = GeographicShp(geo) if isinstance(geo, str) else geo
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.latencies = deque(maxlen=n_latencies)
+        self.n_requests = 0
+        self.n_batches = 0
+        self.n_errors = 0
+        self._queue = None
+        self._batcher = None
+        self.server = None
+
+
+    ##############################################################################################################################
+    ####    lookups
+    ##############################################################################################################################
+
+    async def lookup(self, lon, lat, attr=('ISO_A3_EH',), buffer=0, dist=True, get_dist=False):
+        """
+        Single station lookup (same parameters as GeographicShp.get_attr), coalesced with concurrent requests
+
+        Returns
+        -------
+        dict of attributes (+ 'dist'), None values if no country found
+        """
+        if self._queue is None:
+            self._start_batcher()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((tuple(attr), float(buffer), bool(dist), bool(get_dist)), float(lon), float(lat), future))
+        return await future
+
+
+    def _start_batcher(self):
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.get_running_loop().create_task(self._batch_loop())
+
+
+    async def _batch_loop(self):
+        """ Collects requests during 'batch_window', then answers them with one vectorized lookup per mode """
+        loop = asyncio.get_running_loop()
+        while True:
+            requests = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(requests) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    requests.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            #one lookup per mode (attr, buffer, dist, get_dist)
+            groups = defaultdict(list)
+            for request in requests:
+                groups[request[0]].append(request)
+
+            for mode, group in groups.items():
+                lon = np.array([request[1] for request in group])
+                lat = np.array([request[2] for request in group])
+                try:
+                    #lookup in a thread: event loop keeps accepting requests
+                    records = await loop.run_in_executor(None, self._lookup_many, mode, lon, lat)
+                except Exception as e:
+                    for request in group:
+                        if not request[3].done():
+                            request[3].set_exception(e)
+                    continue
+                for request, record in zip(group, records):
+                    if not request[3].done():
+                        request[3].set_result(record)
+            self.n_batches += 1
+
+
+    def _lookup_many(self, mode, lon, lat):
+        """ Vectorized lookup of a micro-batch: list of dict (one per station) """
+        attr, buffer, dist, get_dist = mode
+        df = self.geo.get_attr_many(lon=lon, lat=lat, attr=list(attr), buffer=buffer, dist=dist, get_dist=get_dist)
+        df = df.astype(object).where(df.notna(), None)
+        return df.to_dict(orient="records")
+
+
+    def stats(self):
+        """
+        Service statistics: request & batch counts, mean batch size, latency percentiles [ms]
+
+        Returns
+        -------
+        dict
+        """
+        stats = {"requests": self.n_requests, "errors": self.n_errors, "batches": self.n_batches,
+                 "mean_batch_size": self.n_requests / self.n_batches if self.n_batches else 0}
+        if self.latencies:
+            p50, p90, p99, p999 = np.percentile(np.array(self.latencies) * 1e3, [50, 90, 99, 99.9])
+            stats.update({"latency_ms": {"p50": p50, "p90": p90, "p99": p99, "p99.9": p999, "max": max(self.latencies) * 1e3}})
+        if self.geo.metrics is not None: #lookup timings & counters (see GeographicShp.enable_metrics)
+            stats["metrics"] = self.geo.metrics.snapshot()
+        return stats
+
+
+    ##############################################################################################################################
+    ####    HTTP server
+    ##############################################################################################################################
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        """
+        Starts the server (TCP 'host':'port' or Unix socket 'path')
+
+        Returns
+        -------
+        asyncio.Server obj
+        """
+        if path:
+            self.server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self.server = await asyncio.start_server(self._handle, host=host, port=port)
+        self._start_batcher()
+        logger.info(f"gnss2iso lookup server listening on {path or f'{host}:{self.server.sockets[0].getsockname()[1]}'}")
+        return self.server
+
+
+    async def close(self):
+        """ Stops the server & the batcher """
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._batcher:
+            self._batcher.cancel()
+
+
+    def run(self, host="127.0.0.1", port=8765, path=None):
+        """ Runs the server until interrupted (blocking) """
+        async def serve():
+            server = await self.start(host=host, port=port, path=path)
+            async with server:
+                await server.serve_forever()
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+
+
+    async def _handle(self, reader, writer):
+        """ HTTP/1.1 connection (keep-alive) """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, payload = await self._route(method, target, body)
+
+                data = json.dumps(payload).encode()
+                keep_alive = headers.get("connection", "keep-alive").lower() != "close"
+                writer.write(f"HTTP/1.1 {status} {HTTP_STATUS[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+    async def _route(self, method, target, body):
+        """ HTTP status & JSON payload of a request """
+        url = urlsplit(target)
+        if url.path == "/stats":
+            return 200, self.stats()
+        if url.path not in ("/iso", "/attr"):
+            return 404, {"error": f"unknown path '{url.path}'"}
+
+        if method not in ("GET", "POST"):
+            return 405, {"error": f"method '{method}' not allowed"}
+
+        start = time.perf_counter()
+        self.n_requests += 1
+        try:
+            if method == "GET":
+                params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                if "attr" in params:
+                    params["attr"] = params["attr"].split(",")
+            else: #malformed JSON body: ValueError (400)
+                params = json.loads(body or b"{}")
+            lon, lat = float(params["lon"]), float(params["lat"])
+            attr = params.get("attr", ["ISO_A3_EH"]) if url.path == "/attr" else ["ISO_A3_EH"]
+            record = await self.lookup(lon, lat, attr=attr, buffer=float(params.get("buffer", 0)),
+                                       dist=_as_bool(params.get("dist", True)), get_dist=_as_bool(params.get("get_dist", False)))
+        except (KeyError, ValueError, TypeError) as e:
+            self.n_errors += 1
+            return 400, {"error": f"incorrect request: {e!r}"}
+        except Exception as e:
+            self.n_errors += 1
+            return 500, {"error": repr(e)}
+        self.latencies.append(time.perf_counter() - start)
+
+        if url.path == "/iso": #as GeographicShp.get_iso: '000' if no country found
+            record = {"iso": record["ISO_A3_EH"] or "000", **({"dist": record["dist"]} if "dist" in record else {})}
+        return 200, record
+
+
+def _as_bool(value):
+    """ bool from JSON or query string value ('0', 'false'...) """
+    if isinstance(value, str):
+        return value.lower() not in ("0", "false", "no", "")
+    return bool(value)
+
+
+def main(argv=None):
+    """ Runs a lookup server from the command line """
+    parser = argparse.ArgumentParser(prog="python -m gnss2iso.Server", description="gnss2iso local lookup service (HTTP/JSON).")
+    parser.add_argument("shapefile", help="shapefile path (.shp)")
+    parser.add_argument("--host", default="127.0.0.1", help="Default 127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="Default 8765")
+    parser.add_argument("--unix", default=None, help="Unix socket path (instead of TCP)")
+    parser.add_argument("--batch-window", type=float, default=0.002, help="micro-batch time window [s]. Default 0.002")
+    parser.add_argument("--cache-dir", default=None, help="persistent shapefile cache directory (see ShapefileCache)")
+    parser.add_argument("--geometry-store", default=None, help="memory-mapped geometry store directory for server processes, "
+                        "written from the shapefile if missing or out of date (see GeographicShp.from_geometry_store)")
+    parser.add_argument("--metrics", action="store_true", help="lookup timings & counters in /stats (see GeographicShp.enable_metrics)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+
+    if args.geometry_store: #written from the shapefile if missing or out of date
+        geo = GeographicShp.from_geometry_store(args.geometry_store, shapefile=args.shapefile, cache_dir=args.cache_dir)
+    else:
+        geo = GeographicShp(args.shapefile, cache_dir=args.cache_dir)
+    if args.metrics:
+        geo.enable_metrics()
+    LookupServer(geo, batch_window=args.batch_window).run(host=args.host, port=args.port, path=args.unix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: julienbarneoud
+"""
+import os
+import sys
+sys.path.append('..')
+import hashlib
+import pickle
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+import logging
+
+logger = logging.getLogger(__name__)
+
+# files of a shapefile dataset (.shp has hidden dependencies with other files)
+SHAPEFILE_EXT = [".shp", ".shx", ".dbf", ".prj", ".cpg"]
+
+def shapefile_files(shapefile):
+    """ Existing files of a shapefile dataset (or only the file itself for other formats) """
+    root, ext = os.path.splitext(shapefile)
+    if ext.lower() != ".shp":
+        return [shapefile]
+    return [root + ext for ext in SHAPEFILE_EXT if os.path.isfile(root + ext)]
+
+
+def shapefile_stats(shapefile):
+    """ (file, size, mtime) of each file of a shapefile dataset """
+    stats = [(file, os.stat(file)) for file in shapefile_files(shapefile)]
+    return [(file, stat.st_size, stat.st_mtime_ns) for file, stat in stats]
+
+
+def shapefile_hash(shapefile):
+    """ Content hash of a shapefile dataset """
+    h = hashlib.sha1()
+    for file in shapefile_files(shapefile):
+        with open(file, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+class ShapefileCache:
+    """
+    Persistent on-disk cache of parsed shapefiles (see GeographicShp 'cache_dir' parameter)
+
+    One cache file per shapefile (and per loading options), with:
+        - geometries as WKB (possibly repaired geometries, see GeographicShp.check_geometries_validity)
+        - attributes table
+        - geometry bounds (shapefile bbox & spatial index inputs)
+
+    Cache keyed by shapefile path, size, mtime and content hash:
+        * same size & mtime: cache used without reading the shapefile
+        * else: content hash computed, cache used only if shapefile content is unchanged
+
+    Methods:
+        - load()
+        - save()
+    """
+    def __init__(self, cache_dir):
+        """
+        Parameters
+        ----------
+        cache_dir : str
+           cache directory path (created if needed)
+        """
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+
+    def load(self, shapefile, options=None):
+        """
+        Loads a cached shapefile
+
+        Parameters
+        ----------
+        shapefile : str
+           shapefile path
+        options : dict, optional
+           loading options of the shapefile (part of the cache key)
+
+        Returns
+        -------
+        gdf: geopandas.GeoDataFrame, bounds: numpy.ndarray (N, 4)
+            or None if no valid cache
+        """
+        path = self.cache_path(shapefile, options)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                cached = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Unreadable shapefile cache '{path}': {e}")
+            return None
+
+        stats = shapefile_stats(shapefile)
+        if stats != cached["stats"]: #shapefile modified ? (size, mtime)
+            if shapefile_hash(shapefile) != cached["hash"]:
+                logger.info(f"Shapefile '{shapefile}' modified: cache '{path}' invalidated")
+                return None
+            cached["stats"] = stats #same content, only touched
+            self._write(path, cached)
+
+        geometry = gpd.GeoSeries(shapely.from_wkb(cached["wkb"]), crs=cached["crs"], name=cached["geometry"])
+        gdf = gpd.GeoDataFrame(cached["attributes"], geometry=geometry, crs=cached["crs"])[cached["columns"]]
+        return gdf, cached["bounds"]
+
+
+    def save(self, shapefile, gdf, options=None):
+        """
+        Saves a parsed shapefile in cache
+
+        Parameters
+        ----------
+        shapefile : str
+           shapefile path
+        gdf : geopandas.GeoDataFrame
+           shapefile data (possibly with repaired geometries)
+        options : dict, optional
+           loading options of the shapefile (part of the cache key)
+        """
+        geometry = gdf.geometry
+        cached = {"stats": shapefile_stats(shapefile),
+                  "hash": shapefile_hash(shapefile),
+                  "columns": list(gdf.columns),
+                  "geometry": geometry.name,
+                  "crs": None if gdf.crs is None else gdf.crs.to_wkt(),
+                  "attributes": pd.DataFrame(gdf.drop(columns=geometry.name)),
+                  "wkb": shapely.to_wkb(np.asarray(geometry.values)),
+                  "bounds": geometry.bounds.to_numpy()}
+        self._write(self.cache_path(shapefile, options), cached)
+
+
+    def cache_path(self, shapefile, options=None):
+        """ Cache file path of a shapefile (one file per shapefile path & loading options) """
+        key = repr((os.path.abspath(shapefile), sorted((options or {}).items())))
+        return os.path.join(self.cache_dir, f"{hashlib.sha1(key.encode()).hexdigest()}.pkl")
+
+
+    def _write(self, path, cached):
+        """ Atomic write of a cache file (safe with concurrent workers) """
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
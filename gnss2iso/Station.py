@@ -6,9 +6,6 @@
 import sys
 sys.path.append('..')
 import numpy as np
-import shapely.geometry as shpg
-import logging
-logging.getLogger().setLevel(logging.INFO)
 
 #internal import (earth parameters)
 from gnss2iso.Global import ae, fe, ee
@@ -27,8 +24,8 @@ class Station:
         - x        : cartesian x
         - y        : cartesian y
         - z        : cartesian z
-        - point    : shapely point object from geographic coordinates
-        - point_xyz: shapely point object from cartesian coordinates
+        - point    : shapely point object from geographic coordinates (built on first access)
+        - point_xyz: shapely point object from cartesian coordinates (built on first access)
         
     Methods:
         - valid_sta()
@@ -80,10 +77,39 @@ class Station:
         self.lon = lon180 #default longitude btw (-180,180)
         self.lon360 = lon360
 
-        #build shapely point obj
-        self.point = shpg.Point(self.lon, self.lat)
-        self.point_xyz = shpg.Point(self.x, self.y, self.z)
+        #shapely points built on first access (shapely imported only then)
+        self._point = None
+        self._point_xyz = None
         
+    
+    @property
+    def point(self):
+        """ shapely point object from geographic coordinates, built on first access """
+        if self._point is None:
+            import shapely.geometry as shpg
+            self._point = shpg.Point(self.lon, self.lat)
+        return self._point
+    
+    
+    @point.setter
+    def point(self, point):
+        self._point = point
+    
+    
+    @property
+    def point_xyz(self):
+        """ shapely point object from cartesian coordinates, built on first access """
+        if self._point_xyz is None:
+            import shapely.geometry as shpg
+            self._point_xyz = shpg.Point(self.x, self.y, self.z)
+        return self._point_xyz
+    
+    
+    @point_xyz.setter
+    def point_xyz(self, point):
+        self._point_xyz = point
+    
+
     def valid_sta(self):
         """ Checks if enough inputs coordinates are provided """
         if all(item is not None for item in [self.lon, self.lat]) or all(item is not None for item in [self.x, self.y, self.z]):
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import numpy as np
+
+#internal import
+from gnss2iso.Station import Station
+
+class StationArray:
+
+    """
+    Build an array of stations from their coordinates (geographic or cartesian).
+    Columnar version of Station: one numpy array per attribute, no python object per station.
+
+
+    Attributes (numpy arrays, one value per station):
+        - lon      : longitudes [degree] (-180,180)
+        - lon360   : longitudes [degree] (0,360)
+        - lat      : latitudes [degree] (-90,90)
+        - h        : heights [m]
+        - x        : cartesian x
+        - y        : cartesian y
+        - z        : cartesian z
+        - name     : station names
+        - iso      : station ISO codes ('000' default: no country code)
+        - meta     : dict of metadata columns (from **kwargs)
+        - point    : shapely points from geographic coordinates (built on first access)
+        - point_xyz: shapely points from cartesian coordinates (built on first access)
+
+    Methods:
+        - valid_sta()
+        - xyz2geo()
+        - geo2xyz()
+        - from_stations()
+        - to_dataframe()
+    """
+
+    __slots__ = ("lon", "lon360", "lat", "h", "x", "y", "z", "name", "iso", "meta", "_point", "_point_xyz")
+
+    # same GRS80 conversions as Station obj, vectorized with numpy arrays
+    xyz2geo = Station.xyz2geo
+    geo2xyz = Station.geo2xyz
+
+    def __init__(self, lon=None, lat=None, h=None, x=None, y=None, z=None, name=None, iso=None, **kwargs):
+        """
+        Necessary arguments (array_like):
+            -GEOGRAPHIC coordinates: 'lon', 'lat' (optional: 'h')
+            or
+            -CARTESIAN coordinates: 'x', 'y', 'z'
+
+        Optional arguments (array_like): 'name', 'iso', metadata columns..
+        """
+        self.lon, self.lat, self.h = [None if c is None else np.atleast_1d(np.asarray(c, dtype=float)) for c in (lon, lat, h)]
+        self.x, self.y, self.z = [None if c is None else np.atleast_1d(np.asarray(c, dtype=float)) for c in (x, y, z)]
+
+        # check station coordinate validity (enough coordinates provided)
+        valid = self.valid_sta()
+        if not valid:
+            raise ValueError("Incorrect coordinates for StationArray obj. 'x' 'y' 'z' or 'lon', 'lat' must be specified, with same length.")
+
+        if self.x is not None: #compute lon lat
+            self.lon, self.lat, self.h = self.xyz2geo(self.x, self.y, self.z)
+        else: #compute x, y, z coordinates
+            if self.h is None:
+                self.h = np.zeros(len(self.lon))
+            self.x, self.y, self.z = self.geo2xyz(self.lon, self.lat, self.h)
+
+        #lon180 & lon360
+        self.lon = np.where(self.lon > 180, self.lon-360, self.lon) #default longitude btw (-180,180)
+        self.lon360 = np.where(self.lon < 0, self.lon+360, self.lon) #lon360 (0,360)
+
+        ## sta info
+        n = len(self.lon)
+        self.name = np.char.add("station", np.arange(1, n+1).astype(str)) if name is None else np.atleast_1d(np.asarray(name))
+        self.iso = np.full(n, '000') if iso is None else np.atleast_1d(np.asarray(iso)) #default: no country code
+        self.meta = {key: np.atleast_1d(np.asarray(value)) for key, value in kwargs.items()}
+
+        for key, column in [("name", self.name), ("iso", self.iso), *self.meta.items()]:
+            if len(column) != n:
+                raise ValueError(f"Incorrect '{key}' column for StationArray obj: {len(column)} values for {n} stations.")
+
+        #shapely points built on first access
+        self._point = None
+        self._point_xyz = None
+
+
+    @classmethod
+    def from_stations(cls, stations):
+        """ Builds a StationArray from a list of Station objects """
+        return cls(lon=[s.lon for s in stations], lat=[s.lat for s in stations], h=[s.h for s in stations],
+                   name=[s.name for s in stations], iso=[s.iso for s in stations])
+
+
+    @property
+    def point(self):
+        """ shapely points from geographic coordinates, built in bulk on first access """
+        if self._point is None:
+            import shapely
+            self._point = shapely.points(self.lon, self.lat)
+        return self._point
+
+
+    @property
+    def point_xyz(self):
+        """ shapely points from cartesian coordinates, built in bulk on first access """
+        if self._point_xyz is None:
+            import shapely
+            self._point_xyz = shapely.points(self.x, self.y, self.z)
+        return self._point_xyz
+
+
+    def __len__(self):
+        return len(self.lon)
+
+
+    def __getitem__(self, item):
+        """ Station obj if item is an integer, else StationArray (slice, mask, indices) """
+        if np.isscalar(item):
+            return Station(lon=self.lon[item], lat=self.lat[item], h=self.h[item], name=self.name[item], iso=self.iso[item],
+                           **{key: column[item] for key, column in self.meta.items()})
+
+        return StationArray(lon=self.lon[item], lat=self.lat[item], h=self.h[item], name=self.name[item], iso=self.iso[item],
+                            **{key: column[item] for key, column in self.meta.items()})
+
+
+    def valid_sta(self):
+        """ Checks if enough inputs coordinates are provided, with same length """
+        for coords in ([self.lon, self.lat], [self.x, self.y, self.z]):
+            if all(item is not None for item in coords):
+                if self.h is not None:
+                    coords = coords + [self.h]
+                return len(set(len(item) for item in coords)) == 1
+        return False
+
+
+    def to_dataframe(self):
+        """ pandas.dataframe with one row per station: name, coordinates, iso & metadata columns """
+        import pandas as pd
+        return pd.DataFrame({"name": self.name, "lon": self.lon, "lon360": self.lon360, "lat": self.lat, "h": self.h,
+                             "x": self.x, "y": self.y, "z": self.z, "iso": self.iso, **self.meta})
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Deterministic synthetic shapefiles & stations (offline benchmarks, stress tests)
+
+Synthetic "countries": a lon/lat grid of cells covering the globe, with curved borders shared
+by neighbour cells (valid, non overlapping polygons), some cells left as sea with small islands
+(multipolygons). Natural Earth attribute names (ISO_A3_EH, SOV_A3, ADM0_A3_US, NAME_LONG).
+
+    python -m gnss2iso.Synthetic data/synthetic.shp --n-polygons 1000 --n-vertices 400
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import string
+import argparse
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+LETTERS = np.array(list(string.ascii_uppercase))
+
+
+def synthetic_countries(n_polygons=250, n_vertices=200, sea=0.2, islands=0.5, overlaps=0, n_columns=0, seed=0):
+    """
+    Synthetic countries (lon/lat, epsg=4326), same output for same parameters
+
+    Parameters
+    ----------
+    n_polygons : int
+        number of grid cells (land & sea) covering the globe. Default 250.
+    n_vertices : int
+        vertices per cell boundary (vertex density). Default 200.
+    sea : float
+        fraction of sea cells (no country). Default 0.2.
+    islands : float
+        fraction of sea cells with an island (part of the nearest country: multipolygon). Default 0.5.
+    overlaps : int
+        number of extra polygons overlapping countries (invalid shapefile, see GeographicShp.check_geometries_validity). Default 0.
+    n_columns : int
+        number of extra (unused) attribute columns, as in large Natural Earth tables. Default 0.
+    seed : int
+        random seed. Default 0.
+
+    Returns
+    -------
+    geopandas.GeoDataFrame
+    """
+    rng = np.random.default_rng(seed)
+    n_lat = max(1, int(round(np.sqrt(n_polygons / 2)))) #square cells: 360 x 180 degrees
+    n_lon = max(1, int(np.ceil(n_polygons / n_lat)))
+    lon_edges = np.linspace(-180, 180, n_lon + 1)
+    lat_edges = np.linspace(-90, 90, n_lat + 1)
+    n_edge = max(1, n_vertices // 4) #vertices per cell edge
+
+    #curved borders: smooth displacement of each edge (slope < 1, zero at corners), shared by both cells
+    t = np.linspace(0, 1, n_edge, endpoint=False)
+    harmonics = np.sin(np.pi * np.arange(1, 4)[:, np.newaxis] * t) / np.arange(1, 4)[:, np.newaxis]**2
+    coefs_h = rng.uniform(-0.08, 0.08, (n_lat + 1, n_lon, 3)) #horizontal edges (latitude lines)
+    coefs_v = rng.uniform(-0.08, 0.08, (n_lat, n_lon + 1, 3)) #vertical edges (longitude lines)
+    coefs_h[[0, -1]] = 0 #straight borders at poles & antimeridian
+    coefs_v[:, [0, -1]] = 0
+
+    def edge(i, j, horizontal):
+        """ edge from its first corner (vertices without the last corner) """
+        if horizontal: #from (lon_edges[j], lat_edges[i]) to (lon_edges[j+1], lat_edges[i])
+            dy = lat_edges[1] - lat_edges[0]
+            x = lon_edges[j] + t * (lon_edges[j+1] - lon_edges[j])
+            y = lat_edges[i] + dy * (coefs_h[i, j] @ harmonics)
+        else: #from (lon_edges[j], lat_edges[i]) to (lon_edges[j], lat_edges[i+1])
+            dx = lon_edges[1] - lon_edges[0]
+            y = lat_edges[i] + t * (lat_edges[i+1] - lat_edges[i])
+            x = lon_edges[j] + dx * (coefs_v[i, j] @ harmonics)
+        return np.stack([x, y], axis=1)
+
+    cells = []
+    for i in range(n_lat):
+        for j in range(n_lon):
+            ring = np.concatenate([edge(i, j, True), edge(i, j+1, False), [[lon_edges[j+1], lat_edges[i+1]]],
+                                   edge(i+1, j, True)[::-1], edge(i, j, False)[::-1][:-1]])
+            cells.append(shapely.Polygon(ring))
+    cells = np.array(cells, dtype=object)
+
+    #sea cells, islands given to the nearest land cell
+    is_sea = rng.random(len(cells)) < sea
+    land = np.flatnonzero(~is_sea)
+    centers = shapely.get_coordinates(shapely.centroid(cells))
+    parts = {num: [cells[num]] for num in land}
+    for num in np.flatnonzero(is_sea):
+        if land.size and rng.random() < islands:
+            owner = land[np.argmin(np.hypot(*(centers[land] - centers[num]).T))]
+            radius = 0.2 * min(lon_edges[1] - lon_edges[0], lat_edges[1] - lat_edges[0])
+            parts[owner].append(shapely.buffer(shapely.points(centers[num]), radius, quad_segs=max(1, n_edge // 4)))
+    geoms = [shapely.MultiPolygon(parts[num]) if len(parts[num]) > 1 else parts[num][0] for num in land]
+
+    #invalid shapefile: overlapping polygons
+    for _ in range(overlaps):
+        lon, lat = rng.uniform(-170, 170), rng.uniform(-80, 80)
+        geoms.append(shapely.box(lon - 2, lat - 2, lon + 2, lat + 2))
+
+    #attributes: 3 letters codes, sovereignty = group of 4 units
+    ids = np.arange(len(geoms))
+    iso = LETTERS[ids // 676 % 26] + LETTERS[ids // 26 % 26] + LETTERS[ids % 26]
+    sov = LETTERS[ids // 2704 % 26] + LETTERS[ids // 104 % 26] + LETTERS[ids // 4 % 26]
+    columns = {"ISO_A3_EH": iso, "SOV_A3": sov, "ADM0_A3_US": sov, "NAME_LONG": [f"Country {code}" for code in iso]}
+    columns.update({f"COL_{num}": rng.integers(0, 1000, len(geoms)) for num in range(n_columns)})
+    df = pd.DataFrame(columns)
+    return gpd.GeoDataFrame(df, geometry=geoms, crs="EPSG:4326")
+
+
+def synthetic_stations(n_stations=1000, gdf=None, near_border=0.5, seed=0):
+    """
+    Synthetic station coordinates [degree]: uniform on the sphere, a fraction close to polygon borders (hardest lookups)
+
+    Parameters
+    ----------
+    n_stations : int
+        number of stations. Default 1000.
+    gdf : geopandas.GeoDataFrame, optional
+        polygons of the border stations (ex: synthetic_countries()). Default None (i.e. only uniform stations).
+    near_border : float
+        fraction of stations within ~0.1 degree of a border (if 'gdf'). Default 0.5.
+    seed : int
+        random seed. Default 0.
+
+    Returns
+    -------
+    lon, lat: numpy.ndarray of floats
+    """
+    rng = np.random.default_rng(seed)
+    lon = rng.uniform(-180, 180, n_stations)
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, n_stations)))
+
+    if gdf is not None and len(gdf):
+        n_border = int(n_stations * near_border)
+        borders = shapely.get_coordinates(shapely.boundary(np.asarray(gdf.geometry.values)))
+        vertices = borders[rng.integers(len(borders), size=n_border)]
+        lon[:n_border] = np.clip(vertices[:, 0] + rng.normal(0, 0.05, n_border), -180, 180)
+        lat[:n_border] = np.clip(vertices[:, 1] + rng.normal(0, 0.05, n_border), -90, 90)
+    return lon, lat
+
+
+def write_shapefile(path, **kwargs):
+    """
+    Writes synthetic countries (see synthetic_countries() for parameters) in 'path' (.shp or any format of geopandas.to_file)
+
+    Returns
+    -------
+    geopandas.GeoDataFrame written
+    """
+    gdf = synthetic_countries(**kwargs)
+    gdf.to_file(path)
+    return gdf
+
+
+def main(argv=None):
+    """ Writes a synthetic shapefile from the command line """
+    parser = argparse.ArgumentParser(prog="python -m gnss2iso.Synthetic", description="Deterministic synthetic countries shapefile.")
+    parser.add_argument("path", help="output shapefile path (.shp)")
+    parser.add_argument("--n-polygons", type=int, default=250, help="grid cells (land & sea). Default 250")
+    parser.add_argument("--n-vertices", type=int, default=200, help="vertices per cell. Default 200")
+    parser.add_argument("--sea", type=float, default=0.2, help="fraction of sea cells. Default 0.2")
+    parser.add_argument("--islands", type=float, default=0.5, help="fraction of sea cells with an island. Default 0.5")
+    parser.add_argument("--overlaps", type=int, default=0, help="overlapping polygons (invalid shapefile). Default 0")
+    parser.add_argument("--n-columns", type=int, default=0, help="extra attribute columns. Default 0")
+    parser.add_argument("--seed", type=int, default=0, help="random seed. Default 0")
+    args = parser.parse_args(argv)
+
+    gdf = write_shapefile(args.path, n_polygons=args.n_polygons, n_vertices=args.n_vertices, sea=args.sea, islands=args.islands,
+                          overlaps=args.overlaps, n_columns=args.n_columns, seed=args.seed)
+    print(f"{len(gdf)} polygons, {shapely.get_num_coordinates(gdf.geometry.values).sum()} vertices written in {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,42 @@ Created on Fri Nov 26 14:55:16 2021
 
 @author: julienbarneoud
 """
+import sys
+import types
+import logging
+import importlib
 
-from .GeographicShp import GeographicShp
-from .Station import Station
-
-__all__ = ["GeographicShp", "Station"]
+__all__ = ["GeographicShp", "Station", "StationArray", "LayerRegistry"]
 __version__ = '0.1'
 __author__ = 'Julien Barneoud'
 
+# package logger: no output unless the application configures logging (ex: logging.basicConfig(level=logging.INFO))
+logging.getLogger(__name__).addHandler(logging.NullHandler())
+
+# public classes imported on first use: 'import gnss2iso' stays light (Station coordinate conversions only need numpy),
+# GeographicShp & heavy dependencies (pandas, geopandas, shapely) loaded by 'gnss2iso.GeographicShp' or 'from gnss2iso import GeographicShp'
+_LAZY = {name: f"{__name__}.{name}" for name in __all__}
+
+
+def __getattr__(name):
+    """ Lazy import of public classes (module-level __getattr__, PEP 562) """
+    if name not in _LAZY:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(_LAZY[name]), name)
+    globals()[name] = value #next accesses: no __getattr__ call
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
+
+
+class _Package(types.ModuleType):
+    """ gnss2iso package: class modules (gnss2iso.GeographicShp...) bound as their class once imported, as with eager imports """
+    def __setattr__(self, name, value):
+        if (name in _LAZY) and isinstance(value, types.ModuleType): #submodule set by the import system
+            value = getattr(value, name)
+        super().__setattr__(name, value)
+
+
+sys.modules[__name__].__class__ = _Package
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test fixtures: small synthetic shapefile & stations (see gnss2iso.Synthetic), fully offline
+
+    pytest tests
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import numpy as np
+import pytest
+import logging
+
+#internal import
+from gnss2iso.Synthetic import write_shapefile, synthetic_stations
+
+# lookup warnings (stations without country...) expected in tests
+logging.getLogger("gnss2iso").setLevel(logging.ERROR)
+
+
+@pytest.fixture(scope="session")
+def shapefile(tmp_path_factory):
+    """ Synthetic shapefile path (written once per session): sea, islands & overlapping polygons """
+    path = tmp_path_factory.mktemp("shp") / "synthetic.shp"
+    write_shapefile(str(path), n_polygons=80, n_vertices=40, overlaps=2, seed=1)
+    return str(path)
+
+
+@pytest.fixture(scope="session")
+def stations(shapefile):
+    """ Station coordinates (lon, lat): uniform, near borders & edge cases (lon > 180, out of shapefile bbox, poles) """
+    import geopandas as gpd
+    lon, lat = synthetic_stations(150, gpd.read_file(shapefile), near_border=0.6, seed=2)
+    lon = np.r_[lon, 190.0, 0.0, -179.999, 45.0]
+    lat = np.r_[lat, 5.0, 89.95, 0.0, -89.95]
+    return lon, lat
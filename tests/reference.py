@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Brute-force reference lookups: every polygon tested, no spatial index, grid, simplified geometries or cache.
+Reference geodesic distances: pyproj on sampled polygon boundaries.
+Accelerated lookups of gnss2iso must give the same answers.
+
+@author: julienbarneoud
+"""
+import numpy as np
+import shapely
+from pyproj import Geod
+
+# GRS80 ellipsoid
+GEOD = Geod(ellps="GRS80")
+
+
+def brute_force(gdf, lon, lat, buffer=0, dist=True):
+    """
+    Reference lookup of one station, as GeographicShp.get_attr()
+
+    Returns
+    -------
+    positions: list of int
+        dist method: nearest polygon position (first polygon of the shapefile if equal distances)
+        buffer / inclusion methods: positions of all polygons intersecting the station ([] if none or out of shapefile bbox)
+    dist: float
+        distance btw station & nearest polygon (NaN for buffer / inclusion methods)
+    """
+    geoms = np.asarray(gdf.geometry.values)
+    point = shapely.Point(lon - 360 if lon > 180 else lon, lat)
+    polygon = point.buffer(buffer) if buffer else point
+
+    if dist:
+        dists = shapely.distance(geoms, polygon) #NaN for empty geometries
+        position = int(np.nanargmin(dists))
+        return [position], float(dists[position])
+
+    if not shapely.box(*gdf.total_bounds).contains(point):
+        return [], np.nan
+    return np.flatnonzero(shapely.intersects(geoms, polygon)).tolist(), np.nan
+
+
+def brute_force_many(gdf, lon, lat, buffer=0, dist=True):
+    """ Reference lookups of many stations, as GeographicShp.get_attr_many(): first polygon position (-1 if none) & distance """
+    results = [brute_force(gdf, x, y, buffer=buffer, dist=dist) for x, y in zip(lon, lat)]
+    positions = np.array([found[0] if found else -1 for found, _ in results])
+    return positions, np.array([d for _, d in results])
+
+
+def densified_boundaries(geoms, coarse=0.2):
+    """ Boundary lines of each geometry (list of arrays of lon/lat vertices), densified every 'coarse' degrees """
+    return [[] if (geom is None) or geom.is_empty else
+            [shapely.get_coordinates(line) for line in shapely.get_parts(shapely.boundary(shapely.segmentize(geom, coarse)))]
+            for geom in geoms]
+
+
+def geodesic_distances(geoms, boundaries, lon, lat):
+    """
+    Reference ellipsoidal distances (GRS80) [m] btw a station & polygons, as Geodesic.ellipsoidal_distance:
+    pyproj Geod.inv to sampled boundary points. 0 if station inside, inf if no geometry.
+
+    Segments AB of the densified boundaries (see densified_boundaries) which may hold a point nearer than the nearest vertex,
+    i.e. (d(A) + d(B) - length)/2 < nearest vertex distance, sampled with spacing 2h: sqrt(d**2 + h**2) - d < 1 m (d: distance lower bound).
+    Then samples within 2 m of the nearest one refined: 100 samples btw their neighbours, 3 times (< 1 mm).
+    """
+    def sample(a, b, n):
+        t = np.linspace(0, 1, n)[:, np.newaxis]
+        points = a + t * (b - a)
+        return points, GEOD.inv(np.full(n, lon), np.full(n, lat), points[:, 0], points[:, 1])[2]
+
+    dists = np.full(len(geoms), np.inf)
+    point = shapely.Point(lon - 360 if lon > 180 else lon, lat)
+    for num, (geom, lines) in enumerate(zip(geoms, boundaries)):
+        if not lines:
+            continue
+        if shapely.intersects(geom, point):
+            dists[num] = 0.
+            continue
+
+        vertices = [(line, GEOD.inv(np.full(len(line), lon), np.full(len(line), lat), line[:, 0], line[:, 1])[2]) for line in lines]
+        best = min(d.min() for _, d in vertices)
+        segments = []
+        for line, d in vertices:
+            lower = (d[:-1] + d[1:] - max_length(line[:-1], line[1:])) / 2
+            for i in np.flatnonzero(lower < best):
+                half = np.sqrt(2 * max(lower[i], 0) + 1)
+                segments.append(sample(line[i], line[i+1], int(max_length(line[i:i+1], line[i+1:i+2])[0] / (2 * half)) + 2))
+                best = min(best, segments[-1][1].min())
+
+        for points, d in segments:
+            for _ in range(3):
+                if d.min() > best + 2: #nearest point within 1 m of a sample
+                    break
+                j = np.argmin(d)
+                points, d = sample(points[max(j-1, 0)], points[min(j+1, len(points)-1)], 101)
+                best = min(best, d.min())
+        dists[num] = best
+    return dists
+
+
+def max_length(a, b):
+    """ Upper bound of the length [m] of lon/lat segments a-b: largest radius of curvature x lon/lat length (cos of min |lat|) """
+    lat_min = np.where(a[:, 1] * b[:, 1] <= 0, 0, np.minimum(np.abs(a[:, 1]), np.abs(b[:, 1])))
+    dlon, dlat = np.radians(np.abs(b[:, 0] - a[:, 0])), np.radians(np.abs(b[:, 1] - a[:, 1]))
+    return GEOD.a / np.sqrt(1 - GEOD.es) * np.hypot(dlat, dlon * np.cos(np.radians(lat_min)))
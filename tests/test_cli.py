@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Command line station annotator (see Cli)
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import io
+import pandas as pd
+
+#internal import
+from gnss2iso import Cli
+from gnss2iso.GeographicShp import GeographicShp
+
+
+def write_records(path, stations):
+    lon, lat = stations
+    lines = ["name,lon,lat,code"] + [f"{num:04d},{x:.5f},{y:.5f},{'NA' if num % 2 else '007'}" for num, (x, y) in enumerate(zip(lon, lat))]
+    path.write_text("\n".join(lines) + "\n")
+    return lines
+
+
+def test_records_unchanged(shapefile, stations, tmp_path, capsys):
+    lines = write_records(tmp_path / "stations.csv", stations)
+    assert Cli.main([shapefile, str(tmp_path / "stations.csv"), "--batch-size", "40", "-q"]) == 0
+
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == "name,lon,lat,code,ISO_A3_EH"
+    assert [line.rsplit(",", 1)[0] for line in out] == lines #names, coordinates & text columns as in input
+
+    iso = GeographicShp(shapefile).get_iso_many(lon=stations[0].round(5), lat=stations[1].round(5))
+    assert [line.rsplit(",", 1)[1] for line in out[1:]] == iso.tolist()
+
+
+def test_one_pool_for_all_batches(shapefile, stations, tmp_path, capsys, monkeypatch):
+    write_records(tmp_path / "stations.csv", stations)
+    args = [shapefile, str(tmp_path / "stations.csv"), "--batch-size", "40", "--get-dist", "-q"]
+    Cli.main(args)
+    expected = capsys.readouterr().out
+
+    started = []
+    start_pool = GeographicShp._start_pool
+    monkeypatch.setattr(GeographicShp, "_start_pool", lambda self, n_jobs: started.append(n_jobs) or start_pool(self, n_jobs))
+    Cli.main([*args, "--n-jobs", "2"])
+    assert started == [2] #4 batches, 1 pool
+    assert capsys.readouterr().out == expected
+
+
+def test_read_batches():
+    stream = io.StringIO("name;lon;lat\n0001;1.50;2\nABC;;NA\n")
+    batches = list(Cli.read_batches(stream, ";", 1))
+    assert [batch.to_dict("records") for batch in batches] == [[{"name": "0001", "lon": "1.50", "lat": "2"}],
+                                                               [{"name": "ABC", "lon": "", "lat": "NA"}]]
+    assert Cli.coordinates(batches[0], "lon").tolist() == [1.5]
+    assert pd.isna(Cli.coordinates(batches[1], "lon")).all()
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Geometries check (see GeographicShp.check_geometries_validity)
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+
+
+@pytest.mark.parametrize("progress", [False, True])
+def test_check_geometries_validity(shapefile, capsys, progress):
+    df_report = GeographicShp(shapefile).check_geometries_validity(chunk_size=10, report=True, progress=progress)
+    assert len(df_report) > 0 #overlapping polygons of the synthetic shapefile
+    assert (df_report["area"] > 0).all()
+
+    # progress bar only on request
+    assert bool(capsys.readouterr().err) == progress
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memory-mapped geometry store (see GeometryStore & GeographicShp.from_geometry_store): same lookups as the shapefile,
+store rewritten when the source shapefile changes
+
+@author: julienbarneoud
+"""
+import os
+import sys
+sys.path.append('..')
+import shutil
+import multiprocessing as mp
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+import geopandas as gpd
+import shapely
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+from gnss2iso.GeometryStore import GeometryStore
+
+
+def copy_shapefile(shapefile, directory):
+    root = os.path.splitext(shapefile)[0]
+    for ext in [".shp", ".shx", ".dbf", ".prj", ".cpg"]:
+        if os.path.isfile(root + ext):
+            shutil.copy(root + ext, directory)
+    return str(directory / os.path.basename(shapefile))
+
+
+def start(path, source=None, n=1):
+    """ Process start: GeographicShp obj(s) from the store, number of polygons """
+    return [len(GeographicShp.from_geometry_store(path, shapefile=source).gdf) for _ in range(n)]
+
+
+def fork_pool(n_workers):
+    if "fork" not in mp.get_all_start_methods():
+        pytest.skip("forked workers needed (store write counted in the parent)")
+    return ProcessPoolExecutor(n_workers, mp_context=mp.get_context("fork"))
+
+
+def test_same_lookups(shapefile, stations, tmp_path):
+    geo = GeographicShp(shapefile)
+    geo.export_geometry_store(str(tmp_path / "store"))
+    stored = GeographicShp.from_geometry_store(str(tmp_path / "store"))
+
+    assert stored.gdf.drop(columns="geometry").equals(geo.gdf.drop(columns="geometry"))
+    assert shapely.equals_exact(stored.gdf.geometry.values, geo.gdf.geometry.values, tolerance=0).all()
+    assert stored.get_iso_many(lon=stations[0], lat=stations[1]).equals(geo.get_iso_many(lon=stations[0], lat=stations[1]))
+
+
+def test_rewritten_if_shapefile_changed(shapefile, tmp_path):
+    source = copy_shapefile(shapefile, tmp_path)
+    path = str(tmp_path / "store")
+    GeographicShp.from_geometry_store(path, shapefile=source)
+    written = os.stat(os.path.join(path, "meta.json")).st_mtime_ns
+
+    # unchanged or only touched shapefile: store reused
+    GeographicShp.from_geometry_store(path, shapefile=source)
+    os.utime(source)
+    GeographicShp.from_geometry_store(path, shapefile=source)
+    assert os.stat(os.path.join(path, "meta.json")).st_mtime_ns == written
+    assert GeometryStore(path).up_to_date(source)
+
+    # border moved: store rewritten
+    gdf = gpd.read_file(source)
+    gdf.loc[0, "geometry"] = gdf.geometry[0].convex_hull
+    gdf.to_file(source)
+    assert not GeometryStore(path).up_to_date(source)
+
+    geo = GeographicShp.from_geometry_store(path, shapefile=source)
+    assert geo.gdf.geometry[0].equals(gdf.geometry[0])
+    assert GeometryStore(path).up_to_date(source)
+
+
+def test_concurrent_start(shapefile, tmp_path, monkeypatch):
+    source = copy_shapefile(shapefile, tmp_path)
+    path = str(tmp_path / "store")
+    writes = tmp_path / "writes"
+    write = GeometryStore.write.__func__
+    def counted_write(cls, *args, **kwargs):
+        with open(writes, "a") as f:
+            f.write("write\n")
+        return write(cls, *args, **kwargs)
+    monkeypatch.setattr(GeometryStore, "write", classmethod(counted_write))
+
+    # missing store: written once, then read by all processes
+    with fork_pool(4) as pool:
+        n_polygons = list(pool.map(start, repeat(path, 4), repeat(source, 4)))
+    assert n_polygons == [[len(gpd.read_file(source))]] * 4
+    assert writes.read_text().count("write") == 1
+
+
+def test_rewritten_while_read(shapefile, tmp_path):
+    path = str(tmp_path / "store")
+    gdf = GeographicShp(shapefile).gdf
+    GeometryStore.write(path, gdf)
+
+    # readers never see a partial or missing store
+    with fork_pool(2) as pool:
+        readers = [pool.submit(start, path, n=20) for _ in range(2)]
+        while not all(reader.done() for reader in readers):
+            GeometryStore.write(path, gdf)
+        assert all(reader.result() == [len(gdf)] * 20 for reader in readers)
+    assert sorted(os.listdir(tmp_path)) == ["store", "store.lock"]
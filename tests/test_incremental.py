@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental lookups (see GeographicShp.get_attr_incremental, ResultStore): same results as get_attr_many,
+only new, moved & near-boundary stations recomputed, all of them if the shapefile data changed
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import numpy as np
+import pandas as pd
+import shapely
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+from gnss2iso.ResultStore import ResultStore
+from gnss2iso.Synthetic import write_shapefile
+
+ATTR = ['ISO_A3_EH', 'SOV_A3']
+MARGIN = 0.001
+
+
+@pytest.fixture
+def geo(shapefile):
+    return GeographicShp(shapefile) #one per test (edited by tests)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "results.sqlite"))
+
+
+@pytest.fixture(scope="module")
+def catalogue(shapefile, stations):
+    """ Station names & coordinates, clear of polygon boundaries (never recomputed as near-boundary) """
+    boundaries = shapely.boundary(np.asarray(GeographicShp(shapefile).gdf.geometry.values))
+    clear = np.array([shapely.distance(shapely.Point(lon, lat), boundaries).min() > 2 * MARGIN for lon, lat in zip(*stations)])
+    lon, lat = stations[0][clear], stations[1][clear]
+    return np.array([f"STA{i}" for i in range(len(lon))]), lon, lat
+
+
+def check_results(geo, store, names, lon, lat, **expected):
+    """ get_attr_incremental() vs get_attr_many(), counts of reused/recomputed... results (see store.last_report) """
+    df_selected = geo.get_attr_incremental(store, names=names, lon=lon, lat=lat, attr=ATTR, get_dist=True, margin=MARGIN)
+    df_expected = geo.get_attr_many(lon=lon, lat=lat, attr=ATTR, get_dist=True)
+    assert df_selected.index.tolist() == names.tolist()
+    pd.testing.assert_frame_equal(df_selected.reset_index(drop=True), df_expected.reset_index(drop=True), check_dtype=False)
+    for key, count in expected.items():
+        assert store.last_report[key] == count, key
+    return df_selected
+
+
+def test_reused(geo, store, catalogue):
+    names, lon, lat = catalogue
+    check_results(geo, store, names, lon, lat, recomputed=len(names), new=len(names), reused=0)
+    check_results(geo, store, names, lon, lat, recomputed=0, reused=len(names))
+    assert len(store) == len(names)
+
+    # new stations & another lookup mode
+    check_results(geo, store, names[:5], lon[:5], lat[:5], recomputed=0, reused=5)
+    check_results(geo, store, np.append(names, "NEW"), np.r_[lon, 10.], np.r_[lat, 10.], recomputed=1, new=1)
+    geo.get_attr_incremental(store, names=names, lon=lon, lat=lat, attr=['ISO_A3_EH'], margin=MARGIN)
+    assert store.last_report["new"] == len(names)
+
+
+def test_moved(geo, store, catalogue):
+    names, lon, lat = catalogue
+    check_results(geo, store, names, lon, lat)
+
+    moved = lon.copy()
+    moved[:3] += 1e-4 #~10 m
+    moved[3:6] += 1e-10 #< 1 cm (tolerance): reused
+    check_results(geo, store, names, moved, lat, moved=3, recomputed=3, reused=len(names) - 3)
+
+    moved[:3] += 1. #1 degree: maybe another country
+    check_results(geo, store, names, moved, lat, moved=3, recomputed=3)
+
+
+def test_near_boundary(geo, store, catalogue):
+    names, lon, lat = catalogue
+    vertex = shapely.get_coordinates(geo.gdf.geometry.iloc[1].exterior)[0] + 1e-5 #polygon vertex
+    names, lon, lat = np.append(names, "BORDER"), np.r_[lon, vertex[0]], np.r_[lat, vertex[1]]
+
+    check_results(geo, store, names, lon, lat, recomputed=len(names))
+    for _ in range(2):
+        check_results(geo, store, names, lon, lat, near_boundary=1, recomputed=1, reused=len(names) - 1)
+
+
+def test_attribute_edit(geo, store, catalogue):
+    names, lon, lat = catalogue
+    df_selected = check_results(geo, store, names, lon, lat)
+
+    country = df_selected["ISO_A3_EH"].dropna().iloc[0]
+    geo.gdf.loc[geo.gdf["ISO_A3_EH"] == country, "ISO_A3_EH"] = "ZZZ" #geometries unchanged
+    df_selected = check_results(geo, store, names, lon, lat, shapefile_changed=len(names), recomputed=len(names), reused=0)
+    assert "ZZZ" in df_selected["ISO_A3_EH"].tolist()
+    assert country not in df_selected["ISO_A3_EH"].tolist()
+    check_results(geo, store, names, lon, lat, recomputed=0)
+
+
+def test_changed_shapefile(geo, store, catalogue, tmp_path):
+    names, lon, lat = catalogue
+    check_results(geo, store, names, lon, lat)
+
+    path = str(tmp_path / "countries.shp")
+    write_shapefile(path, n_polygons=30, n_vertices=10, seed=4)
+    check_results(GeographicShp(path), store, names, lon, lat, shapefile_changed=len(names), recomputed=len(names))
+    check_results(geo, store, names, lon, lat, shapefile_changed=len(names), recomputed=len(names))
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+get_country_ISOdist / get_country_ISOdist_many (cached reprojections & geometries by ISO code)
+give the same distances as the uncached formula: whole shapefile reprojected on each call
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import numpy as np
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+from gnss2iso.Station import Station
+
+ISOS = ["AAA", "AAH", "ABC", "AAB", "ZZZ", "XXX"] #unit & sovereignty codes, no country (ZZZ), unknown code
+
+
+def reference(gdf, iso, lon, lat, epsg="4978"):
+    """ Uncached distance [m] btw station & 'iso' country: gdf reprojected, then min distance to the polygons of this code """
+    gdf_countries = gdf.to_crs(f'EPSG:{epsg}')
+    selected = (gdf_countries["ISO_A3_EH"] == iso) | (gdf_countries["SOV_A3"] == iso)
+    if (not selected.any()) or iso == "ZZZ":
+        return -1
+    return Station(lon=lon, lat=lat).point_xyz.distance(gdf_countries.loc[selected, "geometry"]).min()
+
+
+@pytest.fixture
+def geo(shapefile):
+    return GeographicShp(shapefile)
+
+
+@pytest.fixture(scope="module")
+def few_stations(stations):
+    return stations[0][::10], stations[1][::10]
+
+
+@pytest.mark.parametrize("epsg", ["4978", 4087])
+def test_get_country_ISOdist(geo, few_stations, epsg):
+    for _ in range(2): #2nd pass: cached geometries
+        for lon, lat in zip(*few_stations):
+            for iso in ISOS:
+                expected = reference(geo.gdf, iso, lon, lat, epsg=epsg)
+                assert geo.get_country_ISOdist(iso, lon=lon, lat=lat, epsg=epsg) == pytest.approx(expected, rel=1e-9)
+
+
+def test_get_country_ISOdist_many(geo, few_stations):
+    dists = geo.get_country_ISOdist_many(ISOS, lon=few_stations[0], lat=few_stations[1])
+    assert dists.columns.tolist() == ISOS
+    expected = [[reference(geo.gdf, iso, lon, lat) for iso in ISOS] for lon, lat in zip(*few_stations)]
+    np.testing.assert_allclose(dists.to_numpy(), expected, rtol=1e-9)
+    assert (dists[["ZZZ", "XXX"]] == -1).all().all()
+
+
+def test_edited_codes(geo, few_stations):
+    lon, lat = few_stations[0][0], few_stations[1][0]
+    geo.get_country_ISOdist("ABC", lon=lon, lat=lat)
+    geo.get_country_ISOdist_many(["ABC"], lon=[lon], lat=[lat])
+
+    # unit code renamed, sovereignty code reassigned
+    geo.gdf.loc[geo.gdf.index[geo.gdf["ISO_A3_EH"] == "ABC"], "ISO_A3_EH"] = "NEW"
+    geo.gdf.loc[geo.gdf.index[:3], "SOV_A3"] = "SOV"
+
+    for iso in ["NEW", "ABC", "SOV", "AAA"]:
+        expected = reference(geo.gdf, iso, lon, lat)
+        assert geo.get_country_ISOdist(iso, lon=lon, lat=lat) == pytest.approx(expected, rel=1e-9)
+        assert geo.get_country_ISOdist_many([iso], lon=[lon], lat=[lat]).iloc[0, 0] == pytest.approx(expected, rel=1e-9)
+    assert geo.get_country_ISOdist("ABC", lon=lon, lat=lat) == -1
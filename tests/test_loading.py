@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Loading options of GeographicShp: attribute columns & region (bbox or mask)
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import shapely
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+
+REGION = (-60, -30, 60, 30)
+
+
+def test_columns(shapefile):
+    geo = GeographicShp(shapefile, columns=['NAME_LONG'])
+    assert set(geo.gdf.columns) == {'NAME_LONG', 'ISO_A3_EH', 'SOV_A3', geo.gdf.geometry.name}
+
+
+@pytest.mark.parametrize("region", ["bbox", "mask"])
+def test_region(shapefile, region):
+    full = GeographicShp(shapefile)
+    kwargs = {"bbox": REGION} if region == "bbox" else {"mask": shapely.box(*REGION)}
+    geo = GeographicShp(shapefile, **kwargs)
+
+    expected = shapely.intersects(full.gdf.geometry.values, shapely.box(*REGION))
+    assert geo.gdf['ISO_A3_EH'].tolist() == full.gdf['ISO_A3_EH'][expected].tolist()
+    assert geo.get_iso(lon=0, lat=0) == full.get_iso(lon=0, lat=0)
+
+
+def test_bbox_and_mask(shapefile):
+    with pytest.raises(ValueError, match="'bbox' and 'mask' cannot be combined"):
+        GeographicShp(shapefile, bbox=REGION, mask=shapely.box(*REGION))
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lookup cache (see GeographicShp.enable_lookup_cache): memoized lookups consistent with self.gdf edits
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import shapely
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+
+
+def test_attribute_edit(shapefile, stations):
+    geo = GeographicShp(shapefile)
+    geo.enable_lookup_cache(maxsize=1000)
+    lon, lat = stations[0][0], stations[1][0]
+
+    df_selected = geo.get_attr(lon=lon, lat=lat, attr=['ISO_A3_EH', 'SOV_A3'], get_dist=True)
+    geo.gdf.loc[df_selected.name, 'ISO_A3_EH'] = 'NEW'
+
+    edited = geo.get_attr(lon=lon, lat=lat, attr=['ISO_A3_EH', 'SOV_A3'], get_dist=True)
+    assert geo.lookup_cache_info()["hits"] == 1 #polygon memoized, attributes read from geo.gdf
+    assert edited['ISO_A3_EH'] == 'NEW'
+    assert edited['SOV_A3'] == df_selected['SOV_A3']
+    assert edited['dist'] == df_selected['dist']
+
+
+def test_geometry_edit(shapefile, stations):
+    geo = GeographicShp(shapefile)
+    geo.enable_lookup_cache(maxsize=1000)
+    lon, lat = stations[0][0], stations[1][0]
+
+    num = geo.get_attr(lon=lon, lat=lat).name
+    geo.gdf.loc[num, 'geometry'] = shapely.Point(0, 0).buffer(1e-3) #polygon moved away: lookups cleared
+
+    assert geo.get_attr(lon=lon, lat=lat).name != num
+    assert geo.lookup_cache_info()["hits"] == 0
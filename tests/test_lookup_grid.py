@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Saved lookup grids (see GeographicShp.build_grid): reused while the shapefile is unchanged, rebuilt otherwise
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import numpy as np
+import geopandas as gpd
+import shapely
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+from reference import brute_force
+
+
+def test_saved_grid_reused(shapefile, tmp_path, caplog):
+    path = str(tmp_path / "grid.npz")
+    grid = GeographicShp(shapefile).build_grid(resolution=1.0, path=path)
+
+    caplog.set_level("INFO", logger="gnss2iso")
+    reloaded = GeographicShp(shapefile).build_grid(resolution=1.0, path=path)
+    assert "out of date" not in caplog.text
+    np.testing.assert_array_equal(reloaded.cells, grid.cells)
+
+
+def test_saved_grid_rebuilt_after_border_edit(shapefile, stations, tmp_path, caplog):
+    path = str(tmp_path / "grid.npz")
+    grid = GeographicShp(shapefile).build_grid(resolution=1.0, path=path)
+
+    # border moved, same polygon bounds: convex hull of the largest polygon
+    gdf = gpd.read_file(shapefile)
+    num = int(np.argmax(shapely.area(gdf.geometry.values)))
+    gdf.loc[num, "geometry"] = gdf.geometry[num].convex_hull
+    assert shapely.equals_exact(shapely.box(*gdf.geometry[num].bounds), shapely.box(*gpd.read_file(shapefile).geometry[num].bounds))
+    edited = str(tmp_path / "edited.shp")
+    gdf.to_file(edited)
+
+    caplog.set_level("INFO", logger="gnss2iso")
+    geo = GeographicShp(edited)
+    rebuilt = geo.build_grid(resolution=1.0, path=path)
+    assert "out of date" in caplog.text
+    assert rebuilt.fingerprint != grid.fingerprint
+    np.testing.assert_array_equal(rebuilt.cells, GeographicShp(edited).build_grid(resolution=1.0).cells)
+
+    for lon, lat in zip(*stations):
+        found, _ = brute_force(gdf, lon, lat, dist=False)
+        assert geo.get_iso(lon=lon, lat=lat, dist=False) == (gdf["ISO_A3_EH"].iloc[found[0]] if found else '000')
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Accelerated lookups (spatial index, lookup grid, multi-resolution geometries, lookup cache, fast lookups, LayerRegistry)
+give the same answers as a brute-force reference (see reference.py)
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+from gnss2iso.LayerRegistry import LayerRegistry
+from reference import brute_force, brute_force_many
+
+# optional accelerations: results must not depend on them
+CONFIGS = {
+    "exact": lambda geo: None,
+    "grid": lambda geo: geo.build_grid(resolution=1.0),
+    "lod": lambda geo: geo.build_lod(tolerance=0.05),
+    "lod_split": lambda geo: geo.build_lod(tolerance=0.05, split_parts=True),
+    "lookup_cache": lambda geo: geo.enable_lookup_cache(maxsize=50),
+}
+
+# lookup methods
+MODES = {
+    "dist": {"buffer": 0, "dist": True},
+    "buffer": {"buffer": 0.5, "dist": False},
+    "dist_buffer": {"buffer": 0.5, "dist": True},
+    "inclusion": {"buffer": 0, "dist": False},
+}
+
+
+@pytest.fixture(scope="module")
+def gdf(shapefile):
+    return gpd.read_file(shapefile)
+
+
+@pytest.fixture(params=list(CONFIGS))
+def geo(request, shapefile):
+    geo = GeographicShp(shapefile)
+    CONFIGS[request.param](geo)
+    return geo
+
+
+@pytest.fixture(params=list(MODES))
+def mode(request):
+    return MODES[request.param]
+
+
+def expected_iso(gdf, found):
+    return gdf["ISO_A3_EH"].iloc[found[0]] if found else '000'
+
+
+def test_get_iso(geo, gdf, stations, mode):
+    for _ in range(2): #2nd pass: lookup cache hits
+        for lon, lat in zip(*stations):
+            found, d = brute_force(gdf, lon, lat, **mode)
+            assert geo.get_iso(lon=lon, lat=lat, **mode) == expected_iso(gdf, found)
+            if mode["dist"]:
+                iso, dist = geo.get_iso(lon=lon, lat=lat, get_dist=True, **mode)
+                assert iso == expected_iso(gdf, found)
+                assert dist == pytest.approx(d, abs=1e-9)
+
+
+def test_get_attr(geo, gdf, stations, mode):
+    for _ in range(2):
+        for lon, lat in zip(*stations):
+            found, d = brute_force(gdf, lon, lat, **mode)
+            df_selected = geo.get_attr(lon=lon, lat=lat, attr=['ISO_A3_EH', 'SOV_A3'], get_dist=True, **mode)
+            if mode["dist"]: #one polygon: pandas.Series named after its index
+                assert df_selected.name == gdf.index[found[0]]
+                assert df_selected["dist"] == pytest.approx(d, abs=1e-9)
+            elif not found:
+                assert df_selected is None
+            else: #all polygons intersecting the station
+                assert df_selected.index.tolist() == gdf.index[found].tolist()
+
+
+def test_lookup(geo, gdf, stations, mode):
+    results = [geo.lookup(lon=lon, lat=lat, attr=['ISO_A3_EH', 'SOV_A3'], **mode) for lon, lat in zip(*stations)]
+    for result, (lon, lat) in zip(results, zip(*stations)):
+        found, d = brute_force(gdf, lon, lat, **mode)
+        assert result.polygon == (found[0] if found else -1)
+        assert result["ISO_A3_EH"] == (gdf["ISO_A3_EH"].iloc[found[0]] if found else None)
+        assert result.dist == pytest.approx(d, abs=1e-9, nan_ok=True)
+
+    df_selected = geo.to_dataframe(results, get_dist=True)
+    positions, dists = brute_force_many(gdf, *stations, **mode)
+    expected = gdf["ISO_A3_EH"].reset_index(drop=True).reindex(positions).to_numpy(dtype=object)
+    assert pd.Series(df_selected["ISO_A3_EH"].to_numpy(dtype=object)).equals(pd.Series(expected))
+    np.testing.assert_allclose(df_selected["dist"], dists, atol=1e-9)
+
+
+def test_get_attr_many(geo, gdf, stations, mode):
+    positions, dists = brute_force_many(gdf, *stations, **mode)
+    for _ in range(2):
+        df_selected = geo.get_attr_many(lon=stations[0], lat=stations[1], attr=['ISO_A3_EH', 'SOV_A3'], get_dist=True, **mode)
+        expected = gdf[['ISO_A3_EH', 'SOV_A3']].reset_index(drop=True).reindex(positions)
+        pd.testing.assert_frame_equal(df_selected[['ISO_A3_EH', 'SOV_A3']], expected.set_axis(df_selected.index), check_dtype=False)
+        if mode["dist"]:
+            np.testing.assert_allclose(df_selected["dist"], dists, atol=1e-9)
+
+        iso = geo.get_iso_many(lon=stations[0], lat=stations[1], **mode)
+        assert iso.tolist() == expected["ISO_A3_EH"].fillna('000').tolist()
+
+
+@pytest.mark.parametrize("buffer", [0, 0.5])
+def test_layer_registry(shapefile, gdf, stations, buffer):
+    registry = LayerRegistry()
+    registry.add("dist", shapefile, attr=['ISO_A3_EH'], dist=True)
+    registry.add("inclusion", GeographicShp(shapefile), attr=['ISO_A3_EH', 'SOV_A3'], dist=False)
+    df_layers = registry.get_attr_many(lon=stations[0], lat=stations[1], buffer=buffer, get_dist=True)
+
+    for name, dist in [("dist", True), ("inclusion", False)]:
+        positions, dists = brute_force_many(gdf, *stations, buffer=buffer, dist=dist)
+        attr = registry.attr[name]
+        expected = gdf[attr].reset_index(drop=True).reindex(positions).set_axis(df_layers.index)
+        pd.testing.assert_frame_equal(df_layers[name][attr], expected, check_dtype=False)
+        if dist:
+            np.testing.assert_allclose(df_layers[(name, "dist")], dists, atol=1e-9)
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_attribute_edit(shapefile, stations, cache):
+    geo = GeographicShp(shapefile)
+    if cache:
+        geo.enable_lookup_cache(maxsize=1000)
+    lon, lat = stations[0][0], stations[1][0]
+
+    result = geo.lookup(lon=lon, lat=lat, attr=['ISO_A3_EH', 'NAME_LONG'])
+    geo.get_iso(lon=lon, lat=lat)
+    geo.to_dataframe([result])
+    geo.gdf.loc[geo.gdf.index[result.polygon], ['ISO_A3_EH', 'NAME_LONG']] = ['NEW', 'New name']
+
+    # all lookup paths read the edited table
+    assert geo.get_iso(lon=lon, lat=lat) == 'NEW'
+    assert geo.get_iso(lon=lon, lat=lat, get_dist=True)[0] == 'NEW'
+    assert geo.lookup(lon=lon, lat=lat, attr=['ISO_A3_EH', 'NAME_LONG']).values == ('NEW', 'New name')
+    assert geo.to_dataframe([result])['NAME_LONG'].tolist() == ['New name']
+    assert geo.get_iso_many(lon=[lon], lat=[lat]).tolist() == ['NEW']
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Opt-in metrics (see Metrics, GeographicShp.enable_metrics): calls, durations & counters recorded, snapshot & report
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import io
+import json
+import pickle
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+from gnss2iso.Metrics import Metrics
+
+
+def test_record():
+    metrics = Metrics(n_timings=3)
+    for duration in [0.1, 0.2, 0.3, 0.4]:
+        metrics.record("get_iso", duration)
+    metrics.record("get_attr", 1.0)
+
+    assert metrics.calls == {"get_iso": 4, "get_attr": 1}
+    assert metrics.time["get_iso"] == pytest.approx(1.0)
+
+    snapshot = metrics.snapshot()
+    get_iso = snapshot["methods"]["get_iso"]
+    assert (get_iso["calls"], get_iso["total_s"], get_iso["mean_ms"]) == (4, pytest.approx(1.0), pytest.approx(250))
+    assert get_iso["p50_ms"] == pytest.approx(300) #percentiles: 3 last durations only
+    assert get_iso["max_ms"] == pytest.approx(400)
+
+    report = metrics.report()
+    assert report.index.tolist() == ["get_iso", "get_attr"] #sorted by cumulative time
+    assert report.loc["get_attr", "calls"] == 1
+
+
+def test_count():
+    metrics = Metrics()
+    metrics.count("grid.border")
+    metrics.count("grid.border", 4)
+    metrics.count("warnings.no_country", 2)
+    assert metrics.snapshot()["counters"] == {"grid.border": 5, "warnings.no_country": 2}
+
+    metrics.reset()
+    assert metrics.snapshot()["methods"] == {}
+    assert metrics.snapshot()["counters"] == {}
+
+
+def test_dump_pickle():
+    metrics = Metrics()
+    metrics.record("get_iso", 0.01)
+    metrics.count("candidates.intersects", 3)
+
+    stream = io.StringIO()
+    metrics.dump(stream)
+    assert json.loads(stream.getvalue()) == json.loads(json.dumps(metrics.snapshot()))
+
+    copy = pickle.loads(pickle.dumps(metrics)) #worker processes: lock recreated
+    copy.record("get_iso", 0.03)
+    copy.record("get_attr", 0.01)
+    assert copy.calls == {"get_iso": 2, "get_attr": 1}
+    assert copy.counters == {"candidates.intersects": 3}
+
+
+def test_enable_metrics(shapefile, stations):
+    geo = GeographicShp(shapefile)
+    assert geo.metrics is None
+    geo.get_iso_many(lon=stations[0], lat=stations[1]) #not recorded
+
+    metrics = geo.enable_metrics()
+    geo.get_iso_many(lon=stations[0], lat=stations[1])
+    first = metrics.snapshot()["counters"]
+    assert first["candidates.intersects"] > 0
+    assert first["warnings.not_in_bbox"] > 0 #stations out of the shapefile bbox
+
+    geo.get_iso_many(lon=stations[0], lat=stations[1])
+    geo.get_iso(lon=stations[0][0], lat=stations[1][0])
+    snapshot = metrics.snapshot()
+    assert snapshot["methods"]["get_iso_many"]["calls"] == 2
+    assert snapshot["methods"]["get_iso"]["calls"] == 1
+    assert snapshot["counters"]["warnings.not_in_bbox"] == 2 * first["warnings.not_in_bbox"] #same batch twice
+
+    assert geo.enable_metrics(n_timings=0) is None
+    assert geo.metrics is None
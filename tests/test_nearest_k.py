@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+k nearest polygons (see GeographicShp.get_nearest_k) against reference geodesic distances (pyproj, densified boundaries),
+with missing & empty geometries in the shapefile, stations near the poles & the antimeridian
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import numpy as np
+import shapely
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+from gnss2iso.Synthetic import synthetic_countries, synthetic_stations
+from reference import densified_boundaries, geodesic_distances
+
+ATOL = 0.01 #reference distances: nearest sampled boundary point (< 1 mm)
+
+# high latitudes & antimeridian
+POLAR = np.array([[-10.2, -89.98], [120.0, -89.5], [45.0, -85.0], [-179.9, -80.0], [179.99, 75.0],
+                  [-60.0, 82.0], [0.0, 88.0], [150.0, 89.99]]).T
+
+
+@pytest.fixture(scope="module")
+def geo(shapefile):
+    geo = GeographicShp(shapefile)
+    geoms = np.asarray(geo.gdf.geometry.values).copy()
+    geoms[[0, 7, len(geoms) - 1]] = [None, shapely.Polygon(), None] #not in the spatial index
+    geo.gdf["geometry"] = geoms
+    geo.gdf["position"] = np.arange(len(geo.gdf))
+    return geo
+
+
+def reference_distances(geo, lon, lat):
+    """ Reference distances (stations x polygons) [m] """
+    geoms = np.asarray(geo.gdf.geometry.values)
+    boundaries = densified_boundaries(geoms)
+    return np.array([geodesic_distances(geoms, boundaries, x, y) for x, y in zip(lon, lat)])
+
+
+def check_nearest(geo, lon, lat, reference, k):
+    """ get_nearest_k() ranks & distances vs reference distances of all polygons """
+    df_nearest = geo.get_nearest_k(lon=lon, lat=lat, k=k, attr=['position'])
+
+    for num, ref in enumerate(reference):
+        n_rows = min(k, np.count_nonzero(np.isfinite(ref)))
+        positions, dists = df_nearest.loc[num, "position"].to_numpy(), df_nearest.loc[num, "dist"].to_numpy()
+        assert len(positions) == n_rows
+
+        # distances of the ranked polygons, no nearer polygon missed
+        assert np.all((dists <= ref[positions] + 1e-3) & (ref[positions] - dists < ATOL))
+        assert np.all(np.abs(np.sort(ref)[:n_rows] - dists) < ATOL)
+
+        # ranks: increasing distances, first polygon first if equal distances
+        assert np.all(np.diff(dists) >= 0)
+        assert np.all(np.diff(positions)[np.diff(dists) == 0] > 0)
+
+
+@pytest.fixture(scope="module")
+def some_stations(geo, stations):
+    lon = np.r_[stations[0][:15], stations[0][-4:], POLAR[0]]
+    lat = np.r_[stations[1][:15], stations[1][-4:], POLAR[1]]
+    return lon, lat, reference_distances(geo, lon, lat)
+
+
+@pytest.mark.parametrize("k", [1, 3, 1000])
+def test_get_nearest_k(geo, some_stations, k):
+    check_nearest(geo, *some_stations, k=k)
+
+
+def test_high_latitudes(tmp_path):
+    """ far & polar polygons: stations at high latitudes, 4th nearest polygon hundreds of km away """
+    gdf = synthetic_countries(n_polygons=80, n_vertices=40, seed=1)
+    gdf.to_file(tmp_path / "countries.shp")
+    geo = GeographicShp(str(tmp_path / "countries.shp"))
+    geo.gdf["position"] = np.arange(len(geo.gdf))
+
+    lon, lat = synthetic_stations(150, gdf, near_border=0.3, seed=5)
+    polar = np.abs(lat) > 70
+    check_nearest(geo, lon[polar], lat[polar], reference_distances(geo, lon[polar], lat[polar]), k=4)
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Process-pool mode of batch methods (n_jobs > 1, stations split in chunks) gives the same results as the serial mode
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import pandas as pd
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+
+PARALLEL = {"n_jobs": 2, "chunk_size": 40} #several chunks per worker, last chunk incomplete
+
+
+@pytest.fixture(scope="module")
+def geo(shapefile):
+    return GeographicShp(shapefile)
+
+
+@pytest.mark.parametrize("buffer, dist", [(0, True), (0.5, False), (0, False)])
+def test_get_attr_many(geo, stations, buffer, dist):
+    kwargs = dict(lon=stations[0], lat=stations[1], attr=['ISO_A3_EH', 'SOV_A3'], buffer=buffer, dist=dist, get_dist=True)
+    pd.testing.assert_frame_equal(geo.get_attr_many(**kwargs, **PARALLEL), geo.get_attr_many(**kwargs))
+
+    kwargs = dict(lon=stations[0], lat=stations[1], buffer=buffer, dist=dist)
+    assert geo.get_iso_many(**kwargs, **PARALLEL).tolist() == geo.get_iso_many(**kwargs).tolist()
+
+
+def test_get_nearest_k(geo, stations):
+    kwargs = dict(lon=stations[0], lat=stations[1], k=3, attr=['ISO_A3_EH'])
+    pd.testing.assert_frame_equal(geo.get_nearest_k(**kwargs, **PARALLEL), geo.get_nearest_k(**kwargs))
+
+
+def test_get_country_ISOdist_many(geo, stations):
+    kwargs = dict(iso=["AAA", "AAH", "ZZZ"], lon=stations[0], lat=stations[1])
+    pd.testing.assert_frame_equal(geo.get_country_ISOdist_many(**kwargs, **PARALLEL), geo.get_country_ISOdist_many(**kwargs))
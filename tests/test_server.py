@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local lookup service (see Server): localhost HTTP requests, micro-batching, /stats & error statuses
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import json
+import asyncio
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+from gnss2iso.Server import LookupServer
+
+
+async def request(port, method, target, body=b""):
+    """ One HTTP request on a new connection: (status, JSON payload) """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+
+    head, _, data = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), json.loads(data)
+
+
+@pytest.fixture(scope="module")
+def geo(shapefile):
+    return GeographicShp(shapefile)
+
+
+def serve(geo, scenario):
+    """ Runs scenario(server, port) against a server on a free localhost port """
+    async def main():
+        server = LookupServer(geo, batch_window=0.05)
+        await server.start(host="127.0.0.1", port=0)
+        try:
+            return await scenario(server, server.server.sockets[0].getsockname()[1])
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_batched_lookups(geo, stations):
+    lon, lat = stations[0][:60], stations[1][:60]
+
+    async def scenario(server, port):
+        responses = await asyncio.gather(*[request(port, "GET", f"/iso?lon={x}&lat={y}&get_dist=1") for x, y in zip(lon, lat)])
+        post = await request(port, "POST", "/attr", json.dumps({"lon": lon[0], "lat": lat[0], "attr": ["SOV_A3"], "dist": False}).encode())
+        return responses, post, (await request(port, "GET", "/stats"))[1]
+
+    responses, post, stats = serve(geo, scenario)
+    expected = geo.get_iso_many(lon=lon, lat=lat, get_dist=True)
+    assert [status for status, _ in responses] == [200] * len(lon)
+    assert [payload["iso"] for _, payload in responses] == expected["ISO_A3_EH"].tolist()
+    assert [payload["dist"] for _, payload in responses] == pytest.approx(expected["dist"].tolist())
+
+    found = geo.lookup(lon=lon[0], lat=lat[0], attr=["SOV_A3"], dist=False)
+    assert post == (200, {"SOV_A3": found["SOV_A3"]})
+
+    # concurrent requests coalesced into micro-batches
+    assert stats["requests"] == len(lon) + 1
+    assert stats["errors"] == 0
+    assert stats["batches"] < stats["requests"]
+    assert stats["mean_batch_size"] > 1
+    assert set(stats["latency_ms"]) == {"p50", "p90", "p99", "p99.9", "max"}
+
+
+def test_error_statuses(geo):
+    async def scenario(server, port):
+        return [await request(port, "POST", "/attr", b"{not json"),
+                await request(port, "POST", "/attr", b'["lon", "lat"]'),
+                await request(port, "GET", "/iso?lon=1"),
+                await request(port, "GET", "/iso?lon=abc&lat=1"),
+                await request(port, "GET", "/unknown"),
+                await request(port, "DELETE", "/iso"),
+                await request(port, "GET", "/stats")]
+
+    *errors, (_, stats) = serve(geo, scenario)
+    assert [status for status, _ in errors] == [400, 400, 400, 400, 404, 405]
+    assert all("error" in payload for _, payload in errors)
+    assert stats["errors"] == 4
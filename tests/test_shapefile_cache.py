@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent shapefile cache (GeographicShp 'cache_dir'): reused while the shapefile content is unchanged,
+invalidated when it changes, repaired geometries persisted
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import os
+import numpy as np
+import shapely
+import pytest
+
+#internal import
+from gnss2iso.GeographicShp import GeographicShp
+from gnss2iso.ShapefileCache import ShapefileCache
+from gnss2iso.Synthetic import write_shapefile
+
+
+@pytest.fixture
+def shp(tmp_path):
+    """ Small shapefile, one per test (modified by tests) """
+    path = str(tmp_path / "countries.shp")
+    write_shapefile(path, n_polygons=20, n_vertices=10, seed=3)
+    return path
+
+
+def forbid_reading(monkeypatch):
+    """ Shapefile reading forbidden: GeographicShp must be loaded from the cache """
+    monkeypatch.setattr(GeographicShp, "_read_file", lambda self: pytest.fail("shapefile read despite a valid cache"))
+
+
+def assert_same_gdf(gdf1, gdf2):
+    assert gdf1.columns.tolist() == gdf2.columns.tolist()
+    assert gdf1.drop(columns="geometry").equals(gdf2.drop(columns="geometry"))
+    assert shapely.equals_exact(np.asarray(gdf1.geometry.values), np.asarray(gdf2.geometry.values), tolerance=0).all()
+
+
+def test_reused(shp, tmp_path, monkeypatch):
+    geo = GeographicShp(shp, cache_dir=str(tmp_path / "cache")) #shapefile read & cached
+    forbid_reading(monkeypatch)
+
+    cached = GeographicShp(shp, cache_dir=str(tmp_path / "cache"))
+    assert_same_gdf(cached.gdf, geo.gdf)
+    assert cached.gdf.crs == geo.gdf.crs
+    assert cached.get_iso_many(lon=[0, 10, 100], lat=[0, 45, -30]).tolist() == geo.get_iso_many(lon=[0, 10, 100], lat=[0, 45, -30]).tolist()
+
+    # only touched (same content): still reused
+    os.utime(shp, ns=(0, 0))
+    assert_same_gdf(GeographicShp(shp, cache_dir=str(tmp_path / "cache")).gdf, geo.gdf)
+
+
+def test_invalidated(shp, tmp_path):
+    GeographicShp(shp, cache_dir=str(tmp_path / "cache"))
+
+    # same path, new content
+    write_shapefile(shp, n_polygons=30, n_vertices=10, seed=4)
+    geo = GeographicShp(shp, cache_dir=str(tmp_path / "cache"))
+    assert_same_gdf(geo.gdf, GeographicShp(shp).gdf)
+
+
+def test_loading_options(shp, tmp_path):
+    cache = ShapefileCache(str(tmp_path / "cache"))
+    assert cache.cache_path(shp) != cache.cache_path(shp, {"columns": ("NAME_LONG",)})
+
+    GeographicShp(shp, cache_dir=str(tmp_path / "cache"))
+    geo = GeographicShp(shp, cache_dir=str(tmp_path / "cache"), columns=["NAME_LONG"])
+    assert "ADM0_A3_US" not in geo.gdf.columns
+
+
+def test_repaired_geometries(shp, tmp_path, monkeypatch):
+    import geopandas as gpd
+    gdf = gpd.read_file(shp)
+    gdf.loc[0, "geometry"] = shapely.Polygon([(0, 0), (10, 10), (10, 0), (0, 10)]) #bowtie: invalid
+    gdf.to_file(shp)
+
+    geo = GeographicShp(shp, cache_dir=str(tmp_path / "cache"))
+    assert not shapely.is_valid(geo.gdf.geometry.iloc[0])
+    geo.check_geometries_validity()
+    assert shapely.is_valid(geo.gdf.geometry.iloc[0])
+
+    forbid_reading(monkeypatch)
+    cached = GeographicShp(shp, cache_dir=str(tmp_path / "cache"))
+    assert_same_gdf(cached.gdf, geo.gdf)
+
+
+def test_unreadable(shp, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    geo = GeographicShp(shp, cache_dir=cache_dir)
+    with open(ShapefileCache(cache_dir).cache_path(shp), "wb") as f:
+        f.write(b"corrupted")
+    assert_same_gdf(GeographicShp(shp, cache_dir=cache_dir).gdf, geo.gdf)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+StationArray (columnar, vectorized) gives the same coordinates as one Station obj per station
+
+@author: julienbarneoud
+"""
+import sys
+sys.path.append('..')
+import numpy as np
+import pytest
+
+#internal import
+from gnss2iso.Station import Station
+from gnss2iso.StationArray import StationArray
+
+LON = np.array([0.0, 2.35, -73.9, 190.0, 359.5, -180.0, 45.0])
+LAT = np.array([0.0, 48.85, 40.7, -15.0, 89.9, -45.0, -90.0])
+H = np.array([0.0, 35.0, 10.0, -20.0, 4000.0, 0.0, 2800.0])
+
+ATTRS = ["lon", "lon360", "lat", "h", "x", "y", "z"]
+
+
+def assert_same_station(station, array, i):
+    for attr in ATTRS:
+        assert getattr(array, attr)[i] == pytest.approx(getattr(station, attr), abs=1e-6), attr
+
+
+def test_geographic():
+    array = StationArray(lon=LON, lat=LAT, h=H)
+    for i, (lon, lat, h) in enumerate(zip(LON, LAT, H)):
+        assert_same_station(Station(lon=lon, lat=lat, h=h), array, i)
+
+
+def test_cartesian():
+    x, y, z = StationArray(lon=LON, lat=LAT, h=H).geo2xyz(LON, LAT, H)
+    array = StationArray(x=x, y=y, z=z)
+    for i in range(len(x)):
+        assert_same_station(Station(x=x[i], y=y[i], z=z[i]), array, i)
+
+    # back to the input geographic coordinates (except poles longitude)
+    np.testing.assert_allclose(array.lat, LAT, atol=1e-9)
+    np.testing.assert_allclose(array.h, H, atol=1e-6)
+    np.testing.assert_allclose(array.lon[:-1], np.where(LON > 180, LON - 360, LON)[:-1], atol=1e-9)
+
+
+def test_getitem():
+    array = StationArray(lon=LON, lat=LAT, h=H, name=[f"STA{i}" for i in range(len(LON))], network=np.arange(len(LON)))
+
+    station = array[3]
+    assert isinstance(station, Station)
+    assert_same_station(station, array, 3)
+    assert (station.name, station.iso, station.network) == ("STA3", '000', 3)
+
+    for item in [slice(1, 4), LAT > 0, [5, 0]]:
+        sub = array[item]
+        assert isinstance(sub, StationArray)
+        assert sub.name.tolist() == array.name[item].tolist()
+        assert sub.meta["network"].tolist() == array.meta["network"][item].tolist()
+        for attr in ATTRS:
+            np.testing.assert_allclose(getattr(sub, attr), getattr(array, attr)[item])
+
+
+def test_from_stations():
+    stations = [Station(lon=lon, lat=lat, h=h, name=f"STA{i}") for i, (lon, lat, h) in enumerate(zip(LON, LAT, H))]
+    array = StationArray.from_stations(stations)
+    assert len(array) == len(stations)
+    assert array.name.tolist() == [s.name for s in stations]
+    for i, station in enumerate(stations):
+        assert_same_station(station, array, i)
+
+
+def test_points():
+    array = StationArray(lon=LON, lat=LAT)
+    assert array._point is None #built on first access
+    assert [(p.x, p.y) for p in array.point] == [(s.point.x, s.point.y) for s in (array[i] for i in range(len(array)))]
+
+
+@pytest.mark.parametrize("kwargs", [{"lon": [0, 1]}, {"lon": [0, 1], "lat": [0]}, {"x": [1e6], "y": [0]},
+                                    {"lon": [0, 1], "lat": [0, 1], "name": ["A"]}])
+def test_invalid(kwargs):
+    with pytest.raises(ValueError):
+        StationArray(**kwargs)